@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Mapping
+from pathlib import Path
+from typing import BinaryIO
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.repositories.archives import ArchiveHandlePool
+
+
+class FileRangeResponse(Response):
+    """Streams the inclusive byte range ``[start, end]`` of a file.
+
+    The range is read in chunks through a worker thread, like Starlette's
+    ``FileResponse``; uvicorn offers no ASGI extension that would let the body
+    bypass Python buffers. Range selection stays with the route, which serves a
+    single range against its weak ETag and falls back to the full body otherwise.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        start: int,
+        end: int,
+        status_code: int,
+        headers: Mapping[str, str],
+        media_type: str,
+    ) -> None:
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.end = end
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD" or self.end < self.start:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        async with anyio.create_task_group() as task_group:
+
+            async def stream() -> None:
+                await self._send_chunks(send)
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(stream)
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            task_group.cancel_scope.cancel()
+
+    async def _send_chunks(self, send: Send) -> None:
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class ArchiveMemberResponse(Response):
+    """Streams the inclusive byte range ``[start, end]`` of an archive member.
+
+    The member is opened and positioned at ``start`` on a worker thread before the
+    response starts, so a failed open still becomes an error response; the range is
+    then read and sent in chunks. Stored members are read straight from the archive
+    file at their data offset, and compressed ones through ``ZipFile.open``.
+    """
+
+    chunk_size = FileRangeResponse.chunk_size
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        archives: ArchiveHandlePool,
+        start: int,
+        end: int,
+        status_code: int,
+        headers: Mapping[str, str],
+        media_type: str,
+    ) -> None:
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = Path(path)
+        self.archives = archives
+        self.start = start
+        self.end = end
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["method"].upper() == "HEAD" or self.end < self.start:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        member = await anyio.to_thread.run_sync(self._open)
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            async with anyio.create_task_group() as task_group:
+
+                async def stream() -> None:
+                    await self._send_chunks(member, send)
+                    task_group.cancel_scope.cancel()
+
+                task_group.start_soon(stream)
+                while (await receive())["type"] != "http.disconnect":
+                    pass
+                task_group.cancel_scope.cancel()
+        finally:
+            await anyio.to_thread.run_sync(member.close)
+
+    def _open(self) -> BinaryIO:
+        stored = self.archives.stored_member(self.path)
+        if stored is not None:
+            archive, offset = stored
+            member = archive.open("rb")
+            offset += self.start
+        else:
+            member = self.archives.open_member(self.path)
+            # Compressed data cannot be indexed, so seeking decompresses and discards everything before ``start``.
+            offset = self.start
+        try:
+            member.seek(offset)
+        except BaseException:
+            member.close()
+            raise
+        return member
+
+    async def _send_chunks(self, member: BinaryIO, send: Send) -> None:
+        remaining = self.end - self.start + 1
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(member.read, min(self.chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -1,111 +1,581 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import json
 import mimetypes
+import time
+from collections.abc import Awaitable
 from email.utils import formatdate, parsedate_to_datetime
 from http import HTTPStatus
+from pathlib import Path
+from typing import TypeVar
 
-from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from fastapi.responses import FileResponse
 
+from app.api.file_responses import ArchiveMemberResponse, FileRangeResponse
 from app.models.schemas import (
+    MAX_PREVIEW_IMAGES,
+    ContactSheet,
+    ContactSheetCell,
     DeleteImageResponse,
+    DeleteImageResult,
+    DeleteImagesRequest,
+    DeleteImagesResponse,
+    DirectoryPreview,
     ImagesResponse,
+    PreviewsRequest,
+    PreviewsResponse,
     RenameDirectoryRequest,
     RenameDirectoryResponse,
     SubdirectoriesResponse,
+    TileInfoResponse,
 )
+from app.repositories.archives import ArchiveHandlePool, FileStat, MemberStat
+from app.repositories.image_bytes_cache import ImageBytesCache
+from app.repositories.listing_cache import ListingCache
 from app.services.image_service import (
     ConflictError,
+    ImageDetails,
     ImageService,
     ResourceNotFoundError,
     ServiceError,
+    ServiceUnavailableError,
     UnsupportedMediaTypeError,
     ValidationError,
 )
+from app.services.imaging import OUTPUT_FORMATS
+from app.services.io_executor import IoExecutor
+from app.services.thumbnail_service import (
+    THUMBNAIL_SIZES,
+    TILE_SIZE,
+    TRANSCODE_EXTENSIONS,
+    Derivative,
+    ThumbnailService,
+    snap_thumbnail_size,
+)
+
+GENERATION_RETRY_AFTER_SECONDS = 1
+# Requests above the largest display bucket are served at that bucket; anything beyond this is rejected.
+MAX_DISPLAY_DIMENSION = 16384
+MAX_IMAGES_PAGE_SIZE = 1000
+
+_T = TypeVar("_T")
+
+
+def _encode_cursor(name: str) -> str:
+    return base64.urlsafe_b64encode(name.encode("utf-8", "surrogateescape")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> str:
+    # Decoded strictly: lone surrogates from undecodable bytes cannot be bound as SQLite text by the index.
+    try:
+        raw = base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True)
+        return raw.decode("utf-8")
+    except (binascii.Error, ValueError) as exc:
+        raise ValueError("malformed cursor") from exc
+
+
+def _cache_headers(etag: str, stat_result: FileStat) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": "public, max-age=31536000",
+    }
+
+
+def _is_not_modified(request: Request, etag: str, stat_result: FileStat) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and if_none_match.strip() == etag:
+        return True
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since_timestamp = parsedate_to_datetime(if_modified_since).timestamp()
+            if stat_result.st_mtime <= since_timestamp:
+                return True
+        except (TypeError, ValueError, OverflowError):
+            pass
+    return False
+
+
+class _RangeNotSatisfiableError(Exception):
+    pass
+
+
+def _parse_byte_range(header: str, file_size: int) -> tuple[int, int] | None:
+    """Parse a single ``bytes=`` range into inclusive offsets.
+
+    Returns None when the header should be ignored and the full body served: unknown
+    units, malformed syntax, or multiple ranges (multipart/byteranges is not supported).
+    """
+    unit, _, range_set = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in range_set:
+        return None
+
+    first, separator, last = range_set.strip().partition("-")
+    if not separator:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else file_size - 1
+        else:
+            suffix_length = int(last)
+            if suffix_length == 0:
+                raise _RangeNotSatisfiableError
+            start = max(file_size - suffix_length, 0)
+            end = file_size - 1
+    except ValueError:
+        return None
+
+    if start >= file_size:
+        raise _RangeNotSatisfiableError
+    if start < 0 or end < start:
+        return None
+    return start, min(end, file_size - 1)
+
 
+def _if_range_matches(request: Request, etag: str, stat_result: FileStat) -> bool:
+    """Evaluate ``If-Range`` against the current validators.
 
-def create_api_router(service: ImageService) -> APIRouter:
+    The image ETag is weak, so entity tags are compared verbatim rather than with the
+    strong comparison RFC 9110 asks for; it is derived from ``st_mtime_ns`` and
+    ``st_size`` and changes whenever the bytes could have.
+    """
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+
+    if_range = if_range.strip()
+    if if_range.startswith(('"', "W/")):
+        return if_range == etag
+    try:
+        return parsedate_to_datetime(if_range).timestamp() == int(stat_result.st_mtime)
+    except (TypeError, ValueError, OverflowError):
+        return False
+
+
+def _negotiate_derivative_format(request: Request) -> str:
+    return "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+
+
+def _negotiate_transcode_format(request: Request, source: Path) -> str | None:
+    """Pick the transcode for an original image, or None to send the file as stored.
+
+    PNG is only replaced by a modern format the client lists explicitly; BMP is never
+    sent raw and falls back to JPEG, which every client accepts.
+    """
+    accept = request.headers.get("accept", "")
+    for image_format in ("avif", "webp"):
+        if image_format in OUTPUT_FORMATS and OUTPUT_FORMATS[image_format][2] in accept:
+            return image_format
+    return "jpeg" if source.suffix.lower() == ".bmp" else None
+
+
+def _contact_sheet_map(preview: DirectoryPreview, count: int, cell_size: int, version: int) -> ContactSheet:
+    """Describe the sprite served by the contact-sheet endpoint for ``preview``.
+
+    ``v`` changes with the directory mtime, so the sprite URL can be cached like any derivative.
+    """
+    url = f"/api/subdirectories/{preview.directory_id}/contact-sheet?count={count}&size={cell_size}&v={version}"
+    return ContactSheet(
+        url=url,
+        cell_size=cell_size,
+        cells=[
+            ContactSheetCell(file_id=image.file_id, x=index * cell_size, y=0, width=cell_size, height=cell_size)
+            for index, image in enumerate(preview.images)
+        ],
+    )
+
+
+def _delete_error_status(error: ServiceError) -> HTTPStatus:
+    if isinstance(error, ResourceNotFoundError):
+        return HTTPStatus.NOT_FOUND
+    if isinstance(error, UnsupportedMediaTypeError):
+        return HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+    if isinstance(error, ConflictError):
+        return HTTPStatus.CONFLICT
+    return HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def _render_images(
+    directory_id: str,
+    name: str,
+    rows: list[tuple[str, str]],
+    total: int,
+    next_after: str | None,
+    image_details: list[ImageDetails | None] | None = None,
+) -> bytes:
+    """Serialize an ``ImagesResponse`` body without building a model per image.
+
+    The output is byte-for-byte what ``JSONResponse`` renders for the equivalent model.
+    """
+    if image_details is None:
+        images = [{"file_id": file_id, "name": image_name} for file_id, image_name in rows]
+    else:
+        images = [
+            {
+                "file_id": file_id,
+                "name": image_name,
+                "width": entry[0] if entry is not None else None,
+                "height": entry[1] if entry is not None else None,
+                "size": entry[2] if entry is not None else None,
+                "mtime": entry[3] if entry is not None else None,
+            }
+            for (file_id, image_name), entry in zip(rows, image_details)
+        ]
+    content = {
+        "directory_id": directory_id,
+        "subdirectory": name,
+        "images": images,
+        "total": total,
+        "next_cursor": _encode_cursor(next_after) if next_after is not None else None,
+    }
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def create_api_router(
+    service: ImageService,
+    thumbnail_service: ThumbnailService,
+    io: IoExecutor,
+    image_cache: ImageBytesCache | None = None,
+    transcode: bool = False,
+    listing_cache: ListingCache | None = None,
+    archives: ArchiveHandlePool | None = None,
+    prefetch_hints: int = 0,
+) -> APIRouter:
     router = APIRouter(prefix="/api")
 
     @router.get("/subdirectories", response_model=SubdirectoriesResponse)
-    def get_subdirectories() -> SubdirectoriesResponse:
-        return SubdirectoriesResponse(subdirectories=service.list_subdirectories())
+    async def get_subdirectories() -> SubdirectoriesResponse:
+        return SubdirectoriesResponse(subdirectories=await io.run(service.list_subdirectories))
+
+    @router.post("/subdirectories/previews", response_model=PreviewsResponse, response_model_exclude_none=True)
+    async def post_subdirectory_previews(payload: PreviewsRequest) -> PreviewsResponse:
+        # Directories are scanned in parallel on the shared IO pool; unknown IDs are left out.
+        scanned = await io.map(service.preview_directory, dict.fromkeys(payload.directory_ids), payload.limit)
+        previews = [preview for preview in scanned if preview is not None]
+        if payload.contact_sheet_size is not None:
+            cell_size = snap_thumbnail_size(payload.contact_sheet_size)
+            versions = await io.run(_directory_versions, [preview.directory_id for preview in previews])
+            for preview in previews:
+                version = versions.get(preview.directory_id)
+                if preview.images and version is not None:
+                    preview.contact_sheet = _contact_sheet_map(preview, payload.limit, cell_size, version)
+        return PreviewsResponse(previews=previews)
+
+    def _directory_versions(directory_ids: list[str]) -> dict[str, int]:
+        versions: dict[str, int] = {}
+        for directory_id in directory_ids:
+            try:
+                versions[directory_id] = service.resolve_directory_with_stat(directory_id)[1].st_mtime_ns
+            except (ResourceNotFoundError, OSError):
+                continue
+        return versions
+
+    @router.get("/subdirectories/{directory_id}/contact-sheet")
+    async def get_contact_sheet(
+        directory_id: str,
+        request: Request,
+        count: int = Query(default=5, ge=1, le=MAX_PREVIEW_IMAGES),
+        size: int = Query(default=THUMBNAIL_SIZES[1], ge=1, le=THUMBNAIL_SIZES[-1]),
+    ) -> Response:
+        image_format = _negotiate_derivative_format(request)
+        derivative = await _load_derivative(
+            thumbnail_service.get_contact_sheet(directory_id, count, size, image_format)
+        )
+        return _derivative_response(derivative, request, include_body=True)
 
     @router.get("/images/{directory_id}", response_model=ImagesResponse)
-    def get_images(directory_id: str) -> ImagesResponse:
+    async def get_images(
+        directory_id: str,
+        limit: int | None = Query(default=None, ge=1, le=MAX_IMAGES_PAGE_SIZE),
+        cursor: str | None = None,
+        details: bool = False,
+    ) -> Response:
         try:
-            directory, images = service.list_images(directory_id)
+            after = _decode_cursor(cursor) if cursor is not None else None
+        except ValueError as exc:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST) from exc
+
+        try:
+            directory, directory_stat = await io.run(service.resolve_directory_with_stat, directory_id)
+            # Details bodies are cached too: a file rewritten in place keeps its directory's mtime, so its listed
+            # size and dimensions may lag until the directory changes, but the image itself is always revalidated.
+            cache_key = (directory_id, after, limit, details)
+            if listing_cache is not None:
+                body = listing_cache.get(cache_key, directory_stat.st_mtime_ns)
+                if body is not None:
+                    return Response(body, media_type="application/json")
+
+            rendered_ns = time.time_ns()
+            rows, total, next_after = await io.run(service.list_image_rows, directory, after=after, limit=limit)
+            image_details = (
+                await io.map(service.image_details, [name for _, name in rows], directory) if details else None
+            )
         except ResourceNotFoundError as exc:
             raise HTTPException(status_code=HTTPStatus.NOT_FOUND) from exc
-        return ImagesResponse(directory_id=directory_id, subdirectory=directory.name, images=images)
 
-    def _build_image_response(file_id: str, request: Request, include_body: bool) -> Response:
+        body = _render_images(directory_id, directory.name, rows, total, next_after, image_details)
+        if listing_cache is not None:
+            listing_cache.put(cache_key, directory_stat.st_mtime_ns, rendered_ns, body)
+        return Response(body, media_type="application/json")
+
+    def _resolve_and_stat(file_id: str) -> tuple[Path, FileStat]:
         try:
-            file_path = service.resolve_image(file_id)
+            return service.resolve_image_with_stat(file_id)
         except ResourceNotFoundError as exc:
             raise HTTPException(status_code=HTTPStatus.NOT_FOUND) from exc
         except UnsupportedMediaTypeError as exc:
             raise HTTPException(status_code=HTTPStatus.UNSUPPORTED_MEDIA_TYPE) from exc
-
-        try:
-            stat_result = file_path.stat()
         except OSError as exc:
             raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR) from exc
 
-        etag = f'W/"{stat_result.st_mtime_ns}-{stat_result.st_size}"'
-        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
-        cache_headers = {
-            "ETag": etag,
-            "Last-Modified": last_modified,
-            "Cache-Control": "public, max-age=31536000",
-        }
-
-        if_none_match = request.headers.get("if-none-match")
-        if if_none_match and if_none_match.strip() == etag:
-            return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=cache_headers)
+    async def _build_image_response(file_id: str, request: Request, include_body: bool) -> Response:
+        file_path, stat_result = await io.run(_resolve_and_stat, file_id)
+        if not transcode or file_path.suffix.lower() not in TRANSCODE_EXTENSIONS:
+            return await _build_original_response(file_path, stat_result, request, include_body, vary=False)
 
-        if_modified_since = request.headers.get("if-modified-since")
-        if if_modified_since:
+        image_format = _negotiate_transcode_format(request, file_path)
+        if image_format is not None:
             try:
-                since_timestamp = parsedate_to_datetime(if_modified_since).timestamp()
-                if stat_result.st_mtime <= since_timestamp:
-                    return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=cache_headers)
-            except (TypeError, ValueError, OverflowError):
-                pass
+                # HEAD transcodes too, so it reports the same type, ETag and length as the GET it stands for.
+                derivative = await thumbnail_service.get_transcoded(file_path, stat_result, image_format)
+            except ServiceError:
+                # The original can always be served; a busy queue or an undecodable file must not fail it.
+                derivative = None
+            if derivative is not None:
+                return _derivative_response(derivative, request, include_body)
+        return await _build_original_response(file_path, stat_result, request, include_body, vary=True)
+
+    async def _build_original_response(
+        file_path: Path, stat_result: FileStat, request: Request, include_body: bool, *, vary: bool
+    ) -> Response:
+        etag = f'W/"{stat_result.st_mtime_ns}-{stat_result.st_size}"'
+        cache_headers = {**_cache_headers(etag, stat_result), "Accept-Ranges": "bytes"}
+        if vary:
+            cache_headers["Vary"] = "Accept"
+        if _is_not_modified(request, etag, stat_result):
+            return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=cache_headers)
 
         content_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
-        headers = {**cache_headers, "Content-Length": str(stat_result.st_size)}
+        file_size = stat_result.st_size
+        headers = {**cache_headers, "Content-Length": str(file_size)}
 
         if not include_body:
             return Response(status_code=HTTPStatus.OK, headers=headers, media_type=content_type)
 
-        return FileResponse(path=file_path, media_type=content_type, headers=headers)
+        byte_range = None
+        range_header = request.headers.get("range")
+        if range_header and _if_range_matches(request, etag, stat_result):
+            try:
+                byte_range = _parse_byte_range(range_header, file_size)
+            except _RangeNotSatisfiableError:
+                return Response(
+                    status_code=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+                    headers={**cache_headers, "Content-Range": f"bytes */{file_size}"},
+                )
+
+        if byte_range is None:
+            status_code, (start, end) = HTTPStatus.OK, (0, file_size - 1)
+        else:
+            status_code, (start, end) = HTTPStatus.PARTIAL_CONTENT, byte_range
+            headers = {
+                **cache_headers,
+                "Content-Length": str(end - start + 1),
+                "Content-Range": f"bytes {start}-{end}/{file_size}",
+            }
+
+        if archives is not None and isinstance(stat_result, MemberStat):
+            return ArchiveMemberResponse(
+                file_path,
+                archives=archives,
+                start=start,
+                end=end,
+                status_code=status_code,
+                headers=headers,
+                media_type=content_type,
+            )
+
+        if image_cache is not None and image_cache.accepts(stat_result):
+            body = image_cache.get(file_path, stat_result)
+            headers["X-Cache"] = "HIT" if body is not None else "MISS"
+            if body is None:
+                body = await io.run(image_cache.load, file_path, stat_result)
+            if body is not None:
+                return Response(
+                    content=body[start : end + 1],
+                    status_code=status_code,
+                    headers=headers,
+                    media_type=content_type,
+                )
+
+        return FileRangeResponse(
+            file_path,
+            start=start,
+            end=end,
+            status_code=status_code,
+            headers=headers,
+            media_type=content_type,
+        )
+
+    async def _load_derivative(derivative: Awaitable[_T]) -> _T:
+        try:
+            return await derivative
+        except ResourceNotFoundError as exc:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND) from exc
+        except UnsupportedMediaTypeError as exc:
+            raise HTTPException(status_code=HTTPStatus.UNSUPPORTED_MEDIA_TYPE) from exc
+        except ServiceUnavailableError as exc:
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(GENERATION_RETRY_AFTER_SECONDS)},
+            ) from exc
+        except ServiceError as exc:
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR) from exc
+
+    def _derivative_response(generated: Derivative, request: Request, include_body: bool) -> Response:
+        source_stat = generated.source_stat
+        etag = f'W/"{source_stat.st_mtime_ns}-{source_stat.st_size}-{generated.variant}"'
+        cache_headers = {**_cache_headers(etag, source_stat), "Vary": "Accept"}
+        if _is_not_modified(request, etag, source_stat):
+            return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=cache_headers)
+
+        if not include_body:
+            return Response(
+                status_code=HTTPStatus.OK,
+                headers={**cache_headers, "Content-Length": str(generated.stat_result.st_size)},
+                media_type=generated.media_type,
+            )
+        if archives is not None and isinstance(generated.stat_result, MemberStat):
+            return ArchiveMemberResponse(
+                generated.path,
+                archives=archives,
+                start=0,
+                end=generated.stat_result.st_size - 1,
+                status_code=HTTPStatus.OK,
+                headers={**cache_headers, "Content-Length": str(generated.stat_result.st_size)},
+                media_type=generated.media_type,
+            )
+        return FileResponse(
+            path=generated.path,
+            media_type=generated.media_type,
+            headers=cache_headers,
+            stat_result=generated.stat_result,
+        )
+
+    async def _build_sized_image_response(
+        file_id: str, request: Request, include_body: bool, width: int | None, height: int | None
+    ) -> Response:
+        if width is None and height is None:
+            return await _build_image_response(file_id=file_id, request=request, include_body=include_body)
+        image_format = _negotiate_derivative_format(request)
+        derivative = await _load_derivative(thumbnail_service.get_display_image(file_id, width, height, image_format))
+        return _derivative_response(derivative, request, include_body)
 
     @router.get("/image/{file_id}")
-    def get_image(file_id: str, request: Request) -> Response:
-        return _build_image_response(file_id=file_id, request=request, include_body=True)
+    async def get_image(
+        file_id: str,
+        request: Request,
+        w: int | None = Query(default=None, ge=1, le=MAX_DISPLAY_DIMENSION),
+        h: int | None = Query(default=None, ge=1, le=MAX_DISPLAY_DIMENSION),
+    ) -> Response:
+        response = await _build_sized_image_response(file_id, request, True, w, h)
+        if prefetch_hints > 0 and response.status_code == HTTPStatus.OK:
+            await _add_prefetch_hints(response, file_id, request)
+        return response
+
+    async def _add_prefetch_hints(response: Response, file_id: str, request: Request) -> None:
+        """Name the next images of the listing in ``Link: rel=preload``, requested with the same size query."""
+        try:
+            next_ids = await io.run(service.next_image_ids, file_id, prefetch_hints)
+        except (ServiceError, OSError):
+            # Hints are best effort; the image itself has already been resolved.
+            return
+        query = f"?{request.url.query}" if request.url.query else ""
+        if next_ids:
+            response.headers["Link"] = ", ".join(
+                f"</api/image/{next_id}{query}>; rel=preload; as=image" for next_id in next_ids
+            )
 
     @router.head("/image/{file_id}")
-    def head_image(file_id: str, request: Request) -> Response:
-        return _build_image_response(file_id=file_id, request=request, include_body=False)
+    async def head_image(
+        file_id: str,
+        request: Request,
+        w: int | None = Query(default=None, ge=1, le=MAX_DISPLAY_DIMENSION),
+        h: int | None = Query(default=None, ge=1, le=MAX_DISPLAY_DIMENSION),
+    ) -> Response:
+        return await _build_sized_image_response(file_id, request, False, w, h)
+
+    @router.get("/thumbnail/{file_id}")
+    async def get_thumbnail(
+        file_id: str,
+        request: Request,
+        size: int = Query(default=THUMBNAIL_SIZES[1], ge=1, le=THUMBNAIL_SIZES[-1]),
+    ) -> Response:
+        image_format = _negotiate_derivative_format(request)
+        derivative = await _load_derivative(thumbnail_service.get_thumbnail(file_id, size, image_format))
+        return _derivative_response(derivative, request, include_body=True)
+
+    @router.get("/image/{file_id}/tiles", response_model=TileInfoResponse)
+    async def get_tile_info(file_id: str) -> TileInfoResponse:
+        width, height, max_level = await _load_derivative(thumbnail_service.get_tile_info(file_id))
+        return TileInfoResponse(width=width, height=height, tile_size=TILE_SIZE, max_level=max_level)
+
+    @router.get("/image/{file_id}/tiles/{level}/{column}_{row}")
+    async def get_tile(
+        file_id: str,
+        level: int,
+        column: int,
+        row: int,
+        request: Request,
+    ) -> Response:
+        if min(level, column, row) < 0:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+        image_format = _negotiate_derivative_format(request)
+        derivative = await _load_derivative(thumbnail_service.get_tile(file_id, level, column, row, image_format))
+        return _derivative_response(derivative, request, include_body=True)
 
     @router.delete("/image/{file_id}", response_model=DeleteImageResponse)
-    def delete_image(file_id: str) -> DeleteImageResponse:
+    async def delete_image(file_id: str) -> DeleteImageResponse:
         try:
-            deleted_file = service.delete_image(file_id)
+            deleted_file = await io.run(service.delete_image, file_id)
         except ResourceNotFoundError as exc:
             raise HTTPException(status_code=HTTPStatus.NOT_FOUND) from exc
         except UnsupportedMediaTypeError as exc:
             raise HTTPException(status_code=HTTPStatus.UNSUPPORTED_MEDIA_TYPE) from exc
+        except ConflictError as exc:
+            raise HTTPException(status_code=HTTPStatus.CONFLICT) from exc
         except ServiceError as exc:
             raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR) from exc
 
         return DeleteImageResponse(deleted=deleted_file.name, file_id=file_id)
 
+    @router.post("/images/delete", response_model=DeleteImagesResponse)
+    async def delete_images(payload: DeleteImagesRequest) -> DeleteImagesResponse:
+        # Repeated IDs share the outcome of a single attempt.
+        unique_ids = list(dict.fromkeys(payload.file_ids))
+        outcomes = dict(zip(unique_ids, await io.map(service.unlink_image, unique_ids)))
+        deleted = {file_id: outcome for file_id, outcome in outcomes.items() if isinstance(outcome, Path)}
+        await io.run(service.forget_images, deleted)
+        return DeleteImagesResponse(
+            results=[
+                DeleteImageResult(file_id=file_id, status=HTTPStatus.OK, deleted=deleted[file_id].name)
+                if file_id in deleted
+                else DeleteImageResult(file_id=file_id, status=_delete_error_status(outcomes[file_id]))
+                for file_id in payload.file_ids
+            ]
+        )
+
     @router.put("/subdirectories/{directory_id}", response_model=RenameDirectoryResponse)
-    def rename_subdirectory(directory_id: str, payload: RenameDirectoryRequest) -> RenameDirectoryResponse:
+    async def rename_subdirectory(directory_id: str, payload: RenameDirectoryRequest) -> RenameDirectoryResponse:
         try:
-            new_directory_id, renamed_from, renamed_to = service.rename_subdirectory(directory_id, payload.new_name)
+            new_directory_id, renamed_from, renamed_to = await io.run(
+                service.rename_subdirectory, directory_id, payload.new_name
+            )
         except ResourceNotFoundError as exc:
             raise HTTPException(status_code=HTTPStatus.NOT_FOUND) from exc
         except ValidationError as exc:
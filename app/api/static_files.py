@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.repositories.derived_cache import DerivedImageCache
+
+COMPRESSIBLE_MEDIA_TYPES = {
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+MIN_COMPRESS_BYTES = 1024
+# Sibling files produced at build time, in order of preference.
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# Written next to the bundle by the build: maps each compressed file to its SHA-256 and sibling encodings.
+PRECOMPRESSED_MANIFEST = "precompressed.json"
+# Vite emits content-hashed names such as ``assets/index-CRL3WLYV.js``.
+HASHED_ASSET_PATTERN = re.compile(r"(^|/)assets/[^/]+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted: set[str] = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """``StaticFiles`` that serves ``.br``/``.gz`` siblings and caches hashed assets forever.
+
+    Pre-built siblings next to a file are preferred when the nearest ``precompressed.json``
+    lists them under the file's current SHA-256, so siblings left over from another build are
+    ignored. Otherwise text assets are gzipped on first request into ``cache`` and reused until
+    the source changes. Every variant gets its own ETag from the file it is served from, so
+    conditional requests answer 304.
+    """
+
+    def __init__(self, *, directory: str | os.PathLike[str], cache: DerivedImageCache, **kwargs: object) -> None:
+        super().__init__(directory=directory, **kwargs)
+        self.cache = cache
+        self._root = Path(os.path.realpath(directory))
+        # Parsed manifests by path and source digests by path, each validated by mtime (and size).
+        self._manifests: dict[Path, tuple[int, dict[str, object]]] = {}
+        self._digests: dict[Path, tuple[int, int, str]] = {}
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        # Conditional requests are evaluated in get_response, once the encoding is chosen.
+        return FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if type(response) is not FileResponse or response.status_code != 200:
+            return response
+
+        request_headers = Headers(scope=scope)
+        media_type = mimetypes.guess_type(str(response.path))[0] or "text/plain"
+        if media_type in COMPRESSIBLE_MEDIA_TYPES:
+            encoded = await anyio.to_thread.run_sync(
+                self._encoded_variant,
+                Path(response.path),
+                response.stat_result,
+                _accepted_encodings(request_headers.get("accept-encoding", "")),
+            )
+            if encoded is not None:
+                encoding, encoded_path, encoded_stat = encoded
+                response = FileResponse(
+                    encoded_path,
+                    stat_result=encoded_stat,
+                    media_type=media_type,
+                    headers={"Content-Encoding": encoding},
+                )
+            response.headers["Vary"] = "Accept-Encoding"
+
+        if HASHED_ASSET_PATTERN.search(path.replace(os.sep, "/")):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def _encoded_variant(
+        self, source: Path, stat_result: os.stat_result, accepted: set[str]
+    ) -> tuple[str, Path, os.stat_result] | None:
+        prebuilt = self._prebuilt_encodings(source, stat_result) & accepted
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in prebuilt:
+                continue
+            sibling = source.with_name(source.name + suffix)
+            try:
+                return encoding, sibling, sibling.stat()
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+
+        if "gzip" not in accepted or stat_result.st_size < MIN_COMPRESS_BYTES:
+            return None
+        key = self.cache.build_key(source, stat_result, "gzip")
+        cached = self.cache.lookup(key, ".gz")
+        if cached is None:
+            cached = self.cache.store(key, ".gz", gzip.compress(source.read_bytes(), compresslevel=9, mtime=0))
+        return "gzip", *cached
+
+    def _prebuilt_encodings(self, source: Path, stat_result: os.stat_result) -> set[str]:
+        """Return the sibling encodings the nearest manifest lists for ``source`` as it is now."""
+        for directory in source.parents:
+            if not directory.is_relative_to(self._root):
+                break
+            manifest = self._manifest(directory / PRECOMPRESSED_MANIFEST)
+            if manifest is None:
+                continue
+            entry = manifest.get(source.relative_to(directory).as_posix())
+            if not isinstance(entry, dict) or entry.get("sha256") != self._digest(source, stat_result):
+                return set()
+            return set(entry.get("encodings", ()))
+        return set()
+
+    def _manifest(self, path: Path) -> dict[str, object] | None:
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        cached = self._manifests.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        try:
+            files = json.loads(path.read_bytes())["files"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if not isinstance(files, dict):
+            return None
+        self._manifests[path] = (mtime_ns, files)
+        return files
+
+    def _digest(self, source: Path, stat_result: os.stat_result) -> str:
+        cached = self._digests.get(source)
+        if cached is not None and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+            return cached[2]
+        digest = hashlib.sha256(source.read_bytes()).hexdigest()
+        self._digests[source] = (stat_result.st_mtime_ns, stat_result.st_size, digest)
+        return digest
@@ -1,16 +1,61 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+import os
+from dataclasses import asdict, dataclass, fields
 from pathlib import Path
+from typing import Any
+
+from app.repositories.archives import DEFAULT_ARCHIVE_HANDLES
+from app.services.imaging import DEFAULT_MAX_IMAGE_PIXELS
+
+DEFAULT_GENERATION_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+DEFAULT_GENERATION_QUEUE_SIZE = 64
+DEFAULT_IO_THREADS = 64
+DEFAULT_PREFETCH_HINTS = 2
+SETTINGS_ENV_VAR = "APP_IMAGE_VIEW_SETTINGS"
+PATH_FIELDS = ("base_dir", "static_dir", "cache_dir")
 
 
 @dataclass(frozen=True)
 class AppSettings:
     base_dir: Path
     static_dir: Path
+    cache_dir: Path
+    generation_workers: int = DEFAULT_GENERATION_WORKERS
+    generation_queue_size: int = DEFAULT_GENERATION_QUEUE_SIZE
+    directory_index: bool = True
+    watch: bool = False
+    id_scheme: str = "random"
+    registry_shards: int = 1
+    io_threads: int = DEFAULT_IO_THREADS
+    memory_cache_bytes: int = 0
+    listing_cache_bytes: int = 0
+    stat_cache_ttl: float = 0.0
+    transcode: bool = False
+    workers: int = 1
+    metrics: bool = False
+    archive_handles: int = DEFAULT_ARCHIVE_HANDLES
+    max_image_pixels: int = DEFAULT_MAX_IMAGE_PIXELS
+    prefetch_hints: int = DEFAULT_PREFETCH_HINTS
 
     @classmethod
-    def from_paths(cls, *, base_dir: Path, static_dir: Path) -> "AppSettings":
+    def from_paths(cls, *, base_dir: Path, static_dir: Path, cache_dir: Path, **options: Any) -> "AppSettings":
         resolved_base = base_dir.expanduser().resolve()
         resolved_static = static_dir.expanduser().resolve()
-        return cls(base_dir=resolved_base, static_dir=resolved_static)
+        resolved_cache = cache_dir.expanduser().resolve()
+        return cls(base_dir=resolved_base, static_dir=resolved_static, cache_dir=resolved_cache, **options)
+
+    def to_json(self) -> str:
+        """Serialise the settings so worker processes can rebuild them (see ``from_json``)."""
+        values = asdict(self)
+        for name in PATH_FIELDS:
+            values[name] = os.fspath(values[name])
+        return json.dumps(values)
+
+    @classmethod
+    def from_json(cls, payload: str) -> "AppSettings":
+        values = json.loads(payload)
+        known = {field.name for field in fields(cls)}
+        options = {name: value for name, value in values.items() if name in known and name not in PATH_FIELDS}
+        return cls(**{name: Path(values[name]) for name in PATH_FIELDS}, **options)
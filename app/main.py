@@ -1,28 +1,190 @@
 from __future__ import annotations
 
 import argparse
+import logging
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import uvicorn
 from fastapi import FastAPI
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, PlainTextResponse
 
 from app.api.routes import create_api_router
-from app.config import AppSettings
-from app.repositories.filesystem import FileSystemRepository
-from app.services.image_service import ImageService, ResourceRegistry
+from app.api.static_files import PrecompressedStaticFiles
+from app.config import (
+    DEFAULT_GENERATION_QUEUE_SIZE,
+    DEFAULT_GENERATION_WORKERS,
+    DEFAULT_IO_THREADS,
+    DEFAULT_PREFETCH_HINTS,
+    SETTINGS_ENV_VAR,
+    AppSettings,
+)
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.metrics import Metrics, MetricsMiddleware, Sample, instrument_repository
+from app.repositories.archives import DEFAULT_ARCHIVE_HANDLES, ArchiveHandlePool
+from app.repositories.derived_cache import DerivedImageCache
+from app.repositories.directory_index import DirectoryIndex
+from app.repositories.filesystem import FileSystemRepository, IndexedFileSystemRepository
+from app.repositories.image_bytes_cache import ImageBytesCache
+from app.repositories.listing_cache import ListingCache
+from app.services.generation_scheduler import GenerationScheduler
+from app.services.image_service import ImageService
+from app.services.imaging import DEFAULT_MAX_IMAGE_PIXELS, configure_decoder
+from app.services.io_executor import IoExecutor
+from app.services.registry import (
+    Registry,
+    ResourceRegistry,
+    ShardedResourceRegistry,
+    SignedPathRegistry,
+    SqliteResourceRegistry,
+    load_or_create_secret,
+)
+from app.services.stat_cache import StatCache
+from app.services.thumbnail_service import ThumbnailService, init_generation_worker
+from app.services.watcher import RegistryUpdater, create_watcher
 
 DEFAULT_STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "app-image-view-webui"
+ID_SCHEMES = ("random", "signed")
+
+logger = logging.getLogger(__name__)
+
+
+def create_registry(settings: AppSettings, archives: ArchiveHandlePool | None = None) -> Registry:
+    if settings.id_scheme == "signed":
+        secret = load_or_create_secret(settings.cache_dir / "id-secret")
+        return SignedPathRegistry(settings.base_dir, secret, archives=archives)
+    if settings.workers > 1:
+        # Random IDs must be visible to every worker process, not just the one that minted them.
+        return SqliteResourceRegistry(settings.cache_dir / "registry.sqlite3", archives=archives)
+    if settings.registry_shards > 1:
+        return ShardedResourceRegistry(settings.registry_shards, archives=archives)
+    return ResourceRegistry(archives=archives)
+
+
+def create_metrics(
+    registry: Registry,
+    image_cache: ImageBytesCache | None,
+    stat_cache: StatCache | None,
+    counted_caches: dict[str, ArchiveHandlePool | DerivedImageCache | ListingCache],
+) -> Metrics:
+    metrics = Metrics()
+    metrics.describe("registry_entries", "gauge", "Number of IDs held by the resource registry.")
+    metrics.describe("cache_hits_total", "counter", "Server-side cache hits by cache.")
+    metrics.describe("cache_misses_total", "counter", "Server-side cache misses by cache.")
+    metrics.describe("image_memory_cache_bytes", "gauge", "Bytes held by the in-memory image cache.")
+
+    def collect() -> list[Sample]:
+        samples: list[Sample] = [("registry_entries", {}, len(registry))]
+        counted: dict[str, ArchiveHandlePool | DerivedImageCache | ImageBytesCache | ListingCache | StatCache] = dict(
+            counted_caches
+        )
+        if stat_cache is not None:
+            counted["stat"] = stat_cache
+        if image_cache is not None:
+            counted["image_memory"] = image_cache
+            samples.append(("image_memory_cache_bytes", {}, image_cache.size_bytes))
+        for name, cache in counted.items():
+            samples.append(("cache_hits_total", {"cache": name}, cache.hits))
+            samples.append(("cache_misses_total", {"cache": name}, cache.misses))
+        return samples
+
+    metrics.add_collector(collect)
+    return metrics
 
 
 def create_app(settings: AppSettings) -> FastAPI:
-    app = FastAPI(title="app-image-view-webui")
-    repository = FileSystemRepository()
-    registry = ResourceRegistry()
-    service = ImageService(base_dir=settings.base_dir, repository=repository, registry=registry)
+    configure_decoder(settings.max_image_pixels)
+    scheduler = GenerationScheduler(
+        max_workers=settings.generation_workers,
+        max_pending=settings.generation_queue_size,
+        initializer=init_generation_worker,
+        initargs=(settings.max_image_pixels, settings.archive_handles),
+    )
+
+    io = IoExecutor(max_workers=settings.io_threads)
+    directory_index = DirectoryIndex(settings.cache_dir / "index.sqlite3") if settings.directory_index else None
+    archives = ArchiveHandlePool(settings.archive_handles)
+    registry = create_registry(settings, archives)
+    image_cache = ImageBytesCache(settings.memory_cache_bytes) if settings.memory_cache_bytes > 0 else None
+    listing_cache = ListingCache(settings.listing_cache_bytes) if settings.listing_cache_bytes > 0 else None
+
+    @asynccontextmanager
+    async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+        watcher = None
+        if settings.watch:
+            updater = RegistryUpdater(settings.base_dir, registry, directory_index, stat_cache)
+            watcher = create_watcher(settings.base_dir, updater)
+            watcher.start()
+        try:
+            yield
+        finally:
+            if watcher is not None:
+                watcher.stop()
+            scheduler.shutdown()
+            io.shutdown()
+            archives.close()
+            if directory_index is not None:
+                directory_index.close()
+            if isinstance(registry, SqliteResourceRegistry):
+                registry.close()
+            if image_cache is not None:
+                logger.info("Image memory cache: %d hits, %d misses", image_cache.hits, image_cache.misses)
 
-    app.include_router(create_api_router(service))
+    app = FastAPI(title="app-image-view-webui", lifespan=lifespan)
+    repository = (
+        IndexedFileSystemRepository(directory_index, archives)
+        if directory_index is not None
+        else FileSystemRepository(archives)
+    )
+    stat_cache = StatCache(settings.stat_cache_ttl) if settings.stat_cache_ttl > 0 else None
+    service = ImageService(
+        base_dir=settings.base_dir,
+        repository=repository,
+        registry=registry,
+        stat_cache=stat_cache,
+        archives=archives,
+    )
+    derived_cache = DerivedImageCache(settings.cache_dir / "derived")
+    static_cache = DerivedImageCache(settings.cache_dir / "static")
+    thumbnail_service = ThumbnailService(
+        image_service=service,
+        cache=derived_cache,
+        scheduler=scheduler,
+        io=io,
+        archives=archives,
+    )
+
+    if settings.metrics:
+        counted_caches: dict[str, ArchiveHandlePool | DerivedImageCache | ListingCache] = {
+            "derived": derived_cache,
+            "static": static_cache,
+            "archive_handles": archives,
+        }
+        if listing_cache is not None:
+            counted_caches["listing"] = listing_cache
+        metrics = create_metrics(registry, image_cache, stat_cache, counted_caches)
+        instrument_repository(repository, metrics)
+        app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+        @app.get("/metrics", include_in_schema=False)
+        def get_metrics() -> PlainTextResponse:
+            return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+    app.include_router(
+        create_api_router(
+            service,
+            thumbnail_service,
+            io,
+            image_cache,
+            transcode=settings.transcode,
+            listing_cache=listing_cache,
+            archives=archives,
+            prefetch_hints=settings.prefetch_hints,
+        )
+    )
 
     @app.get("/")
     def home() -> FileResponse:
@@ -32,30 +194,174 @@ def create_app(settings: AppSettings) -> FastAPI:
     def viewer() -> FileResponse:
         return FileResponse(settings.static_dir / "home-app" / "index.html")
 
-    app.mount("/", StaticFiles(directory=str(settings.static_dir), html=False), name="static")
+    app.mount(
+        "/",
+        PrecompressedStaticFiles(
+            directory=str(settings.static_dir),
+            cache=static_cache,
+            html=False,
+        ),
+        name="static",
+    )
     return app
 
 
+def create_app_from_env() -> FastAPI:
+    """App factory for worker processes; settings are passed in ``SETTINGS_ENV_VAR`` by ``main``."""
+    return create_app(AppSettings.from_json(os.environ[SETTINGS_ENV_VAR]))
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Image viewer web UI")
     parser.add_argument("image_dir", type=Path, help="Directory containing image subdirectories")
     parser.add_argument("--host", default="0.0.0.0", help="Host to bind")
     parser.add_argument("--port", type=int, default=8000, help="Port to bind")
     parser.add_argument("--static-dir", type=Path, default=DEFAULT_STATIC_DIR, help="Directory containing static files")
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help="Directory for generated thumbnails and other derived data",
+    )
+    parser.add_argument(
+        "--generation-workers",
+        type=int,
+        default=DEFAULT_GENERATION_WORKERS,
+        help="Number of worker processes used to generate thumbnails",
+    )
+    parser.add_argument(
+        "--generation-queue-size",
+        type=int,
+        default=DEFAULT_GENERATION_QUEUE_SIZE,
+        help="Maximum number of pending generation jobs before responding 503",
+    )
+    parser.add_argument(
+        "--no-directory-index",
+        dest="directory_index",
+        action="store_false",
+        help="Scan directories on every request instead of using the SQLite listing index",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Watch the image directory and apply added/deleted/renamed files immediately",
+    )
+    parser.add_argument(
+        "--id-scheme",
+        choices=ID_SCHEMES,
+        default="random",
+        help="How file/directory IDs are issued: random per-process IDs, or signed paths that survive restarts",
+    )
+    parser.add_argument(
+        "--registry-shards",
+        type=int,
+        default=1,
+        help="Number of independently locked shards for the random ID registry (1 uses a single lock)",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=DEFAULT_IO_THREADS,
+        help="Size of the thread pool that runs blocking filesystem calls for API requests",
+    )
+    parser.add_argument(
+        "--memory-cache-mb",
+        type=int,
+        default=0,
+        help="Keep recently served original images in memory up to this many MiB (0 disables the cache)",
+    )
+    parser.add_argument(
+        "--listing-cache-mb",
+        type=int,
+        default=0,
+        help="Keep rendered image listing responses in memory up to this many MiB (0 disables the cache)",
+    )
+    parser.add_argument(
+        "--stat-cache-ttl",
+        type=float,
+        default=0.0,
+        help="Reuse the stat of a requested image for this many seconds (0 stats on every request)",
+    )
+    parser.add_argument(
+        "--transcode",
+        action="store_true",
+        help="Serve PNG/BMP originals as AVIF/WebP (BMP falls back to JPEG) according to the Accept header",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of server worker processes; IDs are shared through <cache-dir>/registry.sqlite3 when above 1",
+    )
+    parser.add_argument(
+        "--archive-handles",
+        type=int,
+        default=DEFAULT_ARCHIVE_HANDLES,
+        help="Number of ZIP/CBZ archives kept open for reading members",
+    )
+    parser.add_argument(
+        "--max-image-pixels",
+        type=int,
+        default=DEFAULT_MAX_IMAGE_PIXELS,
+        help="Refuse to decode images with more pixels than this for thumbnails and tiles (0 disables the limit)",
+    )
+    parser.add_argument(
+        "--prefetch-hints",
+        type=int,
+        default=DEFAULT_PREFETCH_HINTS,
+        help="Number of following images named in Link: rel=preload headers on image responses (0 disables them)",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Expose Prometheus-format request, cache and filesystem metrics at /metrics",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    settings = AppSettings.from_paths(base_dir=args.image_dir, static_dir=args.static_dir)
+    settings = AppSettings.from_paths(
+        base_dir=args.image_dir,
+        static_dir=args.static_dir,
+        cache_dir=args.cache_dir,
+        generation_workers=args.generation_workers,
+        generation_queue_size=args.generation_queue_size,
+        directory_index=args.directory_index,
+        watch=args.watch,
+        id_scheme=args.id_scheme,
+        registry_shards=args.registry_shards,
+        io_threads=args.io_threads,
+        memory_cache_bytes=args.memory_cache_mb * 1024 * 1024,
+        listing_cache_bytes=args.listing_cache_mb * 1024 * 1024,
+        stat_cache_ttl=args.stat_cache_ttl,
+        transcode=args.transcode,
+        workers=args.workers,
+        metrics=args.metrics,
+        archive_handles=args.archive_handles,
+        max_image_pixels=args.max_image_pixels,
+        prefetch_hints=args.prefetch_hints,
+    )
 
     if not settings.base_dir.exists() or not settings.base_dir.is_dir():
         raise SystemExit(f"Directory does not exist: {settings.base_dir}")
     if not settings.static_dir.exists() or not settings.static_dir.is_dir():
         raise SystemExit(f"Static directory does not exist: {settings.static_dir}")
 
-    app = create_app(settings)
     print(f"Serving {settings.base_dir} on http://{args.host}:{args.port}")
+    if settings.workers > 1:
+        os.environ[SETTINGS_ENV_VAR] = settings.to_json()
+        uvicorn.run(
+            "app.main:create_app_from_env",
+            factory=True,
+            host=args.host,
+            port=args.port,
+            workers=settings.workers,
+            log_level="info",
+        )
+        return
+
+    app = create_app(settings)
     uvicorn.run(app, host=args.host, port=args.port, log_level="info")
 
 
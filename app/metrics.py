@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from collections.abc import Callable, Iterable
+from functools import wraps
+from typing import Any
+
+from starlette.routing import Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+INSTRUMENTED_REPOSITORY_METHODS = (
+    "list_subdirectories",
+    "list_images",
+    "list_images_page",
+    "delete_file",
+    "rename_directory",
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = tuple[tuple[str, str], ...]
+Sample = tuple[str, dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    rendered = ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return f"{{{rendered}}}" if rendered else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Histogram:
+    __slots__ = ("bucket_counts", "count", "total")
+
+    def __init__(self) -> None:
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(LATENCY_BUCKETS, value)
+        if index < len(self.bucket_counts):
+            self.bucket_counts[index] += 1
+        self.count += 1
+        self.total += value
+
+
+class Metrics:
+    """In-process metrics rendered in the Prometheus text exposition format.
+
+    Counters and histograms are recorded by the request middleware and instrumented
+    objects; point-in-time values such as registry size or cache statistics come from
+    collector callbacks that are evaluated at scrape time.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._help: dict[str, tuple[str, str]] = {}
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, _Histogram]] = {}
+        self._collectors: list[Callable[[], Iterable[Sample]]] = []
+        self.describe("http_request_duration_seconds", "histogram", "Time spent handling HTTP requests.")
+        self.describe("http_responses_total", "counter", "HTTP responses by route and status code.")
+        self.describe("http_response_bytes_total", "counter", "Response body bytes sent by route.")
+        self.describe("filesystem_call_duration_seconds", "histogram", "Time spent in repository filesystem calls.")
+
+    def describe(self, name: str, metric_type: str, help_text: str) -> None:
+        self._help[name] = (metric_type, help_text)
+
+    def increment(self, name: str, labels: dict[str, str], amount: float = 1) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, labels: dict[str, str], value: float) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram()
+            histogram.observe(value)
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        collected: dict[str, list[tuple[dict[str, str], float]]] = {}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                collected.setdefault(name, []).append((labels, value))
+
+        lines: list[str] = []
+        with self._lock:
+            names = sorted(set(self._counters) | set(self._histograms) | set(collected))
+            for name in names:
+                if name in self._help:
+                    metric_type, help_text = self._help[name]
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in sorted(self._counters.get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                for labels, histogram in sorted(self._histograms.get(name, {}).items()):
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS, histogram.bucket_counts):
+                        cumulative += count
+                        bucket_labels = (*labels, ("le", repr(bound)))
+                        lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels((*labels, ('le', '+Inf')))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.total)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+                for labels, value in collected.get(name, []):
+                    lines.append(f"{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    if isinstance(route, Mount):
+        return f"{route.path}/{{path}}"
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status codes and body bytes per route template."""
+
+    def __init__(self, app: ASGIApp, metrics: Metrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        body_bytes = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, body_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = _route_label(scope)
+            method = scope["method"]
+            self.metrics.observe(
+                "http_request_duration_seconds", {"route": route, "method": method}, time.perf_counter() - started
+            )
+            self.metrics.increment(
+                "http_responses_total", {"route": route, "method": method, "status": str(status_code)}
+            )
+            self.metrics.increment("http_response_bytes_total", {"route": route}, body_bytes)
+
+
+def _timed(method: Callable[..., Any], operation: str, metrics: Metrics) -> Callable[..., Any]:
+    @wraps(method)
+    def timed(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            metrics.observe("filesystem_call_duration_seconds", {"operation": operation}, time.perf_counter() - started)
+
+    return timed
+
+
+def instrument_repository(repository: Any, metrics: Metrics) -> None:
+    """Wrap the repository's filesystem methods on the instance so each call is timed."""
+    for operation in INSTRUMENTED_REPOSITORY_METHODS:
+        setattr(repository, operation, _timed(getattr(repository, operation), operation, metrics))
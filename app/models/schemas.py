@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+MAX_PREVIEW_DIRECTORIES = 200
+MAX_PREVIEW_IMAGES = 20
+MAX_DELETE_BATCH = 1000
 
 
 class DirectoryEntry(BaseModel):
@@ -13,6 +17,13 @@ class ImageEntry(BaseModel):
     name: str
 
 
+class ImageDetailsEntry(ImageEntry):
+    width: int | None
+    height: int | None
+    size: int | None
+    mtime: float | None
+
+
 class SubdirectoriesResponse(BaseModel):
     subdirectories: list[DirectoryEntry]
 
@@ -20,7 +31,48 @@ class SubdirectoriesResponse(BaseModel):
 class ImagesResponse(BaseModel):
     directory_id: str
     subdirectory: str
+    images: list[ImageEntry | ImageDetailsEntry]
+    total: int
+    next_cursor: str | None = None
+
+
+class TileInfoResponse(BaseModel):
+    width: int
+    height: int
+    tile_size: int
+    max_level: int
+
+
+class PreviewsRequest(BaseModel):
+    directory_ids: list[str] = Field(max_length=MAX_PREVIEW_DIRECTORIES)
+    limit: int = Field(default=5, ge=1, le=MAX_PREVIEW_IMAGES)
+    # Requests a contact-sheet map per directory, with cells of about this many pixels.
+    contact_sheet_size: int | None = Field(default=None, ge=1)
+
+
+class ContactSheetCell(BaseModel):
+    file_id: str
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+class ContactSheet(BaseModel):
+    url: str
+    cell_size: int
+    cells: list[ContactSheetCell]
+
+
+class DirectoryPreview(BaseModel):
+    directory_id: str
     images: list[ImageEntry]
+    total: int
+    contact_sheet: ContactSheet | None = None
+
+
+class PreviewsResponse(BaseModel):
+    previews: list[DirectoryPreview]
 
 
 class DeleteImageResponse(BaseModel):
@@ -28,6 +80,20 @@ class DeleteImageResponse(BaseModel):
     file_id: str
 
 
+class DeleteImagesRequest(BaseModel):
+    file_ids: list[str] = Field(min_length=1, max_length=MAX_DELETE_BATCH)
+
+
+class DeleteImageResult(BaseModel):
+    file_id: str
+    status: int
+    deleted: str | None = None
+
+
+class DeleteImagesResponse(BaseModel):
+    results: list[DeleteImageResult]
+
+
 class RenameDirectoryRequest(BaseModel):
     new_name: str
 
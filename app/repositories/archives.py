@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import os
+import stat
+import struct
+import threading
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+ARCHIVE_EXTENSIONS = {".zip", ".cbz"}
+DEFAULT_ARCHIVE_HANDLES = 64
+MEMBER_MODE = stat.S_IFREG | 0o444
+# A local file header is 30 fixed bytes followed by the name and extra field, then the member data.
+LOCAL_HEADER_SIZE = 30
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+@dataclass(frozen=True)
+class MemberStat:
+    """The ``os.stat_result`` fields the app reads, for a member of an archive.
+
+    Members share the archive's times, so rewriting the archive changes every member's ETag.
+    """
+
+    st_size: int
+    st_mtime: float
+    st_mtime_ns: int
+    st_mode: int = MEMBER_MODE
+
+
+# What ``stat_path`` returns: callers tell archive members apart with ``isinstance(..., MemberStat)``.
+FileStat = os.stat_result | MemberStat
+
+
+class UnreadableArchiveError(OSError):
+    """An archive file that cannot be read as a ZIP, for example because it is truncated."""
+
+
+def is_archive(path: Path) -> bool:
+    """Return whether ``path`` is an archive file browsed as a virtual directory."""
+    return path.suffix.lower() in ARCHIVE_EXTENSIONS and path.is_file()
+
+
+def stat_path(path: Path, archives: ArchiveHandlePool | None) -> FileStat:
+    """``path.stat()`` that also accepts members of archives when ``archives`` is given.
+
+    A missing member raises ``FileNotFoundError`` like a missing file.
+    """
+    try:
+        return path.stat()
+    except NotADirectoryError:
+        if archives is None:
+            raise
+        return archives.stat_member(path)
+
+
+def open_path(path: Path, archives: ArchiveHandlePool | None) -> BinaryIO:
+    """Open a file, or a member of an archive when ``archives`` is given, for binary reading."""
+    try:
+        return path.open("rb")
+    except NotADirectoryError:
+        if archives is None:
+            raise
+        return archives.open_member(path)
+
+
+def _is_safe_member(info: zipfile.ZipInfo) -> bool:
+    # Names that could step outside the archive path once joined to it are never exposed.
+    name = info.filename
+    if info.is_dir() or info.flag_bits & 0x1 or name.startswith("/") or "\\" in name:
+        return False
+    return all(part not in ("", ".", "..") for part in name.split("/"))
+
+
+class _OpenArchive:
+    __slots__ = ("zip_file", "validators", "stat_result", "members", "names", "data_offsets", "lock")
+
+    def __init__(self, zip_file: zipfile.ZipFile, stat_result: os.stat_result) -> None:
+        self.zip_file = zip_file
+        self.validators = (stat_result.st_mtime_ns, stat_result.st_size)
+        self.stat_result = stat_result
+        self.members = {info.filename: info for info in zip_file.infolist() if _is_safe_member(info)}
+        self.names = sorted(self.members)
+        self.data_offsets: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+
+class ArchiveHandlePool:
+    """LRU of open ``ZipFile`` handles keyed by archive path, validated by mtime and size.
+
+    Opening an archive parses its central directory once; later member reads seek
+    straight to the member's local header through the kept handle. An evicted
+    handle is closed right away, and ``ZipFile`` keeps the file itself open until
+    members still being read are closed.
+    """
+
+    def __init__(self, max_handles: int = DEFAULT_ARCHIVE_HANDLES) -> None:
+        self.max_handles = max_handles
+        self._lock = threading.Lock()
+        self._handles: OrderedDict[Path, _OpenArchive] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def members(self, archive: Path) -> list[str]:
+        """Return the sorted names of the file members of ``archive``."""
+        return self._get(archive, archive.stat()).names
+
+    def stat_member(self, path: Path) -> MemberStat:
+        _, handle, name = self._locate(path)
+        info = handle.members.get(name)
+        if info is None:
+            raise FileNotFoundError(path)
+        return MemberStat(info.file_size, handle.stat_result.st_mtime, handle.stat_result.st_mtime_ns)
+
+    def open_member(self, path: Path) -> BinaryIO:
+        _, handle, name = self._locate(path)
+        info = handle.members.get(name)
+        if info is None:
+            raise FileNotFoundError(path)
+        with handle.lock:
+            if handle.zip_file.fp is not None:
+                try:
+                    return handle.zip_file.open(info)
+                except zipfile.BadZipFile as exc:
+                    raise UnreadableArchiveError(f"Unreadable member {name} in {path}") from exc
+        # Evicted between the lookup and the open; looking it up again reopens the archive.
+        return self.open_member(path)
+
+    def stored_member(self, path: Path) -> tuple[Path, int] | None:
+        """Locate an uncompressed member as ``(archive, data_offset)``.
+
+        Stored members are plain byte ranges of the archive file, so they can be
+        served from it directly. ``None`` means the member is compressed.
+        """
+        archive, handle, name = self._locate(path)
+        info = handle.members.get(name)
+        if info is None:
+            raise FileNotFoundError(path)
+        if info.compress_type != zipfile.ZIP_STORED:
+            return None
+        offset = handle.data_offsets.get(name)
+        if offset is None:
+            # The local header's name and extra field may differ from the central directory's copy.
+            with archive.open("rb") as file:
+                file.seek(info.header_offset)
+                header = file.read(LOCAL_HEADER_SIZE)
+            if len(header) < LOCAL_HEADER_SIZE or not header.startswith(LOCAL_HEADER_SIGNATURE):
+                raise UnreadableArchiveError(f"Bad local header for {name} in {archive}")
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            offset = handle.data_offsets[name] = info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length
+        return archive, offset
+
+    def close(self) -> None:
+        with self._lock:
+            while self._handles:
+                _close(self._handles.popitem()[1])
+
+    def _locate(self, path: Path) -> tuple[Path, _OpenArchive, str]:
+        """Split ``path`` into the outermost archive file above it, its handle and the member name."""
+        for archive in reversed(path.parents):
+            if archive.suffix.lower() not in ARCHIVE_EXTENSIONS:
+                continue
+            try:
+                archive_stat = archive.stat()
+            except NotADirectoryError:
+                break
+            if stat.S_ISREG(archive_stat.st_mode):
+                return archive, self._get(archive, archive_stat), path.relative_to(archive).as_posix()
+        raise FileNotFoundError(path)
+
+    def _get(self, archive: Path, archive_stat: os.stat_result) -> _OpenArchive:
+        validators = (archive_stat.st_mtime_ns, archive_stat.st_size)
+        with self._lock:
+            handle = self._handles.get(archive)
+            if handle is not None and handle.validators == validators:
+                self._handles.move_to_end(archive)
+                self.hits += 1
+                return handle
+            self.misses += 1
+
+        try:
+            handle = _OpenArchive(zipfile.ZipFile(archive), archive_stat)
+        except zipfile.BadZipFile as exc:
+            raise UnreadableArchiveError(f"Not a readable ZIP archive: {archive}") from exc
+
+        with self._lock:
+            replaced = self._handles.pop(archive, None)
+            if replaced is not None:
+                _close(replaced)
+            self._handles[archive] = handle
+            self._evict_locked()
+        return handle
+
+    def _evict_locked(self) -> None:
+        while len(self._handles) > self.max_handles:
+            _close(self._handles.popitem(last=False)[1])
+
+
+def _close(handle: _OpenArchive) -> None:
+    with handle.lock:
+        handle.zip_file.close()
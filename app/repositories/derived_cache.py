@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from app.repositories.archives import FileStat
+
+
+class DerivedImageCache:
+    """Content-addressed on-disk store for generated image derivatives.
+
+    Keys are derived from the source path and the same ``st_mtime_ns``/``st_size``
+    pair used for the image ETag, so a modified source never hits a stale entry.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __reduce__(self) -> tuple[type[DerivedImageCache], tuple[Path]]:
+        # Generation workers get a fresh instance: they only store, and the lock cannot be pickled.
+        return DerivedImageCache, (self.root,)
+
+    def build_key(self, source: Path, stat_result: FileStat, variant: str) -> str:
+        material = f"{source}\0{stat_result.st_mtime_ns}\0{stat_result.st_size}\0{variant}"
+        return hashlib.sha256(material.encode("utf-8", "surrogateescape")).hexdigest()
+
+    def path_for(self, key: str, suffix: str) -> Path:
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def lookup(self, key: str, suffix: str, *, count: bool = True) -> tuple[Path, os.stat_result] | None:
+        """Return the stored entry, if any; ``count=False`` leaves the hit/miss counters alone."""
+        path = self.path_for(key, suffix)
+        try:
+            stat_result = path.stat()
+        except FileNotFoundError:
+            stat_result = None
+        if count:
+            with self._lock:
+                if stat_result is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+        return None if stat_result is None else (path, stat_result)
+
+    def store(self, key: str, suffix: str, data: bytes) -> tuple[Path, os.stat_result]:
+        path = self.path_for(key, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_name, path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+        return path, path.stat()
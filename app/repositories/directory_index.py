@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+
+ENTRY_KIND_DIRECTORY = "d"
+ENTRY_KIND_IMAGE = "i"
+
+
+class DirectoryIndex:
+    """SQLite-backed store of directory listings keyed by the directory ``st_mtime_ns``.
+
+    A listing is only trusted when the directory mtime it was recorded with is older
+    than the scan itself by ``racy_window_ns``; otherwise a change landing in the same
+    timestamp tick as the scan could go unnoticed.
+    """
+
+    def __init__(self, db_path: Path, *, racy_window_ns: int = 2_000_000_000) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._racy_window_ns = racy_window_ns
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS directories ("
+            " path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, scanned_ns INTEGER NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " directory TEXT NOT NULL, name TEXT NOT NULL, kind TEXT NOT NULL,"
+            " PRIMARY KEY (directory, kind, name)) WITHOUT ROWID"
+        )
+
+    def is_fresh(self, directory: Path, mtime_ns: int) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT mtime_ns, scanned_ns FROM directories WHERE path = ?", (str(directory),)
+            ).fetchone()
+        if row is None:
+            return False
+        recorded_mtime_ns, scanned_ns = row
+        return recorded_mtime_ns == mtime_ns and recorded_mtime_ns + self._racy_window_ns <= scanned_ns
+
+    def names(self, directory: Path, kind: str, *, descending: bool = False) -> list[str]:
+        order = "DESC" if descending else "ASC"
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT name FROM entries WHERE directory = ? AND kind = ? ORDER BY name {order}",
+                (str(directory), kind),
+            ).fetchall()
+        return [name for (name,) in rows]
+
+    def page(self, directory: Path, kind: str, *, after: str | None, limit: int | None) -> tuple[list[str], int]:
+        key = str(directory)
+        with self._lock:
+            (total,) = self._connection.execute(
+                "SELECT COUNT(*) FROM entries WHERE directory = ? AND kind = ?", (key, kind)
+            ).fetchone()
+            rows = self._connection.execute(
+                "SELECT name FROM entries WHERE directory = ? AND kind = ? AND name > ? ORDER BY name LIMIT ?",
+                (key, kind, after if after is not None else "", limit if limit is not None else -1),
+            ).fetchall()
+        return [name for (name,) in rows], total
+
+    def replace(self, directory: Path, mtime_ns: int, scanned_ns: int, entries: list[tuple[str, str]]) -> None:
+        key = str(directory)
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.execute("DELETE FROM entries WHERE directory = ?", (key,))
+                self._connection.executemany(
+                    "INSERT INTO entries (directory, name, kind) VALUES (?, ?, ?)",
+                    ((key, name, kind) for name, kind in entries),
+                )
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO directories (path, mtime_ns, scanned_ns) VALUES (?, ?, ?)",
+                    (key, mtime_ns, scanned_ns),
+                )
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def upsert(self, directory: Path, name: str, kind: str, mtime_ns: int, *, trusted_since_ns: int) -> bool:
+        """Add one entry to the listing of ``directory`` and trust it at the directory's new ``mtime_ns``.
+
+        Only listings scanned at or after ``trusted_since_ns`` are patched; returns False otherwise,
+        or when ``directory`` is not indexed, and the caller should invalidate it instead.
+        """
+        return self._patch(
+            directory,
+            mtime_ns,
+            trusted_since_ns,
+            "INSERT OR REPLACE INTO entries (directory, name, kind) VALUES (?, ?, ?)",
+            (str(directory), name, kind),
+        )
+
+    def remove(self, directory: Path, name: str, mtime_ns: int, *, trusted_since_ns: int) -> bool:
+        """Drop one entry, of any kind, from the listing of ``directory``; see ``upsert``."""
+        return self._patch(
+            directory,
+            mtime_ns,
+            trusted_since_ns,
+            "DELETE FROM entries WHERE directory = ? AND name = ?",
+            (str(directory), name),
+        )
+
+    def _patch(
+        self, directory: Path, mtime_ns: int, trusted_since_ns: int, statement: str, parameters: tuple[str, ...]
+    ) -> bool:
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                # The patched listing is as good as a scan taken outside the racy window of the new mtime.
+                patched = self._connection.execute(
+                    "UPDATE directories SET mtime_ns = ?, scanned_ns = MAX(scanned_ns, ?)"
+                    " WHERE path = ? AND scanned_ns >= ?",
+                    (mtime_ns, mtime_ns + self._racy_window_ns, str(directory), trusted_since_ns),
+                ).rowcount
+                if patched:
+                    self._connection.execute(statement, parameters)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+        return bool(patched)
+
+    def invalidate(self, directory: Path) -> None:
+        key = str(directory)
+        with self._lock:
+            self._connection.execute("BEGIN")
+            self._connection.execute("DELETE FROM entries WHERE directory = ?", (key,))
+            self._connection.execute("DELETE FROM directories WHERE path = ?", (key,))
+            self._connection.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
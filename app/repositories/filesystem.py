@@ -1,24 +1,124 @@
 from __future__ import annotations
 
+import bisect
+import os
+import time
 from pathlib import Path
 
+from app.repositories.archives import ARCHIVE_EXTENSIONS, ArchiveHandlePool, is_archive
+from app.repositories.directory_index import ENTRY_KIND_DIRECTORY, ENTRY_KIND_IMAGE, DirectoryIndex
+
 
 class FileSystemRepository:
+    """Lists directories and images; with ``archives``, ZIP/CBZ files are listed as directories too."""
+
     IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".svg"}
 
+    def __init__(self, archives: ArchiveHandlePool | None = None) -> None:
+        self.archives = archives
+
     def list_subdirectories(self, base_dir: Path) -> list[Path]:
-        return [entry for entry in sorted(base_dir.iterdir(), reverse=True) if entry.is_dir()]
+        return [
+            entry
+            for entry in sorted(base_dir.iterdir(), reverse=True)
+            if entry.is_dir() or self._is_archive(entry)
+        ]
 
     def list_images(self, directory: Path) -> list[Path]:
+        if self._is_archive(directory):
+            return [directory / name for name in self._archive_images(directory)]
         return [
             entry
             for entry in sorted(directory.iterdir())
             if entry.is_file() and entry.suffix.lower() in self.IMAGE_EXTENSIONS
         ]
 
+    def list_images_page(self, directory: Path, *, after: str | None, limit: int | None) -> tuple[list[Path], int]:
+        """Return up to ``limit`` images named after ``after`` along with the total image count.
+
+        Archive members are named by their path inside the archive.
+        """
+        if self._is_archive(directory):
+            names = self._archive_images(directory)
+        else:
+            names = [path.name for path in self.list_images(directory)]
+        start = 0 if after is None else bisect.bisect_right(names, after)
+        end = None if limit is None else start + limit
+        return [directory / name for name in names[start:end]], len(names)
+
+    def _is_archive(self, path: Path) -> bool:
+        return self.archives is not None and is_archive(path)
+
+    def _archive_images(self, archive: Path) -> list[str]:
+        assert self.archives is not None
+        # Read from the central directory only; members are not decompressed to be listed.
+        return [
+            name
+            for name in self.archives.members(archive)
+            if os.path.splitext(name)[1].lower() in self.IMAGE_EXTENSIONS
+        ]
+
     def delete_file(self, path: Path) -> None:
         path.unlink()
 
     def rename_directory(self, source: Path, destination: Path) -> Path:
         source.rename(destination)
         return destination
+
+
+class IndexedFileSystemRepository(FileSystemRepository):
+    """Serves listings from a ``DirectoryIndex``, rescanning a directory only when its mtime changes."""
+
+    def __init__(self, index: DirectoryIndex, archives: ArchiveHandlePool | None = None) -> None:
+        super().__init__(archives)
+        self.index = index
+
+    def list_subdirectories(self, base_dir: Path) -> list[Path]:
+        if not self._refresh(base_dir):
+            return super().list_subdirectories(base_dir)
+        return [base_dir / name for name in self.index.names(base_dir, ENTRY_KIND_DIRECTORY, descending=True)]
+
+    def list_images(self, directory: Path) -> list[Path]:
+        if self._is_archive(directory) or not self._refresh(directory):
+            return super().list_images(directory)
+        return [directory / name for name in self.index.names(directory, ENTRY_KIND_IMAGE)]
+
+    def list_images_page(self, directory: Path, *, after: str | None, limit: int | None) -> tuple[list[Path], int]:
+        if self._is_archive(directory) or not self._refresh(directory):
+            return super().list_images_page(directory, after=after, limit=limit)
+        names, total = self.index.page(directory, ENTRY_KIND_IMAGE, after=after, limit=limit)
+        return [directory / name for name in names], total
+
+    def rename_directory(self, source: Path, destination: Path) -> Path:
+        super().rename_directory(source, destination)
+        self.index.invalidate(source)
+        return destination
+
+    def _refresh(self, directory: Path) -> bool:
+        """Bring the index entry for ``directory`` up to date; return False if it cannot be indexed."""
+        mtime_ns = directory.stat().st_mtime_ns
+        if self.index.is_fresh(directory, mtime_ns):
+            return True
+
+        scanned_ns = time.time_ns()
+        entries = self._scan(directory)
+        try:
+            self.index.replace(directory, mtime_ns, scanned_ns, entries)
+        except UnicodeEncodeError:
+            # Names that are not valid UTF-8 cannot be stored in SQLite TEXT columns.
+            self.index.invalidate(directory)
+            return False
+        return True
+
+    def _scan(self, directory: Path) -> list[tuple[str, str]]:
+        entries: list[tuple[str, str]] = []
+        with os.scandir(directory) as iterator:
+            for entry in iterator:
+                if entry.is_dir():
+                    entries.append((entry.name, ENTRY_KIND_DIRECTORY))
+                elif self.archives is not None and os.path.splitext(entry.name)[1].lower() in ARCHIVE_EXTENSIONS:
+                    # Archives are browsed as directories of their image members.
+                    entries.append((entry.name, ENTRY_KIND_DIRECTORY))
+                elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in self.IMAGE_EXTENSIONS:
+                    entries.append((entry.name, ENTRY_KIND_IMAGE))
+        return entries
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+class ImageBytesCache:
+    """Process-local LRU of original image bodies bounded by a total byte budget.
+
+    Entries are validated against the caller's ``st_mtime_ns``/``st_size`` so a
+    replaced file is re-read instead of served stale. Files larger than
+    ``max_entry_bytes`` are never cached and keep being streamed from disk.
+    """
+
+    def __init__(self, max_bytes: int, *, max_entry_bytes: int | None = None) -> None:
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 8 if max_entry_bytes is None else min(max_entry_bytes, max_bytes)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Path, tuple[int, int, bytes]] = OrderedDict()
+        self._size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def accepts(self, stat_result: os.stat_result) -> bool:
+        return 0 < stat_result.st_size <= self.max_entry_bytes
+
+    def get(self, path: Path, stat_result: os.stat_result) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                self._remove_locked(path)
+            self.misses += 1
+            return None
+
+    def load(self, path: Path, stat_result: os.stat_result) -> bytes | None:
+        """Read ``path`` and cache it, unless it changed since ``stat_result`` was taken."""
+        with path.open("rb") as file:
+            data = file.read(stat_result.st_size + 1)
+            current = os.fstat(file.fileno())
+        validators = (stat_result.st_mtime_ns, stat_result.st_size)
+        if (current.st_mtime_ns, current.st_size) != validators or len(data) != stat_result.st_size:
+            return None
+
+        with self._lock:
+            self._remove_locked(path)
+            self._entries[path] = (*validators, data)
+            self._size_bytes += len(data)
+            while self._size_bytes > self.max_bytes:
+                self._remove_locked(next(iter(self._entries)))
+        return data
+
+    def discard(self, path: Path) -> None:
+        with self._lock:
+            self._remove_locked(path)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size_bytes
+
+    def _remove_locked(self, path: Path) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._size_bytes -= len(entry[2])
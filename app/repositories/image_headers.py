@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import os
+import re
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO
+
+from app.repositories.archives import ArchiveHandlePool, FileStat, open_path
+
+DEFAULT_SIZE_CACHE_ENTRIES = 100_000
+# The root element of an SVG is expected within this many bytes, after any prolog and comments.
+SVG_HEADER_BYTES = 16 * 1024
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# EXIF orientations 5-8 rotate by 90 degrees, so the displayed width is the stored height.
+EXIF_TRANSPOSING_ORIENTATIONS = {5, 6, 7, 8}
+EXIF_ORIENTATION_TAG = 0x0112
+# SOF markers carry the frame size; C4 (DHT), C8 (JPG) and CC (DAC) share the range but do not.
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+JPEG_STANDALONE_MARKERS = set(range(0xD0, 0xDA)) | {0x01}
+
+_SVG_ROOT = re.compile(rb"<svg\b[^>]*>", re.IGNORECASE | re.DOTALL)
+_SVG_LENGTH = re.compile(r"^\s*([0-9]*\.?[0-9]+)\s*(px)?\s*$")
+
+
+def read_image_size(path: Path, archives: ArchiveHandlePool | None = None) -> tuple[int, int] | None:
+    """Return the displayed ``(width, height)`` of ``path`` from its header, without decoding pixels.
+
+    JPEG sizes account for the EXIF orientation. ``None`` means the format is not
+    recognised or the header is truncated or malformed. Members of archives are read through ``archives``.
+    """
+    try:
+        with open_path(path, archives) as file:
+            if path.suffix.lower() == ".svg":
+                return _svg_size(file.read(SVG_HEADER_BYTES))
+            head = file.read(32)
+            if head.startswith(PNG_SIGNATURE) and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", head[6:10])
+            if head.startswith(b"BM"):
+                return _bmp_size(head)
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                return _webp_size(head)
+            if head.startswith(b"\xff\xd8"):
+                file.seek(2)
+                return _jpeg_size(file)
+    except (OSError, struct.error, ValueError):
+        return None
+    return None
+
+
+def _bmp_size(head: bytes) -> tuple[int, int] | None:
+    (header_size,) = struct.unpack("<I", head[14:18])
+    if header_size == 12:
+        return struct.unpack("<HH", head[18:22])
+    width, height = struct.unpack("<ii", head[18:26])
+    # A negative height marks a top-down bitmap.
+    return width, abs(height)
+
+
+def _webp_size(head: bytes) -> tuple[int, int] | None:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        (bits,) = struct.unpack("<I", head[21:25])
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def _jpeg_size(file: BinaryIO) -> tuple[int, int] | None:
+    orientation = 1
+    while True:
+        byte = file.read(1)
+        if byte != b"\xff":
+            return None
+        marker = file.read(1)
+        while marker == b"\xff":
+            marker = file.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code in JPEG_STANDALONE_MARKERS:
+            continue
+        if code == 0xD9:
+            return None
+        (length,) = struct.unpack(">H", file.read(2))
+        if length < 2:
+            return None
+        if code in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">xHH", file.read(5))
+            if orientation in EXIF_TRANSPOSING_ORIENTATIONS:
+                return height, width
+            return width, height
+        if code == 0xE1 and orientation == 1:
+            segment = file.read(length - 2)
+            if segment.startswith(b"Exif\0\0"):
+                orientation = _exif_orientation(segment[6:])
+            continue
+        file.seek(length - 2, os.SEEK_CUR)
+
+
+def _exif_orientation(tiff: bytes) -> int:
+    byte_order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if byte_order is None:
+        return 1
+    try:
+        (ifd_offset,) = struct.unpack(f"{byte_order}I", tiff[4:8])
+        (entry_count,) = struct.unpack(f"{byte_order}H", tiff[ifd_offset : ifd_offset + 2])
+        for index in range(entry_count):
+            entry_offset = ifd_offset + 2 + index * 12
+            tag, _, _, value = struct.unpack(f"{byte_order}HHIH", tiff[entry_offset : entry_offset + 10])
+            if tag == EXIF_ORIENTATION_TAG:
+                return value
+    except struct.error:
+        pass
+    return 1
+
+
+def _svg_size(head: bytes) -> tuple[int, int] | None:
+    root = _SVG_ROOT.search(head)
+    if root is None:
+        return None
+    attributes = dict(
+        (name.lower(), value)
+        for name, value in re.findall(r'([\w:-]+)\s*=\s*["\']([^"\']*)["\']', root.group().decode("utf-8", "replace"))
+    )
+    width = _svg_length(attributes.get("width"))
+    height = _svg_length(attributes.get("height"))
+    if width is not None and height is not None:
+        return width, height
+    view_box = attributes.get("viewbox", "").replace(",", " ").split()
+    if len(view_box) != 4:
+        return None
+    box_width, box_height = float(view_box[2]), float(view_box[3])
+    if box_width <= 0 or box_height <= 0:
+        return None
+    # With one explicit dimension the other follows the viewBox aspect ratio.
+    if width is not None:
+        return width, round(width * box_height / box_width)
+    if height is not None:
+        return round(height * box_width / box_height), height
+    return round(box_width), round(box_height)
+
+
+def _svg_length(value: str | None) -> int | None:
+    if value is None:
+        return None
+    match = _SVG_LENGTH.match(value)
+    return round(float(match.group(1))) if match else None
+
+
+class ImageSizeCache:
+    """Process-local LRU of header-derived image sizes keyed by path and validated by mtime and size."""
+
+    def __init__(self, max_entries: int = DEFAULT_SIZE_CACHE_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Path, tuple[int, int, tuple[int, int] | None]] = OrderedDict()
+
+    def get(
+        self, path: Path, stat_result: FileStat, archives: ArchiveHandlePool | None = None
+    ) -> tuple[int, int] | None:
+        validators = (stat_result.st_mtime_ns, stat_result.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == validators:
+                self._entries.move_to_end(path)
+                return entry[2]
+
+        size = read_image_size(path, archives)
+        with self._lock:
+            self._entries.pop(path, None)
+            self._entries[path] = (*validators, size)
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        return size
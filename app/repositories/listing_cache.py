@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+
+DEFAULT_RACY_WINDOW_NS = 2_000_000_000
+
+
+class ListingCache:
+    """Process-local LRU of rendered listing bodies keyed by request, validated by directory mtime.
+
+    As with ``DirectoryIndex``, a body is only stored when it was rendered at least
+    ``racy_window_ns`` after the directory mtime it is validated against, so a change
+    landing in the same timestamp tick cannot be hidden behind a cached body.
+    """
+
+    def __init__(self, max_bytes: int, *, racy_window_ns: int = DEFAULT_RACY_WINDOW_NS) -> None:
+        self.max_bytes = max_bytes
+        self._racy_window_ns = racy_window_ns
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[int, bytes]] = OrderedDict()
+        self._size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, mtime_ns: int) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == mtime_ns:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove_locked(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, mtime_ns: int, rendered_ns: int, body: bytes) -> None:
+        if mtime_ns + self._racy_window_ns > rendered_ns or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove_locked(key)
+            self._entries[key] = (mtime_ns, body)
+            self._size_bytes += len(body)
+            while self._size_bytes > self.max_bytes:
+                self._remove_locked(next(iter(self._entries)))
+
+    def _remove_locked(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size_bytes -= len(entry[1])
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+from collections.abc import Callable
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor
+from typing import Any
+
+from app.services.image_service import ServiceError, ServiceUnavailableError
+
+
+class GenerationScheduler:
+    """Bounded process pool for CPU-bound derivative generation.
+
+    Jobs are coalesced by key: concurrent requests for the same derivative share
+    a single worker job. Once ``max_pending`` distinct jobs are queued or running,
+    new jobs are rejected with ``ServiceUnavailableError``.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int,
+        max_pending: int,
+        initializer: Callable[..., None] | None = None,
+        initargs: tuple[Any, ...] = (),
+    ) -> None:
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initializer,
+            initargs=initargs,
+        )
+        self._max_pending = max_pending
+        self._pending: dict[str, Future[Any]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, fn: Callable[..., Any], *args: Any) -> Future[Any]:
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            if len(self._pending) >= self._max_pending:
+                raise ServiceUnavailableError
+            try:
+                future = self._executor.submit(fn, *args)
+            except RuntimeError as exc:
+                raise ServiceError from exc
+            self._pending[key] = future
+
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    async def run(self, key: str, fn: Callable[..., Any], *args: Any) -> Any:
+        future = self.submit(key, fn, *args)
+        try:
+            # Shielded so a disconnecting client does not cancel a job other requests share.
+            return await asyncio.shield(asyncio.wrap_future(future))
+        except BrokenExecutor as exc:
+            raise ServiceError from exc
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _forget(self, key: str, future: Future[Any]) -> None:
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
@@ -1,13 +1,28 @@
 from __future__ import annotations
 
+import os
 import re
-import threading
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from uuid import uuid4
 
-from app.models.schemas import DirectoryEntry, ImageEntry
+from app.models.schemas import DirectoryEntry, DirectoryPreview, ImageEntry
+from app.repositories.archives import (
+    ARCHIVE_EXTENSIONS,
+    ArchiveHandlePool,
+    FileStat,
+    MemberStat,
+    UnreadableArchiveError,
+    is_archive,
+    stat_path,
+)
 from app.repositories.filesystem import FileSystemRepository
+from app.repositories.image_headers import ImageSizeCache
+from app.services.registry import Registry
+from app.services.stat_cache import StatCache
+
+
+# (width, height, size, mtime); the dimensions are None when the header cannot be parsed.
+ImageDetails = tuple[int | None, int | None, int, float]
 
 
 class ServiceError(Exception):
@@ -30,81 +45,156 @@ class UnsupportedMediaTypeError(ServiceError):
     pass
 
 
-class ResourceRegistry:
-    """Thread-safe ID <-> path registry for directory_id/file_id resolution."""
-
-    def __init__(self) -> None:
-        self._id_to_path: dict[str, Path] = {}
-        self._path_to_id: dict[Path, str] = {}
-        self._lock = threading.Lock()
-
-    def register(self, path: Path) -> str:
-        resolved_path = path.resolve()
-        with self._lock:
-            resource_id = self._path_to_id.get(resolved_path)
-            if resource_id is None:
-                resource_id = uuid4().hex
-                self._path_to_id[resolved_path] = resource_id
-                self._id_to_path[resource_id] = resolved_path
-            return resource_id
-
-    def discard(self, path: Path) -> None:
-        resolved_path = path.resolve()
-        with self._lock:
-            resource_id = self._path_to_id.pop(resolved_path, None)
-            if resource_id is not None:
-                self._id_to_path.pop(resource_id, None)
-
-    def resolve(self, resource_id: str, *, base_dir: Path, expect_directory: bool) -> Path | None:
-        with self._lock:
-            path = self._id_to_path.get(resource_id)
-
-        if path is None:
-            return None
-        if not path.exists() or not path.is_relative_to(base_dir):
-            self.discard(path)
-            return None
-        if expect_directory and not path.is_dir():
-            return None
-        if not expect_directory and not path.is_file():
-            return None
-        return path
+class ServiceUnavailableError(ServiceError):
+    pass
 
 
 @dataclass
 class ImageService:
     base_dir: Path
     repository: FileSystemRepository
-    registry: ResourceRegistry
+    registry: Registry
+    stat_cache: StatCache | None = field(default=None)
+    size_cache: ImageSizeCache = field(default_factory=ImageSizeCache)
+    archives: ArchiveHandlePool | None = field(default=None)
 
     def list_subdirectories(self) -> list[DirectoryEntry]:
         subdirectories = self.repository.list_subdirectories(self.base_dir)
-        return [DirectoryEntry(directory_id=self.registry.register(path), name=path.name) for path in subdirectories]
+        directory_ids = self.registry.register_many(subdirectories)
+        return [
+            DirectoryEntry(directory_id=directory_id, name=path.name)
+            for directory_id, path in zip(directory_ids, subdirectories)
+        ]
+
+    def list_images(
+        self, directory_id: str, *, after: str | None = None, limit: int | None = None
+    ) -> tuple[Path, list[ImageEntry], int, str | None]:
+        """Return the directory, one page of images, the total image count and the name to resume after."""
+        directory, _ = self.resolve_directory_with_stat(directory_id)
+        rows, total, next_after = self.list_image_rows(directory, after=after, limit=limit)
+        image_entries = [ImageEntry(file_id=file_id, name=name) for file_id, name in rows]
+        return directory, image_entries, total, next_after
+
+    def list_image_rows(
+        self, directory: Path, *, after: str | None = None, limit: int | None = None
+    ) -> tuple[list[tuple[str, str]], int, str | None]:
+        """Like ``list_images`` for a resolved directory, with plain ``(file_id, name)`` rows.
+
+        Skips building one model per file, which dominates listing large directories.
+        """
+        try:
+            images, total = self.repository.list_images_page(
+                directory, after=after, limit=None if limit is None else limit + 1
+            )
+        except UnreadableArchiveError as exc:
+            # A corrupt or truncated archive is listed as a directory but has no images to show.
+            raise ResourceNotFoundError from exc
+        names = _relative_names(directory, images)
+        next_after = None
+        if limit is not None and len(images) > limit:
+            images, names = images[:limit], names[:limit]
+            next_after = names[-1]
+        file_ids = self.registry.register_many(images)
+        return list(zip(file_ids, names)), total, next_after
+
+    def image_details(self, name: str, directory: Path) -> ImageDetails | None:
+        """Return size, mtime and header-derived dimensions of one image; ``None`` if it vanished."""
+        path = directory / name
+        try:
+            stat_result = stat_path(path, self.archives)
+        except OSError:
+            return None
+        dimensions = self.size_cache.get(path, stat_result, self.archives)
+        width, height = dimensions if dimensions is not None else (None, None)
+        return width, height, stat_result.st_size, stat_result.st_mtime
 
-    def list_images(self, directory_id: str) -> tuple[Path, list[ImageEntry]]:
-        directory = self.registry.resolve(directory_id, base_dir=self.base_dir, expect_directory=True)
-        if directory is None:
+    def resolve_directory_with_stat(self, directory_id: str) -> tuple[Path, FileStat]:
+        resolved = self.registry.resolve_with_stat(directory_id, base_dir=self.base_dir, expect_directory=True)
+        if resolved is None:
             raise ResourceNotFoundError
-
-        images = self.repository.list_images(directory)
-        image_entries = [ImageEntry(file_id=self.registry.register(path), name=path.name) for path in images]
-        return directory, image_entries
+        return resolved
+
+    def next_image_ids(self, file_id: str, count: int) -> list[str]:
+        """Return the IDs of up to ``count`` images that follow ``file_id`` in its directory's listing order."""
+        file_path, _ = self.resolve_image_with_stat(file_id)
+        directory = self._listing_directory(file_path)
+        (name,) = _relative_names(directory, [file_path])
+        images, _ = self.repository.list_images_page(directory, after=name, limit=count)
+        return self.registry.register_many(images)
+
+    def _listing_directory(self, file_path: Path) -> Path:
+        # Archive members are listed under the archive, however deep inside it they sit.
+        if self.archives is not None:
+            for parent in reversed(file_path.parents):
+                if is_archive(parent):
+                    return parent
+        return file_path.parent
+
+    def preview_directory(self, directory_id: str, limit: int) -> DirectoryPreview | None:
+        """Return the first ``limit`` images of a directory, or ``None`` if it is unknown or vanished."""
+        try:
+            _, images, total, _ = self.list_images(directory_id, limit=limit)
+        except (ResourceNotFoundError, OSError):
+            return None
+        return DirectoryPreview(directory_id=directory_id, images=images, total=total)
 
     def resolve_image(self, file_id: str) -> Path:
-        file_path = self.registry.resolve(file_id, base_dir=self.base_dir, expect_directory=False)
-        if file_path is None:
+        return self.resolve_image_with_stat(file_id)[0]
+
+    def resolve_image_with_stat(self, file_id: str) -> tuple[Path, FileStat]:
+        """Resolve ``file_id`` and return the ``stat`` taken while validating it, so callers need not stat again."""
+        if self.stat_cache is not None:
+            cached = self.stat_cache.get(file_id)
+            if cached is not None:
+                return cached
+
+        resolved = self.registry.resolve_with_stat(file_id, base_dir=self.base_dir, expect_directory=False)
+        if resolved is None:
             raise ResourceNotFoundError
-        if file_path.suffix.lower() not in self.repository.IMAGE_EXTENSIONS:
+        if resolved[0].suffix.lower() not in self.repository.IMAGE_EXTENSIONS:
             raise UnsupportedMediaTypeError
-        return file_path
+        if self.stat_cache is not None:
+            self.stat_cache.put(file_id, *resolved)
+        return resolved
 
     def delete_image(self, file_id: str) -> Path:
-        file_path = self.resolve_image(file_id)
+        file_path = self._resolve_deletable(file_id)
         try:
             self.repository.delete_file(file_path)
         except OSError as exc:
             raise ServiceError from exc
         self.registry.discard(file_path)
+        if self.stat_cache is not None:
+            self.stat_cache.discard(file_id)
+        return file_path
+
+    def unlink_image(self, file_id: str) -> Path | ServiceError:
+        """Delete one image without updating the registry, returning the error instead of raising it.
+
+        Batch deletes unlink in parallel and then call ``forget_images`` once.
+        """
+        try:
+            file_path = self._resolve_deletable(file_id)
+            try:
+                self.repository.delete_file(file_path)
+            except OSError as exc:
+                raise ServiceError from exc
+        except ServiceError as exc:
+            return exc
+        return file_path
+
+    def forget_images(self, deleted: dict[str, Path]) -> None:
+        """Drop deleted images, keyed by file ID, from the registry and stat cache in one update."""
+        self.registry.discard_many(list(deleted.values()))
+        if self.stat_cache is not None:
+            for file_id in deleted:
+                self.stat_cache.discard(file_id)
+
+    def _resolve_deletable(self, file_id: str) -> Path:
+        file_path, stat_result = self.resolve_image_with_stat(file_id)
+        if isinstance(stat_result, MemberStat):
+            # Archives are browsed read-only; rewriting one to drop a member is out of scope.
+            raise ConflictError
         return file_path
 
     def rename_subdirectory(self, directory_id: str, new_name: str) -> tuple[str, str, str]:
@@ -115,6 +205,9 @@ class ImageService:
         stripped_name = new_name.strip()
         if not stripped_name or stripped_name in {".", ".."} or re.search(r"[\\/]", stripped_name):
             raise ValidationError
+        if is_archive(current_directory) and Path(stripped_name).suffix.lower() not in ARCHIVE_EXTENSIONS:
+            # Dropping the extension would turn the archive back into a plain file.
+            stripped_name += current_directory.suffix
 
         destination = self.base_dir / stripped_name
         if destination.exists():
@@ -126,5 +219,13 @@ class ImageService:
             raise ServiceError from exc
 
         self.registry.discard(current_directory)
+        if self.stat_cache is not None:
+            self.stat_cache.clear()
         new_directory_id = self.registry.register(destination)
         return new_directory_id, current_directory.name, stripped_name
+
+
+def _relative_names(directory: Path, paths: list[Path]) -> list[str]:
+    """Name ``paths`` relative to ``directory``; archive members may sit in folders inside the archive."""
+    prefix = len(os.fspath(directory)) + 1
+    return [os.fspath(path)[prefix:] for path in paths]
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import io
+import math
+import warnings
+from pathlib import Path
+
+from PIL import ExifTags, Image, ImageOps, features
+
+from app.repositories.archives import ArchiveHandlePool, open_path
+
+OUTPUT_FORMATS = {
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+}
+# AVIF encoding needs a Pillow build with libavif.
+if features.check("avif"):
+    OUTPUT_FORMATS["avif"] = ("AVIF", ".avif", "image/avif")
+# The image root is trusted, so the limit only guards memory; scans well past Pillow's ~179 MP default are served.
+DEFAULT_MAX_IMAGE_PIXELS = 1_000_000_000
+
+
+def configure_decoder(max_image_pixels: int) -> None:
+    """Reject images above ``max_image_pixels`` (0 disables the check) with ``Image.DecompressionBombError``.
+
+    Pillow's limit is process-wide, so this runs in the server and in every generation worker.
+    """
+    # Pillow warns above its limit and only raises above twice that.
+    Image.MAX_IMAGE_PIXELS = max_image_pixels // 2 if max_image_pixels > 0 else None
+    warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+
+
+def scaled_size(width: int, height: int, short_edge: int, long_edge_limit: int) -> tuple[int, int]:
+    scale = min(1.0, short_edge / min(width, height), long_edge_limit / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def fitted_size(width: int, height: int, max_width: int | None, max_height: int | None) -> tuple[int, int]:
+    """Return ``width``x``height`` scaled down to fit the given box; a missing bound is unconstrained."""
+    scale = min(1.0, (max_width or width) / width, (max_height or height) / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def encode_image(image: Image.Image, image_format: str, quality: int) -> bytes:
+    pil_format = OUTPUT_FORMATS[image_format][0]
+    has_alpha = image.mode in {"RGBA", "LA", "PA"} or "transparency" in image.info
+    if image_format == "jpeg":
+        image = image.convert("RGB")
+    elif image.mode not in {"RGB", "RGBA", "L"}:
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=pil_format, quality=quality)
+    return buffer.getvalue()
+
+
+def render_thumbnail(
+    source: Path, size: int, image_format: str, *, archives: ArchiveHandlePool | None = None
+) -> bytes:
+    """Downscale ``source`` so that its shorter edge is at most ``size`` pixels.
+
+    The long edge is capped at four times ``size`` so panoramas stay small.
+    """
+    with open_path(source, archives) as file, Image.open(file) as image:
+        target = scaled_size(image.width, image.height, size, size * 4)
+        image.draft("RGB", target)
+        oriented = ImageOps.exif_transpose(image)
+        if oriented.size != target:
+            target = scaled_size(oriented.width, oriented.height, size, size * 4)
+            oriented = oriented.resize(target, Image.Resampling.LANCZOS)
+        return encode_image(oriented, image_format, quality=80)
+
+
+def _swaps_axes(image: Image.Image) -> bool:
+    return image.getexif().get(ExifTags.Base.Orientation, 1) in {5, 6, 7, 8}
+
+
+def oriented_dimensions(source: Path, archives: ArchiveHandlePool | None = None) -> tuple[int, int]:
+    """Read the displayed size of ``source`` from its header, honouring the EXIF orientation."""
+    with open_path(source, archives) as file, Image.open(file) as image:
+        width, height = image.size
+        return (height, width) if _swaps_axes(image) else (width, height)
+
+
+def render_display(
+    source: Path,
+    max_width: int | None,
+    max_height: int | None,
+    image_format: str,
+    *,
+    archives: ArchiveHandlePool | None = None,
+) -> bytes:
+    """Downscale ``source`` to fit within ``max_width`` x ``max_height`` for on-screen viewing."""
+    with open_path(source, archives) as file, Image.open(file) as image:
+        if _swaps_axes(image):
+            image.draft("RGB", fitted_size(image.width, image.height, max_height, max_width))
+        else:
+            image.draft("RGB", fitted_size(image.width, image.height, max_width, max_height))
+        oriented = ImageOps.exif_transpose(image)
+        target = fitted_size(oriented.width, oriented.height, max_width, max_height)
+        if oriented.size != target:
+            oriented = oriented.resize(target, Image.Resampling.LANCZOS)
+        return encode_image(oriented, image_format, quality=85)
+
+
+def pyramid_max_level(width: int, height: int) -> int:
+    """Return the full-resolution level of a deep-zoom pyramid whose level 0 is a single pixel."""
+    return max(0, math.ceil(math.log2(max(width, height))))
+
+
+def pyramid_level_size(width: int, height: int, level: int) -> tuple[int, int]:
+    """Return the size of ``level``, halving the image once per level below the top one."""
+    divisor = 2 ** (pyramid_max_level(width, height) - level)
+    return max(1, math.ceil(width / divisor)), max(1, math.ceil(height / divisor))
+
+
+def render_tile_level(
+    source: Path, level: int, tile_size: int, image_format: str, *, archives: ArchiveHandlePool | None = None
+) -> list[tuple[int, int, bytes]]:
+    """Render every ``tile_size`` tile of one pyramid level of ``source`` as ``(column, row, data)``.
+
+    Decoding dominates for large scans, so a level is cut into tiles from a single decode.
+    """
+    with open_path(source, archives) as file, Image.open(file) as image:
+        swaps_axes = _swaps_axes(image)
+        width, height = (image.height, image.width) if swaps_axes else image.size
+        target = pyramid_level_size(width, height, level)
+        image.draft("RGB", (target[1], target[0]) if swaps_axes else target)
+        oriented = ImageOps.exif_transpose(image)
+        if oriented.size != target:
+            oriented = oriented.resize(target, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+        tiles = []
+        for row in range(math.ceil(target[1] / tile_size)):
+            for column in range(math.ceil(target[0] / tile_size)):
+                box = (
+                    column * tile_size,
+                    row * tile_size,
+                    min((column + 1) * tile_size, target[0]),
+                    min((row + 1) * tile_size, target[1]),
+                )
+                tiles.append((column, row, encode_image(oriented.crop(box), image_format, quality=85)))
+        return tiles
+
+
+def render_contact_sheet(
+    sources: list[Path], cell_size: int, image_format: str, *, archives: ArchiveHandlePool | None = None
+) -> bytes:
+    """Compose ``sources`` into one horizontal strip of ``cell_size`` squares, centre-cropped to fill.
+
+    Sources that cannot be decoded (for example SVG) leave their cell empty.
+    """
+    sheet = Image.new("RGBA", (cell_size * len(sources), cell_size), (0, 0, 0, 0))
+    for index, source in enumerate(sources):
+        try:
+            with open_path(source, archives) as file, Image.open(file) as image:
+                image.draft("RGB", scaled_size(image.width, image.height, cell_size, cell_size * 4))
+                oriented = ImageOps.exif_transpose(image).convert("RGBA")
+                cell = ImageOps.fit(oriented, (cell_size, cell_size), Image.Resampling.LANCZOS)
+        except (OSError, Image.DecompressionBombError):
+            continue
+        sheet.paste(cell, (index * cell_size, 0))
+    return encode_image(sheet, image_format, quality=80)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class IoExecutor:
+    """Dedicated thread pool for blocking filesystem work issued from async route handlers."""
+
+    def __init__(self, max_workers: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="io")
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def map(self, fn: Callable[..., T], items: Iterable[Any], *args: Any) -> list[T]:
+        """Run ``fn(item, *args)`` for every item on the pool and return the results in order.
+
+        Fan-out shares the pool's thread limit with every other request.
+        """
+        return list(await asyncio.gather(*(self.run(fn, item, *args) for item in items)))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
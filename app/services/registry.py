@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import abc
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import stat
+import tempfile
+import threading
+from pathlib import Path
+from typing import Protocol
+from uuid import uuid4
+
+from app.repositories.archives import ARCHIVE_EXTENSIONS, ArchiveHandlePool, FileStat, UnreadableArchiveError, stat_path
+
+ID_SECRET_BYTES = 32
+SIGNATURE_BYTES = 16
+
+
+class Registry(Protocol):
+    def register(self, path: Path) -> str: ...
+
+    def register_many(self, paths: list[Path]) -> list[str]: ...
+
+    def discard(self, path: Path) -> None: ...
+
+    def discard_many(self, paths: list[Path]) -> None: ...
+
+    def discard_tree(self, path: Path) -> None: ...
+
+    def resolve(self, resource_id: str, *, base_dir: Path, expect_directory: bool) -> Path | None: ...
+
+    def resolve_with_stat(
+        self, resource_id: str, *, base_dir: Path, expect_directory: bool
+    ) -> tuple[Path, FileStat] | None: ...
+
+    def __len__(self) -> int: ...
+
+
+def resolve_many(paths: list[Path]) -> list[Path]:
+    """Resolve sibling-heavy path lists with one ``lstat`` per entry instead of one per component."""
+    resolved_parents: dict[Path, Path] = {}
+    resolved: list[Path] = []
+    for path in paths:
+        parent = resolved_parents.get(path.parent)
+        if parent is None:
+            parent = resolved_parents[path.parent] = path.parent.resolve()
+        candidate = parent / path.name
+        resolved.append(candidate.resolve() if candidate.is_symlink() else candidate)
+    return resolved
+
+
+def _stat_within(path: Path, base_dir: Path, archives: ArchiveHandlePool | None) -> FileStat | None:
+    """Stat an already resolved ``path`` with one syscall, or return None if it is gone or outside ``base_dir``.
+
+    Members of archives under ``base_dir`` are stat-ed through ``archives`` when it is given; members
+    of an archive that cannot be read are treated as gone.
+    """
+    if not path.is_relative_to(base_dir):
+        return None
+    try:
+        return stat_path(path, archives)
+    except (FileNotFoundError, NotADirectoryError, UnreadableArchiveError):
+        return None
+
+
+def _is_expected_kind(
+    path: Path, stat_result: FileStat, expect_directory: bool, archives: ArchiveHandlePool | None
+) -> bool:
+    if not expect_directory:
+        return stat.S_ISREG(stat_result.st_mode)
+    # Archive files are browsed as directories of their members.
+    return stat.S_ISDIR(stat_result.st_mode) or (
+        archives is not None and stat.S_ISREG(stat_result.st_mode) and path.suffix.lower() in ARCHIVE_EXTENSIONS
+    )
+
+
+class _RegistryBase(abc.ABC):
+    """Shared ``resolve``/``resolve_with_stat`` for registries that only differ in how an ID maps to a path."""
+
+    _archives: ArchiveHandlePool | None
+
+    @abc.abstractmethod
+    def _lookup(self, resource_id: str, base_dir: Path) -> Path | None:
+        """Return the resolved path ``resource_id`` stands for, without touching the filesystem."""
+
+    @abc.abstractmethod
+    def discard_many(self, paths: list[Path]) -> None: ...
+
+    def discard(self, path: Path) -> None:
+        self.discard_many([path])
+
+    def resolve(self, resource_id: str, *, base_dir: Path, expect_directory: bool) -> Path | None:
+        resolved = self.resolve_with_stat(resource_id, base_dir=base_dir, expect_directory=expect_directory)
+        return None if resolved is None else resolved[0]
+
+    def resolve_with_stat(
+        self, resource_id: str, *, base_dir: Path, expect_directory: bool
+    ) -> tuple[Path, FileStat] | None:
+        path = self._lookup(resource_id, base_dir)
+        if path is None:
+            return None
+        stat_result = _stat_within(path, base_dir, self._archives)
+        if stat_result is None:
+            # The file is gone, so its ID is forgotten.
+            self.discard(path)
+            return None
+        if not _is_expected_kind(path, stat_result, expect_directory, self._archives):
+            return None
+        return path, stat_result
+
+
+class ResourceRegistry(_RegistryBase):
+    """Thread-safe ID <-> path registry for directory_id/file_id resolution."""
+
+    def __init__(self, archives: ArchiveHandlePool | None = None) -> None:
+        self._archives = archives
+        self._id_to_path: dict[str, Path] = {}
+        self._path_to_id: dict[Path, str] = {}
+        self._lock = threading.Lock()
+
+    def register(self, path: Path) -> str:
+        resolved_path = path.resolve()
+        with self._lock:
+            return self._register_locked(resolved_path)
+
+    def register_many(self, paths: list[Path]) -> list[str]:
+        resolved_paths = resolve_many(paths)
+        with self._lock:
+            return [self._register_locked(path) for path in resolved_paths]
+
+    def _register_locked(self, resolved_path: Path) -> str:
+        resource_id = self._path_to_id.get(resolved_path)
+        if resource_id is None:
+            resource_id = uuid4().hex
+            self._path_to_id[resolved_path] = resource_id
+            self._id_to_path[resource_id] = resolved_path
+        return resource_id
+
+    def discard_many(self, paths: list[Path]) -> None:
+        resolved_paths = [path.resolve() for path in paths]
+        with self._lock:
+            for resolved_path in resolved_paths:
+                resource_id = self._path_to_id.pop(resolved_path, None)
+                if resource_id is not None:
+                    self._id_to_path.pop(resource_id, None)
+
+    def discard_tree(self, path: Path) -> None:
+        resolved_path = path.resolve()
+        with self._lock:
+            for candidate in [known for known in self._path_to_id if known.is_relative_to(resolved_path)]:
+                self._id_to_path.pop(self._path_to_id.pop(candidate), None)
+
+    def _lookup(self, resource_id: str, base_dir: Path) -> Path | None:
+        with self._lock:
+            return self._id_to_path.get(resource_id)
+
+    def __len__(self) -> int:
+        return len(self._id_to_path)
+
+
+class _Shard:
+    __slots__ = ("lock", "id_to_path", "path_to_id")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.id_to_path: dict[str, Path] = {}
+        self.path_to_id: dict[Path, str] = {}
+
+
+class ShardedResourceRegistry(_RegistryBase):
+    """``ResourceRegistry`` variant that stripes its tables across independently locked shards.
+
+    A path always lands in the shard selected by its hash, and the shard index is encoded
+    as the first two hex digits of the minted ID, so both directions of a lookup touch
+    exactly one shard lock.
+    """
+
+    def __init__(self, shards: int = 16, archives: ArchiveHandlePool | None = None) -> None:
+        if not 1 <= shards <= 256:
+            raise ValueError("shards must be between 1 and 256")
+        self._archives = archives
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def register(self, path: Path) -> str:
+        return self.register_many([path])[0]
+
+    def register_many(self, paths: list[Path]) -> list[str]:
+        resolved_paths = resolve_many(paths)
+        groups: dict[int, list[int]] = {}
+        for position, resolved_path in enumerate(resolved_paths):
+            groups.setdefault(self._shard_for_path(resolved_path), []).append(position)
+
+        resource_ids = [""] * len(resolved_paths)
+        for shard_index, positions in groups.items():
+            shard = self._shards[shard_index]
+            with shard.lock:
+                for position in positions:
+                    resolved_path = resolved_paths[position]
+                    resource_id = shard.path_to_id.get(resolved_path)
+                    if resource_id is None:
+                        resource_id = f"{shard_index:02x}{uuid4().hex}"
+                        shard.path_to_id[resolved_path] = resource_id
+                        shard.id_to_path[resource_id] = resolved_path
+                    resource_ids[position] = resource_id
+        return resource_ids
+
+    def discard_many(self, paths: list[Path]) -> None:
+        groups: dict[int, list[Path]] = {}
+        for path in paths:
+            resolved_path = path.resolve()
+            groups.setdefault(self._shard_for_path(resolved_path), []).append(resolved_path)
+
+        for shard_index, resolved_paths in groups.items():
+            shard = self._shards[shard_index]
+            with shard.lock:
+                for resolved_path in resolved_paths:
+                    resource_id = shard.path_to_id.pop(resolved_path, None)
+                    if resource_id is not None:
+                        shard.id_to_path.pop(resource_id, None)
+
+    def discard_tree(self, path: Path) -> None:
+        resolved_path = path.resolve()
+        for shard in self._shards:
+            with shard.lock:
+                for candidate in [known for known in shard.path_to_id if known.is_relative_to(resolved_path)]:
+                    shard.id_to_path.pop(shard.path_to_id.pop(candidate), None)
+
+    def _lookup(self, resource_id: str, base_dir: Path) -> Path | None:
+        try:
+            shard = self._shards[int(resource_id[:2], 16)]
+        except (ValueError, IndexError):
+            return None
+        with shard.lock:
+            return shard.id_to_path.get(resource_id)
+
+    def __len__(self) -> int:
+        return sum(len(shard.id_to_path) for shard in self._shards)
+
+    def _shard_for_path(self, resolved_path: Path) -> int:
+        return hash(resolved_path) % len(self._shards)
+
+
+class SqliteResourceRegistry(_RegistryBase):
+    """``ResourceRegistry`` backed by a SQLite table so IDs are shared by every worker process.
+
+    Paths are stored as ``os.fsencode`` bytes so names that are not valid UTF-8 survive the
+    round trip. Concurrent writers from several processes are serialised by SQLite (WAL mode).
+    """
+
+    def __init__(self, db_path: Path, archives: ArchiveHandlePool | None = None) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._archives = archives
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS resources (id TEXT PRIMARY KEY, path BLOB NOT NULL UNIQUE)"
+        )
+
+    def register(self, path: Path) -> str:
+        return self.register_many([path])[0]
+
+    def register_many(self, paths: list[Path]) -> list[str]:
+        encoded_paths = [os.fsencode(path) for path in resolve_many(paths)]
+        if not encoded_paths:
+            return []
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO resources (id, path) VALUES (?, ?)",
+                    [(uuid4().hex, encoded_path) for encoded_path in encoded_paths],
+                )
+                resource_ids = [
+                    self._connection.execute("SELECT id FROM resources WHERE path = ?", (encoded_path,)).fetchone()[0]
+                    for encoded_path in encoded_paths
+                ]
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        return resource_ids
+
+    def discard_many(self, paths: list[Path]) -> None:
+        encoded_paths = [(os.fsencode(path.resolve()),) for path in paths]
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.executemany("DELETE FROM resources WHERE path = ?", encoded_paths)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def discard_tree(self, path: Path) -> None:
+        encoded_path = os.fsencode(path.resolve())
+        with self._lock:
+            # Children sort between "<path>/" and "<path>0", the byte right after "/".
+            self._connection.execute(
+                "DELETE FROM resources WHERE path = ? OR (path >= ? AND path < ?)",
+                (encoded_path, encoded_path + b"/", encoded_path + b"0"),
+            )
+
+    def _lookup(self, resource_id: str, base_dir: Path) -> Path | None:
+        with self._lock:
+            row = self._connection.execute("SELECT path FROM resources WHERE id = ?", (resource_id,)).fetchone()
+        return None if row is None else Path(os.fsdecode(row[0]))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM resources").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class SignedPathRegistry(_RegistryBase):
+    """Stateless registry whose IDs are HMAC-signed, base64url-encoded paths relative to ``base_dir``.
+
+    IDs need no in-memory table and stay valid across restarts as long as the secret is kept.
+    The signature stops clients from forging IDs, and ``resolve`` still rejects anything
+    that resolves outside ``base_dir``.
+    """
+
+    def __init__(self, base_dir: Path, secret: bytes, archives: ArchiveHandlePool | None = None) -> None:
+        self.base_dir = base_dir
+        self._secret = secret
+        self._archives = archives
+
+    def register(self, path: Path) -> str:
+        return self._encode(path.resolve())
+
+    def register_many(self, paths: list[Path]) -> list[str]:
+        return [self._encode(path) for path in resolve_many(paths)]
+
+    def discard_many(self, paths: list[Path]) -> None:
+        return None
+
+    def discard_tree(self, path: Path) -> None:
+        return None
+
+    def _lookup(self, resource_id: str, base_dir: Path) -> Path | None:
+        encoded_path, _, encoded_signature = resource_id.partition(".")
+        try:
+            relative = _b64decode(encoded_path)
+            signature = _b64decode(encoded_signature)
+        except ValueError:
+            return None
+        if not hmac.compare_digest(signature, self._sign(relative)):
+            return None
+        return (base_dir / os.fsdecode(relative)).resolve()
+
+    def __len__(self) -> int:
+        return 0
+
+    def _encode(self, resolved_path: Path) -> str:
+        encoded = os.fsencode(os.path.relpath(resolved_path, self.base_dir))
+        return f"{_b64encode(encoded)}.{_b64encode(self._sign(encoded))}"
+
+    def _sign(self, encoded_path: bytes) -> bytes:
+        return hmac.new(self._secret, encoded_path, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+
+def load_or_create_secret(path: Path) -> bytes:
+    """Read the ID signing secret from ``path``, creating it with owner-only permissions if missing."""
+    if path.exists():
+        return path.read_bytes()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as secret_file:
+            secret_file.write(secrets.token_bytes(ID_SECRET_BYTES))
+        # Linking publishes the complete file atomically and loses gracefully to a concurrent creator.
+        os.link(temp_name, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(temp_name)
+    return path.read_bytes()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    try:
+        return base64.b64decode(data + "=" * (-len(data) % 4), altchars=b"-_", validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise ValueError("malformed identifier") from exc
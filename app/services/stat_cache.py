@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from app.repositories.archives import FileStat
+
+DEFAULT_STAT_CACHE_ENTRIES = 65536
+
+
+class StatCache:
+    """Short-lived memo of ``file_id -> (path, stat_result)``.
+
+    Within ``ttl`` seconds a repeated request for the same image, typically a 304
+    revalidation, is answered without touching the filesystem. Changes made outside
+    the application become visible once the entry expires.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        *,
+        max_entries: int = DEFAULT_STAT_CACHE_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[float, Path, FileStat]] = {}
+        self._ids_by_path: dict[Path, set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, resource_id: str) -> tuple[Path, FileStat] | None:
+        with self._lock:
+            entry = self._entries.get(resource_id)
+            if entry is not None and entry[0] <= self._clock():
+                self._remove_locked(resource_id)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, resource_id: str, path: Path, stat_result: FileStat) -> None:
+        with self._lock:
+            self._remove_locked(resource_id)
+            if len(self._entries) >= self.max_entries:
+                self._remove_locked(next(iter(self._entries)))
+            self._entries[resource_id] = (self._clock() + self.ttl, path, stat_result)
+            self._ids_by_path.setdefault(path, set()).add(resource_id)
+
+    def discard(self, resource_id: str) -> None:
+        with self._lock:
+            self._remove_locked(resource_id)
+
+    def discard_path(self, path: Path) -> None:
+        """Forget every entry for ``path``, e.g. when a watcher reports it deleted or replaced."""
+        with self._lock:
+            for resource_id in list(self._ids_by_path.get(path, ())):
+                self._remove_locked(resource_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._ids_by_path.clear()
+
+    def _remove_locked(self, resource_id: str) -> None:
+        entry = self._entries.pop(resource_id, None)
+        if entry is None:
+            return
+        ids = self._ids_by_path[entry[1]]
+        ids.discard(resource_id)
+        if not ids:
+            del self._ids_by_path[entry[1]]
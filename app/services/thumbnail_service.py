@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import mimetypes
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from PIL import Image, UnidentifiedImageError
+
+from app.repositories.archives import ArchiveHandlePool, FileStat
+from app.repositories.derived_cache import DerivedImageCache
+from app.services.generation_scheduler import GenerationScheduler
+from app.services.image_service import (
+    ImageService,
+    ResourceNotFoundError,
+    ServiceError,
+    UnsupportedMediaTypeError,
+)
+from app.services.io_executor import IoExecutor
+from app.services.imaging import (
+    OUTPUT_FORMATS,
+    configure_decoder,
+    oriented_dimensions,
+    pyramid_level_size,
+    pyramid_max_level,
+    render_contact_sheet,
+    render_display,
+    render_thumbnail,
+    render_tile_level,
+)
+
+THUMBNAIL_SIZES = (128, 256, 384, 512)
+DISPLAY_SIZES = (640, 960, 1280, 1600, 1920, 2560, 3200, 3840)
+PASSTHROUGH_EXTENSIONS = {".svg"}
+# Animated formats would lose every frame but the first when re-encoded.
+DISPLAY_PASSTHROUGH_EXTENSIONS = PASSTHROUGH_EXTENSIONS | {".gif"}
+# Lossless or uncompressed source formats that shrink a lot when re-encoded at full size.
+TRANSCODE_EXTENSIONS = {".png", ".bmp"}
+TILE_SIZE = 512
+
+# Each generation worker process reads archive members through its own handles.
+_worker_archives: ArchiveHandlePool | None = None
+
+
+def snap_thumbnail_size(size: int) -> int:
+    for bucket in THUMBNAIL_SIZES:
+        if size <= bucket:
+            return bucket
+    return THUMBNAIL_SIZES[-1]
+
+
+def snap_display_size(size: int) -> int:
+    for bucket in DISPLAY_SIZES:
+        if size <= bucket:
+            return bucket
+    return DISPLAY_SIZES[-1]
+
+
+def init_generation_worker(max_image_pixels: int, archive_handles: int) -> None:
+    """Initializer for generation worker processes."""
+    global _worker_archives
+    configure_decoder(max_image_pixels)
+    _worker_archives = ArchiveHandlePool(archive_handles)
+
+
+def generate_thumbnail(
+    cache: DerivedImageCache, key: str, suffix: str, source: Path, size: int, image_format: str
+) -> None:
+    """Worker entry point: render a thumbnail and store it in the derivative cache."""
+    cache.store(key, suffix, render_thumbnail(source, size, image_format, archives=_worker_archives))
+
+
+def generate_display_image(
+    cache: DerivedImageCache,
+    key: str,
+    suffix: str,
+    source: Path,
+    max_width: int | None,
+    max_height: int | None,
+    image_format: str,
+) -> None:
+    """Worker entry point: render a display-size variant and store it in the derivative cache."""
+    cache.store(key, suffix, render_display(source, max_width, max_height, image_format, archives=_worker_archives))
+
+
+def tile_variant(level: int, column: int, row: int, image_format: str) -> str:
+    return f"tile-{TILE_SIZE}-{level}-{column}_{row}-{image_format}"
+
+
+def generate_tile_level(
+    cache: DerivedImageCache,
+    key: str,
+    suffix: str,
+    source: Path,
+    source_stat: FileStat,
+    level: int,
+    image_format: str,
+) -> None:
+    """Worker entry point: render every tile of a pyramid level and store each in the derivative cache."""
+    tiles = render_tile_level(source, level, TILE_SIZE, image_format, archives=_worker_archives)
+    for column, row, data in tiles:
+        cache.store(cache.build_key(source, source_stat, tile_variant(level, column, row, image_format)), suffix, data)
+
+
+def generate_contact_sheet(
+    cache: DerivedImageCache,
+    key: str,
+    suffix: str,
+    directory: Path,
+    sources: list[Path],
+    cell_size: int,
+    image_format: str,
+) -> None:
+    """Worker entry point: compose a directory's first images into a sprite and store it."""
+    cache.store(key, suffix, render_contact_sheet(sources, cell_size, image_format, archives=_worker_archives))
+
+
+@dataclass(frozen=True)
+class Derivative:
+    path: Path
+    media_type: str
+    stat_result: FileStat
+    source_stat: FileStat
+    variant: str
+
+
+@dataclass
+class ThumbnailService:
+    image_service: ImageService
+    cache: DerivedImageCache
+    scheduler: GenerationScheduler
+    io: IoExecutor
+    archives: ArchiveHandlePool | None = None
+
+    async def get_thumbnail(self, file_id: str, size: int, image_format: str) -> Derivative:
+        source, source_stat = await self.io.run(self._stat_source, file_id)
+
+        if source.suffix.lower() in PASSTHROUGH_EXTENSIONS:
+            return self._original(source, source_stat)
+
+        size = snap_thumbnail_size(size)
+        return await self._derive(
+            source, source_stat, f"thumbnail-{size}-{image_format}", image_format, generate_thumbnail, size
+        )
+
+    async def get_display_image(
+        self, file_id: str, width: int | None, height: int | None, image_format: str
+    ) -> Derivative:
+        """Return ``file_id`` downscaled to fit the snapped ``width``/``height`` box.
+
+        Sources that already fit are served as-is rather than re-encoded.
+        """
+        source, source_stat = await self.io.run(self._stat_source, file_id)
+
+        if source.suffix.lower() in DISPLAY_PASSTHROUGH_EXTENSIONS:
+            return self._original(source, source_stat)
+
+        max_width = snap_display_size(width) if width is not None else None
+        max_height = snap_display_size(height) if height is not None else None
+        variant = f"display-{max_width or 0}x{max_height or 0}-{image_format}"
+        cached = await self._lookup(source, source_stat, variant, image_format)
+        if cached is not None:
+            return cached
+
+        source_width, source_height = await self._oriented_dimensions(source)
+        if source_width <= (max_width or source_width) and source_height <= (max_height or source_height):
+            return self._original(source, source_stat)
+
+        return await self._derive(
+            source, source_stat, variant, image_format, generate_display_image, max_width, max_height, looked_up=True
+        )
+
+    async def get_transcoded(self, source: Path, source_stat: FileStat, image_format: str) -> Derivative | None:
+        """Return ``source`` re-encoded as ``image_format`` at its original size.
+
+        ``None`` means the original should be served because the transcode did not come out smaller.
+        """
+        derivative = await self._derive(
+            source, source_stat, f"transcode-{image_format}", image_format, generate_display_image, None, None
+        )
+        if derivative.stat_result.st_size >= source_stat.st_size:
+            return None
+        return derivative
+
+    async def get_contact_sheet(self, directory_id: str, count: int, size: int, image_format: str) -> Derivative:
+        """Return a sprite of the first ``count`` images of a directory in ``size`` pixel cells.
+
+        The sprite is keyed by the directory's own stat, so adding, removing or renaming
+        images produces a new one; an image rewritten in place is not noticed.
+        """
+        try:
+            directory, directory_stat = await self.io.run(self.image_service.resolve_directory_with_stat, directory_id)
+        except OSError as exc:
+            raise ServiceError from exc
+
+        size = snap_thumbnail_size(size)
+        variant = f"contact-sheet-{count}-{size}-{image_format}"
+        cached = await self._lookup(directory, directory_stat, variant, image_format)
+        if cached is not None:
+            return cached
+
+        try:
+            rows, _, _ = await self.io.run(self.image_service.list_image_rows, directory, limit=count)
+        except OSError as exc:
+            raise ServiceError from exc
+        if not rows:
+            raise ResourceNotFoundError
+        sources = [directory / name for _, name in rows]
+        return await self._derive(
+            directory, directory_stat, variant, image_format, generate_contact_sheet, sources, size, looked_up=True
+        )
+
+    async def get_tile_info(self, file_id: str) -> tuple[int, int, int]:
+        """Return the oriented width, height and top pyramid level of ``file_id``."""
+        source, _ = await self.io.run(self._stat_source, file_id)
+        if source.suffix.lower() in PASSTHROUGH_EXTENSIONS:
+            raise UnsupportedMediaTypeError
+        width, height = await self._oriented_dimensions(source)
+        return width, height, pyramid_max_level(width, height)
+
+    async def get_tile(self, file_id: str, level: int, column: int, row: int, image_format: str) -> Derivative:
+        """Return one ``TILE_SIZE`` tile of the deep-zoom pyramid of ``file_id``.
+
+        A miss renders the whole level in one worker job, so neighbouring tiles requested
+        while it runs share that job and are cache hits afterwards.
+        """
+        source, source_stat = await self.io.run(self._stat_source, file_id)
+        if source.suffix.lower() in PASSTHROUGH_EXTENSIONS:
+            raise UnsupportedMediaTypeError
+
+        variant = tile_variant(level, column, row, image_format)
+        cached = await self._lookup(source, source_stat, variant, image_format)
+        if cached is not None:
+            return cached
+
+        width, height = await self._oriented_dimensions(source)
+        if level > pyramid_max_level(width, height):
+            raise ResourceNotFoundError
+        level_width, level_height = pyramid_level_size(width, height, level)
+        if column * TILE_SIZE >= level_width or row * TILE_SIZE >= level_height:
+            raise ResourceNotFoundError
+
+        return await self._derive(
+            source,
+            source_stat,
+            variant,
+            image_format,
+            generate_tile_level,
+            source_stat,
+            level,
+            job_variant=f"tiles-{TILE_SIZE}-{level}-{image_format}",
+            looked_up=True,
+        )
+
+    async def _oriented_dimensions(self, source: Path) -> tuple[int, int]:
+        try:
+            return await self.io.run(oriented_dimensions, source, self.archives)
+        except (UnidentifiedImageError, Image.DecompressionBombError) as exc:
+            raise UnsupportedMediaTypeError from exc
+        except OSError as exc:
+            raise ServiceError from exc
+
+    def _original(self, source: Path, source_stat: FileStat) -> Derivative:
+        return Derivative(
+            path=source,
+            media_type=mimetypes.guess_type(source.name)[0] or "application/octet-stream",
+            stat_result=source_stat,
+            source_stat=source_stat,
+            variant="original",
+        )
+
+    async def _derive(
+        self,
+        source: Path,
+        source_stat: FileStat,
+        variant: str,
+        image_format: str,
+        generate: Callable[..., None],
+        *args: Any,
+        job_variant: str | None = None,
+        looked_up: bool = False,
+    ) -> Derivative:
+        """Return the cached ``variant`` of ``source``, generating it in the worker pool on a miss.
+
+        ``job_variant`` names a job that produces several variants at once; requests for
+        any of them are coalesced on it. ``looked_up`` means the caller already missed
+        ``variant`` in the cache, so the request is not looked up or counted again.
+        """
+        if not looked_up:
+            cached = await self._lookup(source, source_stat, variant, image_format)
+            if cached is not None:
+                return cached
+
+        _, suffix, _ = OUTPUT_FORMATS[image_format]
+        key = self.cache.build_key(source, source_stat, job_variant or variant)
+        try:
+            await self.scheduler.run(key, generate, self.cache, key, suffix, source, *args, image_format)
+        except (UnidentifiedImageError, Image.DecompressionBombError) as exc:
+            raise UnsupportedMediaTypeError from exc
+        except OSError as exc:
+            raise ServiceError from exc
+
+        generated = await self._lookup(source, source_stat, variant, image_format, count=False)
+        if generated is None:
+            raise ServiceError
+        return generated
+
+    async def _lookup(
+        self, source: Path, source_stat: FileStat, variant: str, image_format: str, *, count: bool = True
+    ) -> Derivative | None:
+        """Look ``variant`` up in the cache; each request counts one hit or miss, on its first lookup."""
+        _, suffix, media_type = OUTPUT_FORMATS[image_format]
+        key = self.cache.build_key(source, source_stat, variant)
+        cached = await self.io.run(self.cache.lookup, key, suffix, count=count)
+        if cached is None:
+            return None
+
+        path, stat_result = cached
+        return Derivative(
+            path=path,
+            media_type=media_type,
+            stat_result=stat_result,
+            source_stat=source_stat,
+            variant=variant,
+        )
+
+    def _stat_source(self, file_id: str) -> tuple[Path, FileStat]:
+        try:
+            return self.image_service.resolve_image_with_stat(file_id)
+        except OSError as exc:
+            raise ServiceError from exc
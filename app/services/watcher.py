@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import abc
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.repositories.archives import ARCHIVE_EXTENSIONS
+from app.repositories.directory_index import ENTRY_KIND_DIRECTORY, ENTRY_KIND_IMAGE, DirectoryIndex
+from app.repositories.filesystem import FileSystemRepository
+from app.services.registry import Registry
+from app.services.stat_cache import StatCache
+
+logger = logging.getLogger(__name__)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass
+class RegistryUpdater:
+    """Applies filesystem changes under ``base_dir`` to the registry, listing index and stat cache.
+
+    Index listings scanned since ``watching_since_ns`` have seen every later change reported,
+    so each change patches the single entry instead of forcing a rescan; older listings, and
+    those of directories the change cannot be classified for, are invalidated.
+    """
+
+    base_dir: Path
+    registry: Registry
+    index: DirectoryIndex | None = None
+    stat_cache: StatCache | None = None
+    watching_since_ns: int = field(default_factory=time.time_ns)
+
+    def added(self, path: Path, is_dir: bool) -> None:
+        if self._is_tracked(path, is_dir):
+            self.registry.register(path)
+            self._patch_index(path, ENTRY_KIND_DIRECTORY if is_dir else ENTRY_KIND_IMAGE)
+        else:
+            self._invalidate(path.parent)
+        # A file renamed over an existing one replaces it under the same path.
+        self._forget_stats(path, is_dir)
+
+    def changed(self, path: Path) -> None:
+        """A file was rewritten in place; its listing entry is unchanged but its stat is not."""
+        self._forget_stats(path, is_dir=False)
+
+    def removed(self, path: Path, is_dir: bool) -> None:
+        if is_dir:
+            self.registry.discard_tree(path)
+            self._invalidate(path)
+        elif path.suffix.lower() in ARCHIVE_EXTENSIONS:
+            # Members of an archive are registered below the archive's own path.
+            self.registry.discard_tree(path)
+        else:
+            self.registry.discard(path)
+        self._patch_index(path, None)
+        self._forget_stats(path, is_dir)
+
+    def overflowed(self) -> None:
+        """Some changes were lost, so no listing scanned so far can be patched any more."""
+        self.watching_since_ns = time.time_ns()
+        if self.stat_cache is not None:
+            self.stat_cache.clear()
+
+    def _is_tracked(self, path: Path, is_dir: bool) -> bool:
+        if is_dir:
+            return path.parent == self.base_dir
+        return path.parent.parent == self.base_dir and path.suffix.lower() in FileSystemRepository.IMAGE_EXTENSIONS
+
+    def _patch_index(self, path: Path, kind: str | None) -> None:
+        """Upsert ``path`` into its parent's listing as ``kind``, or remove it when ``kind`` is None."""
+        if self.index is None:
+            return
+        directory = path.parent
+        try:
+            mtime_ns = directory.stat().st_mtime_ns
+            if kind is None:
+                patched = self.index.remove(directory, path.name, mtime_ns, trusted_since_ns=self.watching_since_ns)
+            else:
+                patched = self.index.upsert(
+                    directory, path.name, kind, mtime_ns, trusted_since_ns=self.watching_since_ns
+                )
+        except (OSError, UnicodeEncodeError):
+            # The directory is gone, or the name cannot be stored as SQLite text.
+            patched = False
+        if not patched:
+            self.index.invalidate(directory)
+
+    def _invalidate(self, directory: Path) -> None:
+        if self.index is not None:
+            self.index.invalidate(directory)
+
+    def _forget_stats(self, path: Path, is_dir: bool) -> None:
+        if self.stat_cache is None:
+            return
+        if is_dir or path.suffix.lower() in ARCHIVE_EXTENSIONS:
+            # Entries below a directory or archive are not indexed by prefix; drop them all, as a rename does.
+            self.stat_cache.clear()
+        else:
+            self.stat_cache.discard_path(path)
+
+
+class _BackgroundWatcher(abc.ABC):
+    def __init__(self, base_dir: Path, updater: RegistryUpdater) -> None:
+        self.base_dir = base_dir
+        self.updater = updater
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+
+    @abc.abstractmethod
+    def _run(self) -> None: ...
+
+
+class InotifyWatcher(_BackgroundWatcher):
+    """Watches ``base_dir`` and its immediate subdirectories through Linux inotify."""
+
+    def __init__(self, base_dir: Path, updater: RegistryUpdater) -> None:
+        super().__init__(base_dir, updater)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: dict[int, Path] = {}
+        self._add_watch(base_dir)
+        with os.scandir(base_dir) as iterator:
+            for entry in iterator:
+                if entry.is_dir():
+                    self._add_watch(Path(entry.path))
+
+    def _add_watch(self, directory: Path) -> None:
+        descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if descriptor < 0:
+            logger.warning("Cannot watch %s: %s", directory, os.strerror(ctypes.get_errno()))
+            return
+        self._directories[descriptor] = directory
+
+    def _forget_watch(self, directory: Path) -> None:
+        for descriptor, watched in list(self._directories.items()):
+            if watched == directory:
+                del self._directories[descriptor]
+
+    def _run(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                readable, _, _ = select.select([self._fd], [], [], 0.5)
+                if readable:
+                    self._dispatch(os.read(self._fd, 64 * 1024))
+        finally:
+            os.close(self._fd)
+
+    def _dispatch(self, buffer: bytes) -> None:
+        offset = 0
+        while offset < len(buffer):
+            descriptor, mask, _cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+            raw_name = buffer[offset + EVENT_HEADER.size : offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("inotify queue overflowed; falling back to lazy discovery")
+                self.updater.overflowed()
+                continue
+            if mask & IN_IGNORED:
+                self._directories.pop(descriptor, None)
+                continue
+
+            directory = self._directories.get(descriptor)
+            if directory is None or not raw_name:
+                continue
+            path = directory / os.fsdecode(raw_name)
+            try:
+                self._apply(mask, directory, path)
+            except Exception:
+                # One failing event must not stop the watcher thread; later events still apply.
+                logger.exception("Handling the change to %s failed", path)
+
+    def _apply(self, mask: int, directory: Path, path: Path) -> None:
+        is_dir = bool(mask & IN_ISDIR)
+        # A rename arrives as IN_MOVED_FROM followed by IN_MOVED_TO, which maps onto remove + add.
+        if mask & (IN_CREATE | IN_MOVED_TO):
+            if is_dir and directory == self.base_dir:
+                self._add_watch(path)
+            self.updater.added(path, is_dir)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            if is_dir and directory == self.base_dir:
+                self._forget_watch(path)
+            self.updater.removed(path, is_dir)
+        elif mask & IN_CLOSE_WRITE:
+            self.updater.changed(path)
+
+
+class PollingWatcher(_BackgroundWatcher):
+    """Portable fallback that diffs directory snapshots whenever a directory mtime changes."""
+
+    def __init__(self, base_dir: Path, updater: RegistryUpdater, *, interval: float = 2.0) -> None:
+        super().__init__(base_dir, updater)
+        self.interval = interval
+        self._mtimes: dict[Path, int] = {}
+        self._entries: dict[Path, dict[str, bool]] = {}
+        self._poll(notify=False)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self._poll(notify=True)
+            except Exception:
+                logger.exception("Polling %s failed", self.base_dir)
+
+    def _poll(self, *, notify: bool) -> None:
+        subdirectories = [name for name, is_dir in self._scan_if_changed(self.base_dir, notify).items() if is_dir]
+        for name in subdirectories:
+            self._scan_if_changed(self.base_dir / name, notify)
+        for directory in [path for path in self._entries if path != self.base_dir]:
+            if directory.name not in subdirectories:
+                self._mtimes.pop(directory, None)
+                self._entries.pop(directory, None)
+
+    def _scan_if_changed(self, directory: Path, notify: bool) -> dict[str, bool]:
+        try:
+            mtime_ns = directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if self._mtimes.get(directory) == mtime_ns:
+            return self._entries[directory]
+
+        with os.scandir(directory) as iterator:
+            current = {entry.name: entry.is_dir() for entry in iterator}
+        previous = self._entries.get(directory, {})
+        if notify:
+            for name in previous.keys() - current.keys():
+                self.updater.removed(directory / name, previous[name])
+            for name in current.keys() - previous.keys():
+                self.updater.added(directory / name, current[name])
+
+        self._mtimes[directory] = mtime_ns
+        self._entries[directory] = current
+        return current
+
+
+def create_watcher(base_dir: Path, updater: RegistryUpdater) -> InotifyWatcher | PollingWatcher:
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(base_dir, updater)
+        except (OSError, AttributeError):
+            logger.warning("inotify is unavailable; using the polling watcher")
+    return PollingWatcher(base_dir, updater)
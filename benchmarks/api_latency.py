@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Throughput and latency percentiles for the API hot paths against a synthetic tree.
+
+Starts ``app.py`` on a generated (or given) image root and drives, at a fixed
+concurrency, the listing endpoints and ``GET /api/image/{id}`` in three states:
+``cold`` (first request for each file), ``warm`` (repeat request) and ``304``
+(revalidation with ``If-None-Match``). One JSON line is printed per scenario so
+runs can be diffed or collected by CI. Arguments after ``--`` are passed to the
+server, e.g. to compare ``--memory-cache-mb`` or ``--workers`` settings.
+
+    python benchmarks/api_latency.py --directories 1000 --files 10000 --concurrency 64
+    python benchmarks/api_latency.py --root /data/bench-root -- --memory-cache-mb 512
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_tree import build_tree  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(root: Path, cache_dir: Path, server_args: Sequence[str]) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "app.py",
+            str(root),
+            "--cache-dir",
+            str(cache_dir),
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            *server_args,
+        ],
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/api/subdirectories", timeout=30).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("server did not become ready in time")
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(
+    client: httpx.Client,
+    concurrency: int,
+    requests: Sequence[tuple[str, dict[str, str]]],
+    expected_status: int,
+    *,
+    on_response: Callable[[str, httpx.Response], None] | None = None,
+) -> dict[str, float]:
+    def send(request: tuple[str, dict[str, str]]) -> tuple[float, bool]:
+        url, headers = request
+        started = time.perf_counter()
+        try:
+            response = client.get(url, headers=headers)
+            response.read()
+        except httpx.HTTPError:
+            return time.perf_counter() - started, False
+        elapsed = time.perf_counter() - started
+        if on_response is not None:
+            on_response(url, response)
+        return elapsed, response.status_code == expected_status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, requests))
+    seconds = time.perf_counter() - started
+
+    latencies = sorted(elapsed for elapsed, _ in results)
+    return {
+        "requests": len(results),
+        "errors": sum(1 for _, ok in results if not ok),
+        "seconds": seconds,
+        "requests_per_second": len(results) / seconds if seconds else 0.0,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+    }
+
+
+def run(base_url: str, args: argparse.Namespace) -> list[dict[str, object]]:
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    with httpx.Client(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+        directory_ids = [entry["directory_id"] for entry in subdirectories]
+        sampled_directories = [rng.choice(directory_ids) for _ in range(args.requests)]
+
+        file_ids: list[str] = []
+        for directory_id in rng.sample(directory_ids, k=min(len(directory_ids), args.image_directories)):
+            images = client.get(f"/api/images/{directory_id}").json()["images"]
+            file_ids.extend(entry["file_id"] for entry in images)
+        rng.shuffle(file_ids)
+        file_ids = file_ids[: args.requests]
+        etags: dict[str, str] = {}
+
+        def remember_etag(url: str, response: httpx.Response) -> None:
+            if "etag" in response.headers:
+                etags[url] = response.headers["etag"]
+
+        image_urls = [f"/api/image/{file_id}" for file_id in file_ids]
+        scenarios: list[tuple[str, list[tuple[str, dict[str, str]]], int, Callable | None]] = [
+            ("subdirectories", [("/api/subdirectories", {})] * args.requests, 200, None),
+            ("images", [(f"/api/images/{directory_id}", {}) for directory_id in sampled_directories], 200, None),
+            ("image-cold", [(url, {}) for url in image_urls], 200, remember_etag),
+            ("image-warm", [(url, {}) for url in image_urls], 200, None),
+        ]
+        results = []
+        for name, requests, expected_status, on_response in scenarios:
+            result = run_scenario(client, args.concurrency, requests, expected_status, on_response=on_response)
+            results.append({"scenario": name, "concurrency": args.concurrency, **result})
+        revalidations = [(url, {"If-None-Match": etags[url]}) for url in image_urls if url in etags]
+        result = run_scenario(client, args.concurrency, revalidations, 304)
+        results.append({"scenario": "image-304", "concurrency": args.concurrency, **result})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, help="Existing image root; a synthetic tree is generated when omitted")
+    parser.add_argument("--directories", type=int, default=100)
+    parser.add_argument("--files", type=int, default=1000, help="Files per directory")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario")
+    parser.add_argument(
+        "--image-directories", type=int, default=8, help="Directories whose files feed the image scenarios"
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("server_args", nargs=argparse.REMAINDER, help="Extra app.py arguments after --")
+    args = parser.parse_args()
+    server_args = args.server_args[1:] if args.server_args[:1] == ["--"] else args.server_args
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = Path(temp_dir)
+        root = args.root
+        if root is None:
+            root = work_dir / "image_root"
+            build_tree(root, args.directories, args.files, seed=args.seed)
+        process, base_url = start_server(root.resolve(), work_dir / "cache", server_args)
+        try:
+            for result in run(base_url, args):
+                print(json.dumps({**result, "server_args": server_args}), flush=True)
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
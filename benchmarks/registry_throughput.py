@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Micro-benchmark of registry throughput under concurrent listing and image lookups.
+
+Each worker thread alternates between registering a directory listing with
+``register_many`` and resolving individual file IDs, mimicking concurrent
+``GET /api/images/{id}`` and ``GET /api/image/{id}`` traffic. Results are
+printed as JSON lines.
+
+    python benchmarks/registry_throughput.py --threads 32 --files 2000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.registry import ResourceRegistry, ShardedResourceRegistry  # noqa: E402
+
+
+def build_tree(root: Path, directories: int, files: int) -> list[list[Path]]:
+    listings = []
+    for directory_index in range(directories):
+        directory = root / f"dir{directory_index:04d}"
+        directory.mkdir()
+        paths = [directory / f"img{file_index:06d}.png" for file_index in range(files)]
+        for path in paths:
+            path.touch()
+        listings.append(paths)
+    return listings
+
+
+def run(registry, base_dir: Path, listings: list[list[Path]], threads: int, duration: float) -> dict[str, float]:
+    counts = [0] * threads
+    stop = threading.Event()
+
+    def worker(slot: int) -> None:
+        rng = random.Random(slot)
+        while not stop.is_set():
+            listing = rng.choice(listings)
+            file_ids = registry.register_many(listing)
+            counts[slot] += len(file_ids)
+            for file_id in rng.sample(file_ids, k=min(32, len(file_ids))):
+                registry.resolve(file_id, base_dir=base_dir, expect_directory=False)
+                counts[slot] += 1
+
+    workers = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {"operations": sum(counts), "seconds": elapsed, "ops_per_second": sum(counts) / elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--directories", type=int, default=8)
+    parser.add_argument("--files", type=int, default=2000, help="Files per directory")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per registry variant")
+    parser.add_argument("--shards", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir).resolve()
+        listings = build_tree(base_dir, args.directories, args.files)
+        variants = {
+            "single-lock": ResourceRegistry(),
+            f"sharded-{args.shards}": ShardedResourceRegistry(args.shards),
+        }
+        for name, registry in variants.items():
+            result = run(registry, base_dir, listings, args.threads, args.duration)
+            print(json.dumps({"registry": name, "threads": args.threads, **result}))
+
+
+if __name__ == "__main__":
+    main()
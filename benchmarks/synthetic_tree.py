@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Generate a synthetic image root for benchmarks.
+
+A handful of template images in mixed formats and sizes are rendered once and then
+hard-linked (or copied where links are unsupported) into ``directories`` folders of
+``files`` entries each, so trees with millions of entries are cheap to build. Linked
+entries share page-cache pages; pass ``--copy`` when cold reads must hit the disk.
+
+    python benchmarks/synthetic_tree.py /tmp/bench-root --directories 1000 --files 10000
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import time
+from pathlib import Path
+
+from PIL import Image
+
+# (suffix, Pillow format, width, height); the mix covers thumbnails through camera-sized originals.
+TEMPLATES = (
+    (".jpg", "JPEG", 640, 480),
+    (".jpg", "JPEG", 1920, 1080),
+    (".jpg", "JPEG", 4000, 3000),
+    (".png", "PNG", 256, 256),
+    (".png", "PNG", 1280, 960),
+    (".webp", "WEBP", 1600, 1200),
+    (".gif", "GIF", 320, 240),
+)
+
+
+def _render_template(fmt: str, width: int, height: int) -> bytes:
+    # A noisy gradient keeps encoders from collapsing the image to a few hundred bytes.
+    noise = Image.effect_noise((width, height), 48).convert("RGB")
+    image = Image.blend(Image.linear_gradient("L").resize((width, height)).convert("RGB"), noise, 0.5)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def _place(template: Path, destination: Path, copy: bool) -> None:
+    if not copy:
+        try:
+            os.link(template, destination)
+            return
+        except OSError:
+            pass
+    shutil.copyfile(template, destination)
+
+
+def build_tree(root: Path, directories: int, files: int, *, seed: int = 0, copy: bool = False) -> dict[str, int]:
+    """Populate ``root`` and return a summary of what was written."""
+    root.mkdir(parents=True, exist_ok=True)
+    template_dir = root.parent / f".{root.name}-templates"
+    template_dir.mkdir(exist_ok=True)
+    templates: list[tuple[str, Path, int]] = []
+    for index, (suffix, fmt, width, height) in enumerate(TEMPLATES):
+        path = template_dir / f"template{index}{suffix}"
+        if not path.exists():
+            path.write_bytes(_render_template(fmt, width, height))
+        templates.append((suffix, path, path.stat().st_size))
+
+    rng = random.Random(seed)
+    total_bytes = 0
+    for directory_index in range(directories):
+        directory = root / f"dir{directory_index:05d}"
+        directory.mkdir(exist_ok=True)
+        for file_index in range(files):
+            suffix, template, size = rng.choice(templates)
+            destination = directory / f"img{file_index:06d}{suffix}"
+            if not destination.exists():
+                _place(template, destination, copy)
+            total_bytes += size
+    return {"directories": directories, "files": directories * files, "logical_bytes": total_bytes}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--directories", type=int, default=100)
+    parser.add_argument("--files", type=int, default=1000, help="Files per directory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--copy", action="store_true", help="Copy files instead of hard-linking them")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    summary = build_tree(args.root.resolve(), args.directories, args.files, seed=args.seed, copy=args.copy)
+    print(json.dumps({"root": str(args.root), **summary, "seconds": time.perf_counter() - started}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+// Writes .br and .gz siblings for the built bundle so the server can send them as-is, plus a manifest
+// recording the SHA-256 of each compressed source; the server only uses siblings whose source still matches.
+import { createHash } from 'node:crypto'
+import { readdir, readFile, stat, writeFile } from 'node:fs/promises'
+import { extname, join, relative, sep } from 'node:path'
+import { brotliCompressSync, constants, gzipSync } from 'node:zlib'
+
+const OUT_DIR = new URL('../../static/home-app/', import.meta.url)
+const MANIFEST_NAME = 'precompressed.json'
+const COMPRESSIBLE_EXTENSIONS = new Set(['.css', '.html', '.js', '.json', '.svg'])
+const MIN_COMPRESS_BYTES = 1024
+
+async function* walk(directory) {
+  for (const entry of await readdir(directory, { withFileTypes: true })) {
+    const path = join(directory, entry.name)
+    if (entry.isDirectory()) {
+      yield* walk(path)
+    } else if (entry.name !== MANIFEST_NAME && COMPRESSIBLE_EXTENSIONS.has(extname(entry.name))) {
+      yield path
+    }
+  }
+}
+
+const files = {}
+for await (const path of walk(OUT_DIR.pathname)) {
+  if ((await stat(path)).size < MIN_COMPRESS_BYTES) {
+    continue
+  }
+
+  const source = await readFile(path)
+  await writeFile(
+    `${path}.br`,
+    brotliCompressSync(source, { params: { [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY } })
+  )
+  await writeFile(`${path}.gz`, gzipSync(source, { level: 9 }))
+  files[relative(OUT_DIR.pathname, path).split(sep).join('/')] = {
+    sha256: createHash('sha256').update(source).digest('hex'),
+    encodings: ['br', 'gzip']
+  }
+}
+await writeFile(join(OUT_DIR.pathname, MANIFEST_NAME), `${JSON.stringify({ files }, null, 2)}\n`)
@@ -20,3 +20,17 @@ export async function putJson<T>(url: string, body: unknown): Promise<T> {
 
   return response.json() as Promise<T>
 }
+
+export async function postJson<T>(url: string, body: unknown): Promise<T> {
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body)
+  })
+
+  if (!response.ok) {
+    throw new Error(`HTTP ${response.status}`)
+  }
+
+  return response.json() as Promise<T>
+}
@@ -1,14 +1,23 @@
-import { fetchJson, putJson } from '../../../api/http'
-import type { DirectoryEntry, ImageEntry } from '../../../types/home'
+import { fetchJson, postJson, putJson } from '../../../api/http'
+import type { DirectoryEntry, DirectoryPreview } from '../../../types/home'
 
 export async function fetchSubdirectories(): Promise<DirectoryEntry[]> {
   const data = await fetchJson<{ subdirectories: DirectoryEntry[] }>('/api/subdirectories')
   return data.subdirectories
 }
 
-export async function fetchDirectoryImages(directoryId: string): Promise<ImageEntry[]> {
-  const data = await fetchJson<{ images: ImageEntry[] }>(`/api/images/${encodeURIComponent(directoryId)}`)
-  return data.images
+// With `contactSheetSize`, each preview also maps its images onto one sprite with cells of about that size.
+export async function fetchDirectoryPreviews(
+  directoryIds: string[],
+  limit: number,
+  contactSheetSize: number | null = null
+): Promise<DirectoryPreview[]> {
+  const data = await postJson<{ previews: DirectoryPreview[] }>('/api/subdirectories/previews', {
+    directory_ids: directoryIds,
+    limit,
+    contact_sheet_size: contactSheetSize
+  })
+  return data.previews
 }
 
 export async function renameSubdirectory(directoryId: string, newName: string): Promise<void> {
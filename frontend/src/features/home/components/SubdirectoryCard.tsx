@@ -1,7 +1,26 @@
 import { useCallback, useMemo, useState } from 'react'
+import type { CSSProperties } from 'react'
 
 import { renameSubdirectory } from '../api/homeApi'
-import type { DirectoryEntry, ThumbnailState } from '../../../types/home'
+import { THUMBNAIL_CSS_SIZE } from '../hooks/useSubdirectoryThumbnails'
+import type { ContactSheet, ContactSheetCell, DirectoryEntry, ThumbnailState } from '../../../types/home'
+
+function thumbnailUrl(fileId: string): string {
+  const size = Math.ceil(THUMBNAIL_CSS_SIZE * (window.devicePixelRatio || 1))
+  return `/api/thumbnail/${encodeURIComponent(fileId)}?size=${size}`
+}
+
+// Draws one cell of the directory sprite scaled to the thumbnail slot, so a card costs a single request.
+function spriteCellStyle(sheet: ContactSheet, cell: ContactSheetCell): CSSProperties {
+  const scale = THUMBNAIL_CSS_SIZE / sheet.cell_size
+  const sheetWidth = Math.max(...sheet.cells.map((entry) => entry.x + entry.width))
+  const sheetHeight = Math.max(...sheet.cells.map((entry) => entry.y + entry.height))
+  return {
+    backgroundImage: `url("${sheet.url}")`,
+    backgroundSize: `${sheetWidth * scale}px ${sheetHeight * scale}px`,
+    backgroundPosition: `${-cell.x * scale}px ${-cell.y * scale}px`
+  }
+}
 
 type SubdirectoryCardProps = {
   subdirectory: DirectoryEntry
@@ -24,13 +43,41 @@ export function SubdirectoryCard(props: SubdirectoryCardProps) {
       return <p className="subdir-no-images">画像なし</p>
     }
 
+    const { contactSheet } = thumbnailState
+    if (contactSheet) {
+      const cells = new Map(contactSheet.cells.map((cell) => [cell.file_id, cell]))
+      return thumbnailState.images.map((image) => {
+        const cell = cells.get(image.file_id)
+        return (
+          <div key={image.file_id} className="subdir-thumb-slot">
+            {cell ? (
+              <div
+                className="subdir-thumb subdir-thumb-sprite"
+                role="img"
+                aria-label={`${subdirectory.name} のサムネイル ${image.name}`}
+                style={spriteCellStyle(contactSheet, cell)}
+              />
+            ) : (
+              <img
+                className="subdir-thumb"
+                loading="lazy"
+                decoding="async"
+                src={thumbnailUrl(image.file_id)}
+                alt={`${subdirectory.name} のサムネイル ${image.name}`}
+              />
+            )}
+          </div>
+        )
+      })
+    }
+
     return thumbnailState.images.map((image) => (
       <div key={image.file_id} className="subdir-thumb-slot">
         <img
           className="subdir-thumb"
           loading="lazy"
           decoding="async"
-          src={`/api/image/${encodeURIComponent(image.file_id)}`}
+          src={thumbnailUrl(image.file_id)}
           alt={`${subdirectory.name} のサムネイル ${image.name}`}
         />
       </div>
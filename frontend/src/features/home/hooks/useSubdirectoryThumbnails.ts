@@ -1,7 +1,13 @@
 import { useCallback, useEffect, useRef, useState } from 'react'
 
-import { fetchDirectoryImages } from '../api/homeApi'
-import type { DirectoryEntry, ThumbnailState } from '../../../types/home'
+import { fetchDirectoryPreviews } from '../api/homeApi'
+import type { DirectoryEntry, DirectoryPreview, ThumbnailState } from '../../../types/home'
+
+const THUMBNAIL_COUNT = 5
+// Matches the 168px .subdir-thumb slots; the server snaps the cell size to its thumbnail buckets.
+export const THUMBNAIL_CSS_SIZE = 168
+const PREVIEW_BATCH_SIZE = 100
+const PREVIEW_BATCH_DELAY_MS = 50
 
 type UseSubdirectoryThumbnailsResult = {
   thumbnails: Record<string, ThumbnailState>
@@ -15,75 +21,103 @@ export function useSubdirectoryThumbnails(
   const [thumbnails, setThumbnails] = useState<Record<string, ThumbnailState>>({})
   const cardElements = useRef<Record<string, HTMLAnchorElement | null>>({})
   const observerRef = useRef<IntersectionObserver | null>(null)
+  const requestedIds = useRef<Set<string>>(new Set())
+  const queuedIds = useRef<Set<string>>(new Set())
+  const flushTimer = useRef<number | null>(null)
 
   const resetThumbnails = useCallback(() => {
+    requestedIds.current = new Set()
+    queuedIds.current = new Set()
     setThumbnails({})
   }, [])
 
-  const loadThumbnails = useCallback(async (subdirectory: DirectoryEntry) => {
+  const loadThumbnails = useCallback(async (directoryIds: string[]) => {
     setThumbnails((current) => {
-      if (current[subdirectory.directory_id]?.loaded || current[subdirectory.directory_id]?.loading) {
-        return current
-      }
-
-      return {
-        ...current,
-        [subdirectory.directory_id]: { loading: true, loaded: false, images: [] }
-      }
+      const next = { ...current }
+      directoryIds.forEach((directoryId) => {
+        next[directoryId] = { loading: true, loaded: false, images: [], contactSheet: null }
+      })
+      return next
     })
 
+    let previews = new Map<string, DirectoryPreview>()
     try {
-      const images = await fetchDirectoryImages(subdirectory.directory_id)
-      setThumbnails((current) => ({
-        ...current,
-        [subdirectory.directory_id]: {
-          loading: false,
-          loaded: true,
-          images: images.slice(0, 5)
-        }
-      }))
+      const contactSheetSize = Math.ceil(THUMBNAIL_CSS_SIZE * (window.devicePixelRatio || 1))
+      const entries = await fetchDirectoryPreviews(directoryIds, THUMBNAIL_COUNT, contactSheetSize)
+      previews = new Map(entries.map((entry) => [entry.directory_id, entry]))
     } catch {
-      setThumbnails((current) => ({
-        ...current,
-        [subdirectory.directory_id]: {
+      // Fall through: every requested card is shown as having no images.
+    }
+
+    setThumbnails((current) => {
+      const next = { ...current }
+      directoryIds.forEach((directoryId) => {
+        const preview = previews.get(directoryId)
+        next[directoryId] = {
           loading: false,
           loaded: true,
-          images: []
+          images: preview?.images ?? [],
+          contactSheet: preview?.contact_sheet ?? null
         }
-      }))
-    }
+      })
+      return next
+    })
   }, [])
 
+  const flushQueue = useCallback(() => {
+    flushTimer.current = null
+    const directoryIds = Array.from(queuedIds.current)
+    queuedIds.current = new Set()
+
+    for (let start = 0; start < directoryIds.length; start += PREVIEW_BATCH_SIZE) {
+      void loadThumbnails(directoryIds.slice(start, start + PREVIEW_BATCH_SIZE))
+    }
+  }, [loadThumbnails])
+
+  const queueThumbnails = useCallback(
+    (directoryIds: string[]) => {
+      directoryIds.forEach((directoryId) => {
+        if (requestedIds.current.has(directoryId)) {
+          return
+        }
+
+        requestedIds.current.add(directoryId)
+        queuedIds.current.add(directoryId)
+      })
+
+      if (queuedIds.current.size > 0 && flushTimer.current === null) {
+        flushTimer.current = window.setTimeout(flushQueue, PREVIEW_BATCH_DELAY_MS)
+      }
+    },
+    [flushQueue]
+  )
+
   useEffect(() => {
     observerRef.current?.disconnect()
 
     if (!('IntersectionObserver' in window)) {
-      subdirectories.forEach((subdirectory) => {
-        void loadThumbnails(subdirectory)
-      })
+      queueThumbnails(subdirectories.map((subdirectory) => subdirectory.directory_id))
       return
     }
 
+    const knownIds = new Set(subdirectories.map((subdirectory) => subdirectory.directory_id))
     const observer = new IntersectionObserver(
       (entries) => {
+        const visibleIds: string[] = []
         entries.forEach((entry) => {
           if (!entry.isIntersecting) {
             return
           }
 
           const directoryId = (entry.target as HTMLAnchorElement).dataset.directoryId
-          if (!directoryId) {
+          if (!directoryId || !knownIds.has(directoryId)) {
             return
           }
 
-          const subdirectory = subdirectories.find((item) => item.directory_id === directoryId)
-          if (!subdirectory) {
-            return
-          }
-
-          void loadThumbnails(subdirectory)
+          visibleIds.push(directoryId)
           observer.unobserve(entry.target)
         })
+        queueThumbnails(visibleIds)
       },
       { root: null, rootMargin: '120px 0px', threshold: 0.1 }
     )
@@ -98,7 +132,15 @@ export function useSubdirectoryThumbnails(
     })
 
     return () => observer.disconnect()
-  }, [loadThumbnails, subdirectories])
+  }, [queueThumbnails, subdirectories])
+
+  useEffect(() => {
+    return () => {
+      if (flushTimer.current !== null) {
+        window.clearTimeout(flushTimer.current)
+      }
+    }
+  }, [])
 
   const registerCard = useCallback((directoryId: string, element: HTMLAnchorElement | null) => {
     cardElements.current[directoryId] = element
@@ -1,22 +1,79 @@
 import { fetchJson } from '../../../api/http'
-import type { ViewerDirectoryEntry, ViewerImageEntry } from '../../../types/viewer'
+import type { ViewerDirectoryEntry, ViewerImageEntry, ViewerImagesPage } from '../../../types/viewer'
 
 export async function fetchViewerDirectories(): Promise<ViewerDirectoryEntry[]> {
   const data = await fetchJson<{ subdirectories: ViewerDirectoryEntry[] }>('/api/subdirectories')
   return data.subdirectories
 }
 
-export async function fetchViewerImages(directoryId: string): Promise<ViewerImageEntry[]> {
-  const data = await fetchJson<{ images: ViewerImageEntry[] }>(`/api/images/${encodeURIComponent(directoryId)}`)
-  return data.images
+export async function fetchViewerImagesPage(
+  directoryId: string,
+  limit: number,
+  cursor: string | null = null
+): Promise<ViewerImagesPage> {
+  const params = new URLSearchParams({ limit: String(limit), details: 'true' })
+  if (cursor) {
+    params.set('cursor', cursor)
+  }
+
+  return fetchJson<ViewerImagesPage>(`/api/images/${encodeURIComponent(directoryId)}?${params.toString()}`)
+}
+
+export type DisplaySize = {
+  width: number
+  height: number
+}
+
+// Omitting the size requests the original file.
+export function viewerImageUrl(fileId: string, size: DisplaySize | null = null): string {
+  const url = `/api/image/${encodeURIComponent(fileId)}`
+  if (!size) {
+    return url
+  }
+
+  return `${url}?w=${size.width}&h=${size.height}`
+}
+
+export type ViewerDeleteResult = {
+  file_id: string
+  status: number
+  deleted: string | null
 }
 
-export async function deleteViewerImage(fileId: string): Promise<void> {
-  const response = await fetch(`/api/image/${encodeURIComponent(fileId)}`, {
-    method: 'DELETE'
+export type TileInfo = {
+  width: number
+  height: number
+  tile_size: number
+  max_level: number
+}
+
+export async function fetchTileInfo(fileId: string): Promise<TileInfo> {
+  return fetchJson<TileInfo>(`${viewerImageUrl(fileId)}/tiles`)
+}
+
+export function viewerTileUrl(fileId: string, level: number, column: number, row: number): string {
+  return `${viewerImageUrl(fileId)}/tiles/${level}/${column}_${row}`
+}
+
+// Images that already fit the display are requested as originals, skipping a resized variant.
+export function viewerDisplayUrl(image: ViewerImageEntry, size: DisplaySize): string {
+  const fits = image.width && image.height && image.width <= size.width && image.height <= size.height
+  return viewerImageUrl(image.file_id, fits ? null : size)
+}
+
+// `keepalive` lets a final batch outlive the page when the viewer is closed.
+export async function deleteViewerImages(fileIds: string[], keepalive = false): Promise<ViewerDeleteResult[]> {
+  const response = await fetch('/api/images/delete', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ file_ids: fileIds }),
+    keepalive
   })
 
   if (!response.ok) {
     throw new Error(`HTTP ${response.status}`)
   }
+
+  const data = (await response.json()) as { results: ViewerDeleteResult[] }
+  return data.results
 }
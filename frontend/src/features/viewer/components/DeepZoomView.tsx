@@ -0,0 +1,138 @@
+import { useCallback, useEffect, useLayoutEffect, useRef, useState } from 'react'
+
+import { viewerTileUrl } from '../api/viewerApi'
+import type { TileInfo } from '../api/viewerApi'
+
+type DeepZoomViewProps = {
+  fileId: string
+  info: TileInfo
+  previewUrl: string
+  onDoubleClick: () => void
+}
+
+type Viewport = {
+  left: number
+  top: number
+  width: number
+  height: number
+}
+
+type Tile = {
+  column: number
+  row: number
+}
+
+function visibleRange(offset: number, extent: number, tileSize: number, total: number): [number, number] {
+  const last = Math.ceil(total / tileSize) - 1
+  return [Math.max(0, Math.floor(offset / tileSize)), Math.min(last, Math.floor((offset + extent) / tileSize))]
+}
+
+// Shows a large image at 1:1 (or zoomed out in powers of two with Ctrl+wheel) by loading only the
+// pyramid tiles inside the viewport, over the already loaded display-size image as a placeholder.
+export function DeepZoomView(props: DeepZoomViewProps) {
+  const { fileId, info, previewUrl, onDoubleClick } = props
+  const containerRef = useRef<HTMLDivElement>(null)
+  const pendingScroll = useRef<{ left: number; top: number } | null>(null)
+  // Each step halves the scale, so every zoom maps onto one pyramid level drawn at its native size.
+  const [zoomOut, setZoomOut] = useState(0)
+  const [viewport, setViewport] = useState<Viewport>({ left: 0, top: 0, width: 0, height: 0 })
+
+  const level = info.max_level - zoomOut
+  const levelWidth = Math.max(1, Math.ceil(info.width / 2 ** zoomOut))
+  const levelHeight = Math.max(1, Math.ceil(info.height / 2 ** zoomOut))
+
+  const updateViewport = useCallback(() => {
+    const container = containerRef.current
+    if (!container) {
+      return
+    }
+
+    setViewport({
+      left: container.scrollLeft,
+      top: container.scrollTop,
+      width: container.clientWidth,
+      height: container.clientHeight
+    })
+  }, [])
+
+  useLayoutEffect(() => {
+    const container = containerRef.current
+    if (container && pendingScroll.current) {
+      container.scrollLeft = pendingScroll.current.left
+      container.scrollTop = pendingScroll.current.top
+      pendingScroll.current = null
+    }
+    updateViewport()
+  }, [updateViewport, zoomOut])
+
+  useEffect(() => {
+    window.addEventListener('resize', updateViewport)
+    return () => {
+      window.removeEventListener('resize', updateViewport)
+    }
+  }, [updateViewport])
+
+  useEffect(() => {
+    const container = containerRef.current
+    if (!container) {
+      return
+    }
+
+    const handleWheel = (event: WheelEvent) => {
+      if (!event.ctrlKey || event.deltaY === 0) {
+        return
+      }
+
+      event.preventDefault()
+      const next = Math.min(info.max_level, Math.max(0, zoomOut + (event.deltaY > 0 ? 1 : -1)))
+      if (next === zoomOut) {
+        return
+      }
+
+      // Keep the point under the cursor in place across the zoom step.
+      const bounds = container.getBoundingClientRect()
+      const x = event.clientX - bounds.left
+      const y = event.clientY - bounds.top
+      const factor = 2 ** (zoomOut - next)
+      pendingScroll.current = {
+        left: (container.scrollLeft + x) * factor - x,
+        top: (container.scrollTop + y) * factor - y
+      }
+      setZoomOut(next)
+    }
+
+    container.addEventListener('wheel', handleWheel, { passive: false })
+    return () => {
+      container.removeEventListener('wheel', handleWheel)
+    }
+  }, [info.max_level, zoomOut])
+
+  const tiles: Tile[] = []
+  if (viewport.width > 0 && viewport.height > 0) {
+    const [firstColumn, lastColumn] = visibleRange(viewport.left, viewport.width, info.tile_size, levelWidth)
+    const [firstRow, lastRow] = visibleRange(viewport.top, viewport.height, info.tile_size, levelHeight)
+    for (let row = firstRow; row <= lastRow; row += 1) {
+      for (let column = firstColumn; column <= lastColumn; column += 1) {
+        tiles.push({ column, row })
+      }
+    }
+  }
+
+  return (
+    <div ref={containerRef} className="deep-zoom" onScroll={updateViewport} onDoubleClick={onDoubleClick}>
+      <div className="deep-zoom-canvas" style={{ width: levelWidth, height: levelHeight }}>
+        <img className="deep-zoom-preview" src={previewUrl} alt="" draggable={false} />
+        {tiles.map(({ column, row }) => (
+          <img
+            key={`${level}/${column}_${row}`}
+            className="deep-zoom-tile"
+            src={viewerTileUrl(fileId, level, column, row)}
+            alt=""
+            draggable={false}
+            style={{ left: column * info.tile_size, top: row * info.tile_size }}
+          />
+        ))}
+      </div>
+    </div>
+  )
+}
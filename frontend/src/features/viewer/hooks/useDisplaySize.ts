@@ -0,0 +1,36 @@
+import { useEffect, useState } from 'react'
+
+import type { DisplaySize } from '../api/viewerApi'
+
+// Mirrors DISPLAY_SIZES in app/services/thumbnail_service.py so resizes within a bucket reuse the same URL.
+const DISPLAY_SIZES = [640, 960, 1280, 1600, 1920, 2560, 3200, 3840]
+
+function snapDisplaySize(size: number): number {
+  return DISPLAY_SIZES.find((bucket) => size <= bucket) ?? DISPLAY_SIZES[DISPLAY_SIZES.length - 1]
+}
+
+function currentDisplaySize(): DisplaySize {
+  const ratio = window.devicePixelRatio || 1
+  return {
+    width: snapDisplaySize(Math.ceil(window.innerWidth * ratio)),
+    height: snapDisplaySize(Math.ceil(window.innerHeight * ratio))
+  }
+}
+
+export function useDisplaySize(): DisplaySize {
+  const [size, setSize] = useState<DisplaySize>(currentDisplaySize)
+
+  useEffect(() => {
+    const handleResize = () => {
+      const next = currentDisplaySize()
+      setSize((current) => (current.width === next.width && current.height === next.height ? current : next))
+    }
+
+    window.addEventListener('resize', handleResize)
+    return () => {
+      window.removeEventListener('resize', handleResize)
+    }
+  }, [])
+
+  return size
+}
@@ -0,0 +1,65 @@
+import { useEffect, useRef } from 'react'
+
+import { viewerDisplayUrl } from '../api/viewerApi'
+import type { DisplaySize } from '../api/viewerApi'
+import type { ViewerImageEntry } from '../../../types/viewer'
+
+const PREFETCH_AHEAD = 3
+const PREFETCH_BEHIND = 1
+
+function neighborIndexes(currentIndex: number, length: number, canWrap: boolean): number[] {
+  const indexes: number[] = []
+  const offsets = [
+    ...Array.from({ length: PREFETCH_AHEAD }, (_, step) => step + 1),
+    ...Array.from({ length: PREFETCH_BEHIND }, (_, step) => -(step + 1))
+  ]
+
+  offsets.forEach((offset) => {
+    let index = currentIndex + offset
+    if (canWrap) {
+      index = (index + length) % length
+    }
+    if (index >= 0 && index < length && index !== currentIndex && !indexes.includes(index)) {
+      indexes.push(index)
+    }
+  })
+  return indexes
+}
+
+// Warms the browser cache for the images the viewer is likely to show next, so stepping
+// forward or back renders from cache instead of waiting on the network.
+export function useImagePrefetch(
+  images: ViewerImageEntry[],
+  currentIndex: number,
+  canWrap: boolean,
+  displaySize: DisplaySize
+): void {
+  const warmImages = useRef<Map<string, HTMLImageElement>>(new Map())
+
+  useEffect(() => {
+    if (currentIndex < 0 || images.length === 0) {
+      return
+    }
+
+    const wanted = new Set(
+      neighborIndexes(currentIndex, images.length, canWrap).map((index) => viewerDisplayUrl(images[index], displaySize))
+    )
+
+    warmImages.current.forEach((_, url) => {
+      if (!wanted.has(url)) {
+        warmImages.current.delete(url)
+      }
+    })
+
+    wanted.forEach((url) => {
+      if (warmImages.current.has(url)) {
+        return
+      }
+
+      const image = new Image()
+      image.decoding = 'async'
+      image.src = url
+      warmImages.current.set(url, image)
+    })
+  }, [canWrap, currentIndex, displaySize, images])
+}
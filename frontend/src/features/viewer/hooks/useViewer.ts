@@ -1,19 +1,75 @@
-import { useCallback, useMemo, useState } from 'react'
+import { useCallback, useEffect, useMemo, useRef, useState } from 'react'
 
-import { deleteViewerImage, fetchViewerDirectories, fetchViewerImages } from '../api/viewerApi'
+import { deleteViewerImages, fetchViewerDirectories, fetchViewerImagesPage } from '../api/viewerApi'
+import { useDisplaySize } from './useDisplaySize'
+import { useImagePrefetch } from './useImagePrefetch'
 import type { ViewerDirectoryEntry, ViewerImageEntry } from '../../../types/viewer'
 
+const IMAGES_PAGE_SIZE = 200
+const LOAD_MORE_THRESHOLD = 20
+// Deletions made in quick succession are sent together; the limit mirrors MAX_DELETE_BATCH on the server.
+const DELETE_BATCH_DELAY_MS = 300
+const MAX_DELETE_BATCH = 1000
+// Browsers reject keepalive requests once their bodies in flight exceed 64 KiB; stay a little below.
+const MAX_KEEPALIVE_BODY_BYTES = 60 * 1024
+const DELETE_BODY_OVERHEAD_BYTES = JSON.stringify({ file_ids: [] }).length
+
 type UseViewerState = {
   currentDirectory: ViewerDirectoryEntry | null
   images: ViewerImageEntry[]
+  total: number
+  nextCursor: string | null
+  loadingMore: boolean
   currentIndex: number
   status: string
 }
 
+type PendingDelete = {
+  directoryId: string
+  image: ViewerImageEntry
+}
+
+function positionStatus(index: number, total: number, image: ViewerImageEntry): string {
+  return `${index + 1} / ${total}: ${image.name}`
+}
+
+// Listings are sorted by name, so a restored entry goes back where it was.
+function insertByName(images: ViewerImageEntry[], image: ViewerImageEntry): ViewerImageEntry[] {
+  const index = images.findIndex((entry) => entry.name > image.name)
+  return index < 0 ? [...images, image] : [...images.slice(0, index), image, ...images.slice(index)]
+}
+
+// Splits IDs into delete requests that each respect MAX_DELETE_BATCH and the keepalive body limit.
+function keepaliveDeleteBatches(fileIds: string[]): string[][] {
+  const encoder = new TextEncoder()
+  const batches: string[][] = []
+  let batch: string[] = []
+  let bodyBytes = DELETE_BODY_OVERHEAD_BYTES
+  for (const fileId of fileIds) {
+    // The quoted ID plus its separating comma.
+    const idBytes = encoder.encode(JSON.stringify(fileId)).length + 1
+    if (batch.length > 0 && (batch.length >= MAX_DELETE_BATCH || bodyBytes + idBytes > MAX_KEEPALIVE_BODY_BYTES)) {
+      batches.push(batch)
+      batch = []
+      bodyBytes = DELETE_BODY_OVERHEAD_BYTES
+    }
+    batch.push(fileId)
+    bodyBytes += idBytes
+  }
+  if (batch.length > 0) {
+    batches.push(batch)
+  }
+  return batches
+}
+
 export function useViewer() {
+  const displaySize = useDisplaySize()
   const [state, setState] = useState<UseViewerState>({
     currentDirectory: null,
     images: [],
+    total: 0,
+    nextCursor: null,
+    loadingMore: false,
     currentIndex: -1,
     status: '読み込み中...'
   })
@@ -28,16 +84,21 @@ export function useViewer() {
         ...current,
         currentDirectory: directory,
         images: [],
+        total: 0,
+        nextCursor: null,
+        loadingMore: false,
         currentIndex: -1
       }))
 
       try {
-        const images = await fetchViewerImages(directory.directory_id)
-        if (images.length === 0) {
+        const page = await fetchViewerImagesPage(directory.directory_id, IMAGES_PAGE_SIZE)
+        if (page.images.length === 0) {
           setState((current) => ({
             ...current,
             currentDirectory: directory,
             images: [],
+            total: 0,
+            nextCursor: null,
             currentIndex: -1,
             status: '画像が見つかりません。'
           }))
@@ -47,9 +108,11 @@ export function useViewer() {
         setState((current) => ({
           ...current,
           currentDirectory: directory,
-          images,
+          images: page.images,
+          total: page.total,
+          nextCursor: page.next_cursor,
           currentIndex: 0,
-          status: `1 / ${images.length}: ${images[0].name}`
+          status: positionStatus(0, page.total, page.images[0])
         }))
       } catch (error) {
         const message = error instanceof Error ? error.message : String(error)
@@ -57,6 +120,8 @@ export function useViewer() {
           ...current,
           currentDirectory: directory,
           images: [],
+          total: 0,
+          nextCursor: null,
           currentIndex: -1,
           status: `画像一覧の取得に失敗しました: ${message}`
         }))
@@ -65,6 +130,50 @@ export function useViewer() {
     []
   )
 
+  useEffect(() => {
+    const { currentDirectory, nextCursor, loadingMore, images, currentIndex } = state
+    if (!currentDirectory || !nextCursor || loadingMore || currentIndex < images.length - LOAD_MORE_THRESHOLD) {
+      return
+    }
+
+    const isSamePage = (current: UseViewerState) =>
+      current.currentDirectory?.directory_id === currentDirectory.directory_id && current.nextCursor === nextCursor
+
+    setState((current) => ({ ...current, loadingMore: true }))
+    fetchViewerImagesPage(currentDirectory.directory_id, IMAGES_PAGE_SIZE, nextCursor)
+      .then((page) => {
+        setState((current) => {
+          if (!isSamePage(current)) {
+            return current
+          }
+
+          return {
+            ...current,
+            images: [...current.images, ...page.images],
+            total: page.total,
+            nextCursor: page.next_cursor,
+            loadingMore: false,
+            currentIndex: current.currentIndex < 0 && page.images.length > 0 ? 0 : current.currentIndex
+          }
+        })
+      })
+      .catch((error: unknown) => {
+        const message = error instanceof Error ? error.message : String(error)
+        setState((current) => {
+          if (!isSamePage(current)) {
+            return current
+          }
+
+          return {
+            ...current,
+            nextCursor: null,
+            loadingMore: false,
+            status: `画像一覧の取得に失敗しました: ${message}`
+          }
+        })
+      })
+  }, [state])
+
   const initialize = useCallback(async (requestedDirectoryId: string) => {
     try {
       const subdirectories = await fetchViewerDirectories()
@@ -87,6 +196,8 @@ export function useViewer() {
         ...current,
         currentDirectory: null,
         images: [],
+        total: 0,
+        nextCursor: null,
         currentIndex: -1,
         status: message
       }))
@@ -99,12 +210,16 @@ export function useViewer() {
         return current
       }
 
+      // Do not wrap around while later pages are still unloaded.
+      if (current.currentIndex === current.images.length - 1 && current.nextCursor) {
+        return current
+      }
+
       const nextIndex = (current.currentIndex + 1) % current.images.length
-      const nextImage = current.images[nextIndex]
       return {
         ...current,
         currentIndex: nextIndex,
-        status: `${nextIndex + 1} / ${current.images.length}: ${nextImage.name}`
+        status: positionStatus(nextIndex, current.total, current.images[nextIndex])
       }
     })
   }, [])
@@ -115,50 +230,126 @@ export function useViewer() {
         return current
       }
 
+      if (current.currentIndex === 0 && current.nextCursor) {
+        return current
+      }
+
       const nextIndex = (current.currentIndex - 1 + current.images.length) % current.images.length
-      const nextImage = current.images[nextIndex]
       return {
         ...current,
         currentIndex: nextIndex,
-        status: `${nextIndex + 1} / ${current.images.length}: ${nextImage.name}`
+        status: positionStatus(nextIndex, current.total, current.images[nextIndex])
       }
     })
   }, [])
 
-  const deleteCurrentImage = useCallback(async () => {
+  const pendingDeletes = useRef<PendingDelete[]>([])
+  const deleteTimer = useRef<number | null>(null)
+  const deleteInFlight = useRef(false)
+
+  const sendPendingDeletes = useCallback(async () => {
+    deleteTimer.current = null
+    if (deleteInFlight.current || pendingDeletes.current.length === 0) {
+      return
+    }
+
+    const batch = pendingDeletes.current.splice(0, MAX_DELETE_BATCH)
+    deleteInFlight.current = true
+    let failed: PendingDelete[] = []
+    let failureMessage = ''
+    try {
+      const results = await deleteViewerImages(batch.map((entry) => entry.image.file_id))
+      batch.forEach((entry, index) => {
+        const status = results[index]?.status
+        // 404 means the file is already gone, which is what the user asked for.
+        if (status !== 200 && status !== 404) {
+          failed.push(entry)
+          failureMessage = `HTTP ${status}`
+        }
+      })
+    } catch (error) {
+      failed = batch
+      failureMessage = error instanceof Error ? error.message : String(error)
+    } finally {
+      deleteInFlight.current = false
+    }
+
+    if (failed.length > 0) {
+      setState((current) => {
+        const restored = failed.filter((entry) => entry.directoryId === current.currentDirectory?.directory_id)
+        const images = restored.reduce((list, entry) => insertByName(list, entry.image), current.images)
+        return {
+          ...current,
+          images,
+          total: current.total + restored.length,
+          currentIndex: current.currentIndex < 0 && images.length > 0 ? 0 : current.currentIndex,
+          status: `画像の削除に失敗しました: ${failed.map((entry) => entry.image.name).join(', ')} (${failureMessage})`
+        }
+      })
+    }
+
+    if (pendingDeletes.current.length > 0) {
+      void sendPendingDeletes()
+    }
+  }, [])
+
+  useEffect(() => {
+    // Whatever is still queued when the viewer goes away is sent without waiting for the result.
+    const flushOnExit = () => {
+      if (deleteTimer.current !== null) {
+        window.clearTimeout(deleteTimer.current)
+        deleteTimer.current = null
+      }
+      const fileIds = pendingDeletes.current.splice(0).map((entry) => entry.image.file_id)
+      // The 64 KiB limit is shared by all keepalive requests in flight, so batches past it are refused.
+      for (const batch of keepaliveDeleteBatches(fileIds)) {
+        void deleteViewerImages(batch, true).catch(() => undefined)
+      }
+    }
+
+    window.addEventListener('pagehide', flushOnExit)
+    return () => {
+      window.removeEventListener('pagehide', flushOnExit)
+      flushOnExit()
+    }
+  }, [])
+
+  const deleteCurrentImage = useCallback(() => {
     const currentImage = state.images[state.currentIndex]
     const currentDirectory = state.currentDirectory
     if (!currentDirectory || !currentImage) {
       return
     }
 
-    try {
-      await deleteViewerImage(currentImage.file_id)
-      const reloadedImages = await fetchViewerImages(currentDirectory.directory_id)
-
-      if (reloadedImages.length === 0) {
-        setState((current) => ({
+    // Cursors are name based, so removing the entry locally keeps later pages valid.
+    setState((current) => {
+      const remainingImages = current.images.filter((image) => image.file_id !== currentImage.file_id)
+      if (remainingImages.length === 0 && !current.nextCursor) {
+        return {
           ...current,
           images: [],
+          total: 0,
           currentIndex: -1,
           status: '画像が見つかりません。'
-        }))
-        return
+        }
       }
 
-      const preservedIndex = reloadedImages.findIndex((image) => image.file_id === currentImage.file_id)
-      const nextIndex = preservedIndex >= 0 ? preservedIndex : Math.min(state.currentIndex, reloadedImages.length - 1)
-      setState((current) => ({
+      return {
         ...current,
-        images: reloadedImages,
-        currentIndex: nextIndex,
+        images: remainingImages,
+        total: Math.max(current.total - 1, remainingImages.length),
+        currentIndex: Math.min(current.currentIndex, remainingImages.length - 1),
         status: `画像を削除しました: ${currentImage.name}`
-      }))
-    } catch (error) {
-      const message = error instanceof Error ? error.message : String(error)
-      updateStatus(`画像の削除に失敗しました: ${message}`)
+      }
+    })
+
+    pendingDeletes.current.push({ directoryId: currentDirectory.directory_id, image: currentImage })
+    if (deleteTimer.current === null) {
+      deleteTimer.current = window.setTimeout(() => {
+        void sendPendingDeletes()
+      }, DELETE_BATCH_DELAY_MS)
     }
-  }, [state.currentDirectory, state.currentIndex, state.images, updateStatus])
+  }, [sendPendingDeletes, state.currentDirectory, state.currentIndex, state.images])
 
   const currentImage = useMemo(() => {
     if (state.currentIndex < 0 || state.currentIndex >= state.images.length) {
@@ -173,14 +364,18 @@ export function useViewer() {
       return '0 / 0'
     }
 
-    return `${state.currentIndex + 1} / ${state.images.length}`
-  }, [currentImage, state.currentIndex, state.images.length])
+    return `${state.currentIndex + 1} / ${state.total}`
+  }, [currentImage, state.currentIndex, state.total])
 
   const imageNameText = currentImage ? currentImage.name : ''
 
+  // Navigation only wraps around once every page is loaded; prefetch the same neighbors.
+  useImagePrefetch(state.images, state.currentIndex, !state.nextCursor, displaySize)
+
   return {
     currentDirectory: state.currentDirectory,
     currentImage,
+    displaySize,
     imageIndexText,
     imageNameText,
     status: state.status,
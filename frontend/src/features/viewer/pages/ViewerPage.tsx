@@ -1,7 +1,13 @@
-import { useEffect } from 'react'
+import { useEffect, useState } from 'react'
 
+import { fetchTileInfo, viewerDisplayUrl, viewerImageUrl } from '../api/viewerApi'
+import type { TileInfo } from '../api/viewerApi'
+import { DeepZoomView } from '../components/DeepZoomView'
 import { useViewer } from '../hooks/useViewer'
 
+// Above this many pixels the original is shown through pyramid tiles instead of one download.
+const DEEP_ZOOM_MIN_PIXELS = 16_000_000
+
 type ViewerPageProps = {
   requestedDirectoryId: string
   onNavigateHome: () => void
@@ -12,6 +18,7 @@ export function ViewerPage(props: ViewerPageProps) {
   const {
     currentDirectory,
     currentImage,
+    displaySize,
     imageIndexText,
     imageNameText,
     status,
@@ -21,6 +28,42 @@ export function ViewerPage(props: ViewerPageProps) {
     movePrevious,
     deleteCurrentImage
   } = useViewer()
+  const [showOriginal, setShowOriginal] = useState(false)
+  // `info` is null when the pyramid is unavailable, in which case the plain original is shown.
+  const [tileInfo, setTileInfo] = useState<{ fileId: string; info: TileInfo | null } | null>(null)
+
+  useEffect(() => {
+    setShowOriginal(false)
+  }, [currentImage])
+
+  const currentTileInfo = currentImage && tileInfo?.fileId === currentImage.file_id ? tileInfo : null
+  const usesDeepZoom =
+    Boolean(
+      currentImage?.width && currentImage.height && currentImage.width * currentImage.height >= DEEP_ZOOM_MIN_PIXELS
+    ) && currentTileInfo?.info !== null
+
+  useEffect(() => {
+    if (!showOriginal || !usesDeepZoom || !currentImage || currentTileInfo) {
+      return
+    }
+
+    let cancelled = false
+    const fileId = currentImage.file_id
+    fetchTileInfo(fileId)
+      .then((info) => {
+        if (!cancelled) {
+          setTileInfo({ fileId, info })
+        }
+      })
+      .catch(() => {
+        if (!cancelled) {
+          setTileInfo({ fileId, info: null })
+        }
+      })
+    return () => {
+      cancelled = true
+    }
+  }, [currentImage, currentTileInfo, showOriginal, usesDeepZoom])
 
   useEffect(() => {
     void initialize(requestedDirectoryId)
@@ -53,7 +96,8 @@ export function ViewerPage(props: ViewerPageProps) {
 
   useEffect(() => {
     const handleWheel = (event: WheelEvent) => {
-      if (event.deltaY === 0) {
+      // The original is shown at 1:1 scale, where the wheel scrolls the image instead of paging.
+      if (event.deltaY === 0 || showOriginal) {
         return
       }
 
@@ -72,13 +116,39 @@ export function ViewerPage(props: ViewerPageProps) {
     return () => {
       mainPane?.removeEventListener('wheel', handleWheel)
     }
-  }, [moveNext, movePrevious])
+  }, [moveNext, movePrevious, showOriginal])
 
   return (
     <main className="main">
-      <div className="image-stage">
-        {currentImage ? (
-          <img id="main-image" src={`/api/image/${encodeURIComponent(currentImage.file_id)}`} alt="画像プレビュー" style={{ display: "block" }} />
+      <div className={showOriginal ? 'image-stage is-original' : 'image-stage'}>
+        {currentImage && showOriginal && usesDeepZoom && currentTileInfo?.info ? (
+          <DeepZoomView
+            fileId={currentImage.file_id}
+            info={currentTileInfo.info}
+            previewUrl={viewerDisplayUrl(currentImage, displaySize)}
+            onDoubleClick={() => setShowOriginal(false)}
+          />
+        ) : currentImage ? (
+          <img
+            id="main-image"
+            // Large images keep the display variant until the tile pyramid takes over.
+            src={
+              showOriginal && !usesDeepZoom
+                ? viewerImageUrl(currentImage.file_id)
+                : viewerDisplayUrl(currentImage, displaySize)
+            }
+            alt="画像プレビュー"
+            title="ダブルクリックで原寸表示を切り替え"
+            width={currentImage.width ?? undefined}
+            height={currentImage.height ?? undefined}
+            // At 1:1 scale the known size reserves the scroll area before the original arrives.
+            style={
+              showOriginal && currentImage.width && currentImage.height
+                ? { display: 'block', width: currentImage.width, height: currentImage.height }
+                : { display: 'block' }
+            }
+            onDoubleClick={() => setShowOriginal((current) => !current)}
+          />
         ) : null}
         <p id="empty-message" style={{ display: currentImage ? 'none' : 'grid' }}>
           画像がありません
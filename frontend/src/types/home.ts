@@ -8,8 +8,30 @@ export type ImageEntry = {
   name: string
 }
 
+export type ContactSheetCell = {
+  file_id: string
+  x: number
+  y: number
+  width: number
+  height: number
+}
+
+export type ContactSheet = {
+  url: string
+  cell_size: number
+  cells: ContactSheetCell[]
+}
+
+export type DirectoryPreview = {
+  directory_id: string
+  images: ImageEntry[]
+  total: number
+  contact_sheet?: ContactSheet
+}
+
 export type ThumbnailState = {
   loading: boolean
   loaded: boolean
   images: ImageEntry[]
+  contactSheet: ContactSheet | null
 }
@@ -6,4 +6,15 @@ export type ViewerDirectoryEntry = {
 export type ViewerImageEntry = {
   file_id: string
   name: string
+  // Present when the listing is requested with `details=true`; dimensions are null if the header is unreadable.
+  width?: number | null
+  height?: number | null
+  size?: number | null
+  mtime?: number | null
+}
+
+export type ViewerImagesPage = {
+  images: ViewerImageEntry[]
+  total: number
+  next_cursor: string | null
 }
@@ -29,17 +29,20 @@ def api_client_factory(free_tcp_port_factory):
     clients: list[httpx.Client] = []
     processes: list[subprocess.Popen] = []
 
-    def _start(base_dir: Path) -> httpx.Client:
+    def _start(base_dir: Path, *extra_args: str) -> httpx.Client:
         port = free_tcp_port_factory()
         process = subprocess.Popen(
             [
                 "python",
                 "app.py",
                 str(base_dir),
+                "--cache-dir",
+                str(base_dir.parent / "cache"),
                 "--host",
                 "127.0.0.1",
                 "--port",
                 str(port),
+                *extra_args,
             ],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
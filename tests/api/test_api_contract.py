@@ -1,5 +1,31 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from PIL import Image
+
+
+def _rotated_exif():
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    return exif.tobytes()
+
+
+def _encoded(image, image_format):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
 
 def _first_directory_id(client):
     response = client.get("/api/subdirectories")
@@ -57,6 +83,153 @@ def test_get_images_for_existing_and_missing_directory(api_client_factory, copie
     assert missing.status_code == 404
 
 
+def test_get_images_paginates_with_cursor(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root)
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory_id = next(entry["directory_id"] for entry in subdirectories if entry["name"] == "dir1")
+
+    first_page = client.get(f"/api/images/{directory_id}", params={"limit": 1}).json()
+    second_page = client.get(
+        f"/api/images/{directory_id}", params={"limit": 1, "cursor": first_page["next_cursor"]}
+    ).json()
+    unpaged = client.get(f"/api/images/{directory_id}").json()
+
+    assert first_page["total"] == 2
+    assert [entry["name"] for entry in first_page["images"]] == ["Aurelion.png"]
+    assert isinstance(first_page["next_cursor"], str)
+    assert [entry["name"] for entry in second_page["images"]] == ["cat1.png"]
+    assert second_page["next_cursor"] is None
+    assert unpaged["total"] == 2
+    assert len(unpaged["images"]) == 2
+    assert unpaged["next_cursor"] is None
+    assert client.get(f"/api/images/{directory_id}", params={"limit": 0}).status_code == 422
+    assert client.get(f"/api/images/{directory_id}", params={"cursor": "%%%"}).status_code == 400
+    # Valid base64 of bytes that are not UTF-8.
+    for cursor in ("_w", "gA", "wAA"):
+        assert client.get(f"/api/images/{directory_id}", params={"cursor": cursor}).status_code == 400
+
+
+def test_get_images_details_reports_header_dimensions(api_client_factory, copied_image_root):
+    directory = copied_image_root / "dir1"
+    Image.new("RGB", (40, 30)).save(directory / "wide.jpg", exif=_rotated_exif())
+    client = api_client_factory(copied_image_root)
+    directory_id = next(
+        entry["directory_id"]
+        for entry in client.get("/api/subdirectories").json()["subdirectories"]
+        if entry["name"] == "dir1"
+    )
+
+    plain = client.get(f"/api/images/{directory_id}").json()
+    detailed = client.get(f"/api/images/{directory_id}", params={"details": "true"}).json()
+
+    assert set(plain["images"][0]) == {"file_id", "name"}
+    by_name = {entry["name"]: entry for entry in detailed["images"]}
+    stat_result = (directory / "cat1.png").stat()
+    assert by_name["cat1.png"]["width"] == 1024
+    assert by_name["cat1.png"]["height"] == 1536
+    assert by_name["cat1.png"]["size"] == stat_result.st_size
+    assert by_name["cat1.png"]["mtime"] == stat_result.st_mtime
+    # EXIF orientation 6 rotates the stored 40x30 frame into a portrait image.
+    assert (by_name["wide.jpg"]["width"], by_name["wide.jpg"]["height"]) == (30, 40)
+
+
+def test_listing_cache_reuses_bodies_until_directory_changes(api_client_factory, copied_image_root):
+    directory = copied_image_root / "dir1"
+    past = time.time() - 60
+    os.utime(directory, (past, past))
+    client = api_client_factory(copied_image_root, "--listing-cache-mb", "8")
+    directory_id = next(
+        entry["directory_id"]
+        for entry in client.get("/api/subdirectories").json()["subdirectories"]
+        if entry["name"] == "dir1"
+    )
+
+    first = client.get(f"/api/images/{directory_id}")
+    second = client.get(f"/api/images/{directory_id}")
+    detailed = client.get(f"/api/images/{directory_id}", params={"details": "true"})
+    # Rewriting a file in place leaves the directory mtime alone, so the cached details body is reused.
+    shutil.copyfile(directory / "Aurelion.png", directory / "cat1.png")
+    detailed_again = client.get(f"/api/images/{directory_id}", params={"details": "true"})
+    shutil.copyfile(directory / "Aurelion.png", directory / "cat9.png")
+    changed = client.get(f"/api/images/{directory_id}")
+    changed_detailed = client.get(f"/api/images/{directory_id}", params={"details": "true"}).json()
+
+    assert first.headers["content-type"] == "application/json"
+    assert second.content == first.content
+    assert "width" in detailed.json()["images"][0]
+    assert detailed_again.content == detailed.content
+    assert [entry["name"] for entry in changed.json()["images"]] == [
+        *(entry["name"] for entry in first.json()["images"]),
+        "cat9.png",
+    ]
+    assert changed.json()["total"] == first.json()["total"] + 1
+    sizes = {entry["name"]: entry["size"] for entry in changed_detailed["images"]}
+    assert sizes["cat1.png"] == sizes["cat9.png"] == (directory / "Aurelion.png").stat().st_size
+
+
+def test_image_responses_hint_the_next_images_with_preload_links(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root, "--prefetch-hints", "1")
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory_id = next(entry["directory_id"] for entry in subdirectories if entry["name"] == "dir1")
+    first_id, last_id = (entry["file_id"] for entry in client.get(f"/api/images/{directory_id}").json()["images"])
+
+    original = client.get(f"/api/image/{first_id}")
+    display = client.get(f"/api/image/{first_id}", params={"w": 640})
+    revalidated = client.get(f"/api/image/{first_id}", headers={"If-None-Match": original.headers["etag"]})
+
+    assert original.headers["link"] == f"</api/image/{last_id}>; rel=preload; as=image"
+    assert display.headers["link"] == f"</api/image/{last_id}?w=640>; rel=preload; as=image"
+    assert revalidated.status_code == 304
+    assert "link" not in revalidated.headers
+    assert "link" not in client.get(f"/api/image/{last_id}").headers
+    disabled = api_client_factory(copied_image_root, "--prefetch-hints", "0")
+    disabled_response = disabled.get(f"/api/image/{_first_file_id(disabled, _first_directory_id(disabled))}")
+    assert disabled_response.status_code == 200
+    assert "link" not in disabled_response.headers
+
+
+def test_get_images_reflects_files_added_after_listing(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root)
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory = next(entry for entry in subdirectories if entry["name"] == "dir2")
+
+    before = client.get(f"/api/images/{directory['directory_id']}").json()["images"]
+    shutil.copyfile(copied_image_root / "dir1" / "cat1.png", copied_image_root / "dir2" / "cat-copy.png")
+    after = client.get(f"/api/images/{directory['directory_id']}").json()["images"]
+
+    assert [entry["name"] for entry in before] == ["dog1.png"]
+    assert [entry["name"] for entry in after] == ["cat-copy.png", "dog1.png"]
+
+
+def test_watch_mode_applies_external_changes(api_client_factory, copied_image_root):
+    # A long stat cache TTL shows that watched changes, not expiry, drop the cached stats.
+    client = api_client_factory(copied_image_root, "--watch", "--stat-cache-ttl", "600")
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory = next(entry for entry in subdirectories if entry["name"] == "dir1")
+    images = client.get(f"/api/images/{directory['directory_id']}").json()["images"]
+    removed = next(entry for entry in images if entry["name"] == "cat1.png")
+    rewritten = next(entry for entry in images if entry["name"] == "Aurelion.png")
+    assert client.get(f"/api/image/{removed['file_id']}").status_code == 200
+    old_etag = client.get(f"/api/image/{rewritten['file_id']}").headers["etag"]
+
+    (copied_image_root / "dir1" / "cat1.png").unlink()
+    shutil.copyfile(copied_image_root / "dir2" / "dog1.png", copied_image_root / "dir1" / "dog-copy.png")
+    (copied_image_root / "dir1" / "Aurelion.png").write_bytes((copied_image_root / "dir2" / "dog1.png").read_bytes())
+
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        names = [entry["name"] for entry in client.get(f"/api/images/{directory['directory_id']}").json()["images"]]
+        if names == ["Aurelion.png", "dog-copy.png"]:
+            break
+        time.sleep(0.1)
+    assert names == ["Aurelion.png", "dog-copy.png"]
+    assert client.get(f"/api/image/{removed['file_id']}").status_code == 404
+    revalidated = client.get(f"/api/image/{rewritten['file_id']}", headers={"If-None-Match": old_etag})
+    assert revalidated.status_code == 200
+    assert revalidated.headers["etag"] != old_etag
+    assert revalidated.content == (copied_image_root / "dir2" / "dog1.png").read_bytes()
+
+
 def test_get_and_head_image_contract(api_client_factory, copied_image_root):
     client = api_client_factory(copied_image_root)
     directory_id = _first_directory_id(client)
@@ -78,6 +251,372 @@ def test_get_and_head_image_contract(api_client_factory, copied_image_root):
     assert missing.status_code == 404
 
 
+def test_get_image_byte_ranges(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root)
+    directory_id = _first_directory_id(client)
+    file_id = _first_file_id(client, directory_id)
+    full = client.get(f"/api/image/{file_id}")
+    size = len(full.content)
+    assert full.headers["accept-ranges"] == "bytes"
+
+    partial = client.get(f"/api/image/{file_id}", headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == full.content[10:20]
+    assert partial.headers["content-range"] == f"bytes 10-19/{size}"
+
+    suffix = client.get(f"/api/image/{file_id}", headers={"Range": "bytes=-16"})
+    assert suffix.status_code == 206
+    assert suffix.content == full.content[-16:]
+
+    unsatisfiable = client.get(f"/api/image/{file_id}", headers={"Range": f"bytes={size}-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{size}"
+
+    multiple = client.get(f"/api/image/{file_id}", headers={"Range": "bytes=0-1,4-5"})
+    assert multiple.status_code == 200
+    assert multiple.content == full.content
+
+    stale = client.get(f"/api/image/{file_id}", headers={"Range": "bytes=0-9", "If-Range": 'W/"0-0"'})
+    assert stale.status_code == 200
+    assert stale.content == full.content
+
+    fresh = client.get(
+        f"/api/image/{file_id}", headers={"Range": "bytes=0-9", "If-Range": full.headers["etag"]}
+    )
+    assert fresh.status_code == 206
+    assert fresh.content == full.content[:10]
+
+
+def test_get_image_display_size_variants(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root)
+    directory_id = _first_directory_id(client)
+    file_id = _first_file_id(client, directory_id)
+    original = client.get(f"/api/image/{file_id}")
+
+    resized = client.get(f"/api/image/{file_id}", params={"w": 500, "h": 600}, headers={"Accept": "image/webp"})
+    assert resized.status_code == 200
+    assert resized.headers["content-type"] == "image/webp"
+    assert resized.headers["vary"] == "Accept"
+    assert len(resized.content) < len(original.content)
+    with Image.open(io.BytesIO(resized.content)) as image:
+        assert image.size == (427, 640)
+
+    etag = resized.headers["etag"]
+    snapped = client.get(
+        f"/api/image/{file_id}",
+        params={"w": 640, "h": 640},
+        headers={"Accept": "image/webp", "If-None-Match": etag},
+    )
+    assert snapped.status_code == 304
+
+    larger_than_source = client.get(f"/api/image/{file_id}", params={"w": 4000})
+    assert larger_than_source.status_code == 200
+    assert larger_than_source.content == original.content
+    assert client.get(f"/api/image/{file_id}", params={"w": 0}).status_code == 422
+
+
+def test_deep_zoom_tiles_cover_each_pyramid_level(api_client_factory, copied_image_root):
+    Image.new("RGB", (1500, 1000), "teal").save(copied_image_root / "dir2" / "scan.png")
+    client = api_client_factory(copied_image_root)
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory_id = next(entry["directory_id"] for entry in subdirectories if entry["name"] == "dir2")
+    images = client.get(f"/api/images/{directory_id}").json()["images"]
+    file_id = next(entry["file_id"] for entry in images if entry["name"] == "scan.png")
+
+    info = client.get(f"/api/image/{file_id}/tiles").json()
+    corner = client.get(f"/api/image/{file_id}/tiles/11/2_1", headers={"Accept": "image/webp"})
+    revalidated = client.get(
+        f"/api/image/{file_id}/tiles/11/2_1",
+        headers={"Accept": "image/webp", "If-None-Match": corner.headers["etag"]},
+    )
+    smallest = client.get(f"/api/image/{file_id}/tiles/0/0_0", headers={"Accept": "image/jpeg"})
+
+    assert info == {"width": 1500, "height": 1000, "tile_size": 512, "max_level": 11}
+    assert corner.status_code == 200
+    assert corner.headers["content-type"] == "image/webp"
+    assert Image.open(io.BytesIO(corner.content)).size == (1500 - 1024, 1000 - 512)
+    assert revalidated.status_code == 304
+    assert Image.open(io.BytesIO(smallest.content)).size == (1, 1)
+    assert client.get(f"/api/image/{file_id}/tiles/11/3_0").status_code == 404
+    assert client.get(f"/api/image/{file_id}/tiles/12/0_0").status_code == 404
+    assert client.get("/api/image/missing/tiles").status_code == 404
+
+
+def test_images_over_pixel_limit_are_refused_but_originals_served(api_client_factory, copied_image_root):
+    Image.new("RGB", (1500, 1000), "teal").save(copied_image_root / "dir2" / "scan.png")
+
+    def scan_client(max_image_pixels):
+        client = api_client_factory(copied_image_root, "--max-image-pixels", str(max_image_pixels))
+        subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+        directory_id = next(entry["directory_id"] for entry in subdirectories if entry["name"] == "dir2")
+        images = client.get(f"/api/images/{directory_id}").json()["images"]
+        return client, next(entry["file_id"] for entry in images if entry["name"] == "scan.png")
+
+    limited, file_id = scan_client(1_000_000)
+    allowed, allowed_id = scan_client(1_500_000)
+
+    assert limited.get(f"/api/image/{file_id}/tiles").status_code == 415
+    assert limited.get(f"/api/image/{file_id}/tiles/0/0_0").status_code == 415
+    assert limited.get(f"/api/image/{file_id}", params={"w": 800, "h": 600}).status_code == 415
+    assert limited.get(f"/api/image/{file_id}").status_code == 200
+    # Thumbnails decode in the generation workers, which must apply the same limit.
+    assert limited.get(f"/api/thumbnail/{file_id}").status_code == 415
+    assert allowed.get(f"/api/thumbnail/{allowed_id}").status_code == 200
+    # The limit is the rejection threshold itself, not Pillow's warning threshold.
+    assert allowed.get(f"/api/image/{allowed_id}/tiles").json()["max_level"] == 11
+
+
+def test_transcode_negotiates_formats_per_accept_header(api_client_factory, copied_image_root):
+    with Image.open(copied_image_root / "dir2" / "dog1.png") as image:
+        image.convert("RGB").save(copied_image_root / "dir2" / "dog2.bmp")
+    client = api_client_factory(copied_image_root, "--transcode")
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory_id = next(entry["directory_id"] for entry in subdirectories if entry["name"] == "dir2")
+    images = {entry["name"]: entry["file_id"] for entry in client.get(f"/api/images/{directory_id}").json()["images"]}
+
+    png_original = client.get(f"/api/image/{images['dog1.png']}", headers={"Accept": "*/*"})
+    png_webp = client.get(f"/api/image/{images['dog1.png']}", headers={"Accept": "image/webp,*/*"})
+    bmp_fallback = client.get(f"/api/image/{images['dog2.bmp']}", headers={"Accept": "*/*"})
+
+    assert png_original.headers["content-type"] == "image/png"
+    assert png_original.headers["vary"] == "Accept"
+    assert png_webp.status_code == 200
+    assert png_webp.headers["content-type"] == "image/webp"
+    assert png_webp.headers["vary"] == "Accept"
+    assert png_webp.headers["etag"] != png_original.headers["etag"]
+    assert len(png_webp.content) < len(png_original.content)
+    assert bmp_fallback.headers["content-type"] == "image/jpeg"
+    assert len(bmp_fallback.content) < (copied_image_root / "dir2" / "dog2.bmp").stat().st_size
+
+    revalidated = client.get(
+        f"/api/image/{images['dog1.png']}",
+        headers={"Accept": "image/webp,*/*", "If-None-Match": png_webp.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+
+
+def test_transcode_falls_back_to_original_and_head_matches_get(api_client_factory, copied_image_root):
+    directory = copied_image_root / "dir2"
+    (directory / "broken.png").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 64)
+    client = api_client_factory(copied_image_root, "--transcode")
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory_id = next(entry["directory_id"] for entry in subdirectories if entry["name"] == "dir2")
+    images = {entry["name"]: entry["file_id"] for entry in client.get(f"/api/images/{directory_id}").json()["images"]}
+
+    head = client.head(f"/api/image/{images['dog1.png']}", headers={"Accept": "image/webp"})
+    get = client.get(f"/api/image/{images['dog1.png']}", headers={"Accept": "image/webp"})
+    broken_head = client.head(f"/api/image/{images['broken.png']}", headers={"Accept": "image/webp"})
+    broken = client.get(f"/api/image/{images['broken.png']}", headers={"Accept": "image/webp"})
+
+    assert head.status_code == get.status_code == 200
+    assert head.content == b""
+    for name in ("content-type", "etag", "content-length", "vary"):
+        assert head.headers[name] == get.headers[name]
+    assert get.headers["content-type"] == "image/webp"
+    assert int(get.headers["content-length"]) == len(get.content)
+    assert broken.status_code == 200
+    assert broken.headers["content-type"] == "image/png"
+    assert broken.content == (directory / "broken.png").read_bytes()
+    for name in ("content-type", "etag", "content-length"):
+        assert broken_head.headers[name] == broken.headers[name]
+
+
+def test_memory_cache_serves_hits_and_revalidates(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root, "--memory-cache-mb", "64")
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory_id = next(entry["directory_id"] for entry in subdirectories if entry["name"] == "dir2")
+    file_id = _first_file_id(client, directory_id)
+
+    first = client.get(f"/api/image/{file_id}")
+    second = client.get(f"/api/image/{file_id}")
+    partial = client.get(f"/api/image/{file_id}", headers={"Range": "bytes=0-9"})
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.content == first.content
+    assert partial.status_code == 206
+    assert partial.content == first.content[:10]
+
+    shutil.copyfile(copied_image_root / "dir1" / "cat1.png", copied_image_root / "dir2" / "dog1.png")
+    replaced = client.get(f"/api/image/{file_id}")
+
+    assert replaced.headers["x-cache"] == "MISS"
+    assert replaced.content == (copied_image_root / "dir1" / "cat1.png").read_bytes()
+
+
+def test_stat_cache_revalidates_and_forgets_deleted_images(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root, "--stat-cache-ttl", "60")
+    directory_id = _first_directory_id(client)
+    file_id = _first_file_id(client, directory_id)
+
+    etag = client.get(f"/api/image/{file_id}").headers["etag"]
+    revalidated = client.get(f"/api/image/{file_id}", headers={"If-None-Match": etag})
+    deleted = client.delete(f"/api/image/{file_id}")
+
+    assert revalidated.status_code == 304
+    assert deleted.status_code == 200
+    assert client.get(f"/api/image/{file_id}").status_code == 404
+
+
+def test_static_assets_are_compressed_and_cached(api_client_factory, copied_image_root, tmp_path):
+    static_dir = tmp_path / "static"
+    shutil.copytree("static", static_dir)
+    asset = next((static_dir / "home-app" / "assets").glob("index-*.js"))
+    asset.with_name(asset.name + ".br").write_bytes(b"prebuilt brotli sibling")
+    stylesheet_path = static_dir / "styles.css"
+    stylesheet_path.with_name("styles.css.br").write_bytes(b"sibling left over from another build")
+    asset_digest = hashlib.sha256(asset.read_bytes()).hexdigest()
+    manifest = {
+        f"home-app/assets/{asset.name}": {"sha256": asset_digest, "encodings": ["br"]},
+        "styles.css": {"sha256": hashlib.sha256(b"stale").hexdigest(), "encodings": ["br"]},
+    }
+    (static_dir / "precompressed.json").write_text(json.dumps({"files": manifest}))
+    client = api_client_factory(copied_image_root, "--static-dir", str(static_dir))
+    asset_url = f"/home-app/assets/{asset.name}"
+
+    gzipped = client.get(asset_url, headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+    assert gzipped.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert gzipped.content == asset.read_bytes()
+    assert int(gzipped.headers["content-length"]) < asset.stat().st_size
+
+    revalidated = client.get(
+        asset_url, headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+
+    brotli = client.get(asset_url, headers={"Accept-Encoding": "br, gzip"})
+    assert brotli.headers["content-encoding"] == "br"
+    assert brotli.headers["etag"] != gzipped.headers["etag"]
+
+    stylesheet = client.get("/styles.css", headers={"Accept-Encoding": "identity"})
+    assert stylesheet.status_code == 200
+    assert "content-encoding" not in stylesheet.headers
+    assert stylesheet.headers["cache-control"] == "no-cache"
+    assert client.get("/styles.css", headers={"Accept-Encoding": "br"}).content == stylesheet_path.read_bytes()
+
+
+def test_multiple_workers_share_resource_ids(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root, "--workers", "2")
+    directory_id = _first_directory_id(client)
+
+    def list_file_ids(_):
+        with httpx.Client(base_url=client.base_url, timeout=5.0) as fresh_client:
+            response = fresh_client.get(f"/api/images/{directory_id}")
+            assert response.status_code == 200
+            return tuple(entry["file_id"] for entry in response.json()["images"])
+
+    def fetch_status(file_id):
+        with httpx.Client(base_url=client.base_url, timeout=5.0) as fresh_client:
+            return fresh_client.head(f"/api/image/{file_id}").status_code
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        listings = set(executor.map(list_file_ids, range(16)))
+        (file_ids,) = listings
+        statuses = list(executor.map(fetch_status, file_ids * 8))
+
+    assert statuses == [200] * len(statuses)
+
+
+def test_single_io_thread_serves_concurrent_requests(api_client_factory, copied_image_root):
+    # Handlers hand blocking calls to the dedicated pool one at a time, so even one thread cannot deadlock.
+    client = api_client_factory(copied_image_root, "--io-threads", "1")
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory_ids = [entry["directory_id"] for entry in subdirectories]
+    files = {
+        entry["file_id"]: copied_image_root / subdirectory["name"] / entry["name"]
+        for subdirectory in subdirectories
+        for entry in client.get(f"/api/images/{subdirectory['directory_id']}").json()["images"]
+    }
+    ranges = [None, "bytes=0-99"]
+
+    def list_details(directory_id):
+        return client.get(f"/api/images/{directory_id}", params={"details": "true"})
+
+    def fetch_image(request):
+        file_id, byte_range = request
+        return client.get(f"/api/image/{file_id}", headers={"Range": byte_range} if byte_range else {})
+
+    image_requests = [(file_id, byte_range) for file_id in files for byte_range in ranges] * 4
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        listings = executor.map(list_details, directory_ids * 4)
+        images = executor.map(fetch_image, image_requests)
+        listings, images = list(listings), list(images)
+
+    assert all(response.status_code == 200 for response in listings)
+    assert all(entry["size"] is not None for response in listings for entry in response.json()["images"])
+    for (file_id, byte_range), response in zip(image_requests, images):
+        body = files[file_id].read_bytes()
+        assert response.status_code == (206 if byte_range else 200)
+        assert response.content == (body[:100] if byte_range else body)
+
+
+def test_benchmark_tree_is_served_and_latency_benchmark_reports_every_scenario(api_client_factory, tmp_path):
+    root = tmp_path / "bench_root"
+    generated = subprocess.run(
+        ["python", "benchmarks/synthetic_tree.py", str(root), "--directories", "2", "--files", "6"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert json.loads(generated.stdout)["files"] == 12
+    client = api_client_factory(root)
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    assert sorted(entry["name"] for entry in subdirectories) == ["dir00000", "dir00001"]
+    listing = client.get(f"/api/images/{subdirectories[0]['directory_id']}").json()
+    assert listing["total"] == 6
+    assert client.get(f"/api/thumbnail/{listing['images'][0]['file_id']}").status_code == 200
+
+    benchmark = subprocess.run(
+        ["python", "benchmarks/api_latency.py", "--root", str(root), "--requests", "12", "--concurrency", "4"],
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=120,
+    )
+    results = {line["scenario"]: line for line in map(json.loads, benchmark.stdout.splitlines())}
+    assert list(results) == ["subdirectories", "images", "image-cold", "image-warm", "image-304"]
+    for result in results.values():
+        assert result["requests"] == 12
+        assert result["errors"] == 0
+
+
+def test_metrics_endpoint_reports_routes_caches_and_filesystem_calls(api_client_factory, copied_image_root):
+    client = api_client_factory(
+        copied_image_root, "--metrics", "--stat-cache-ttl", "60", "--prefetch-hints", "0", "--memory-cache-mb", "64"
+    )
+    directory_id = _first_directory_id(client)
+    file_id = _first_file_id(client, directory_id)
+    etag = client.get(f"/api/image/{file_id}").headers["etag"]
+    assert client.get(f"/api/image/{file_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_responses_total{method="GET",route="/api/image/{file_id}",status="304"} 1' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/image/{file_id}"} 2' in body
+    assert 'http_response_bytes_total{route="/api/image/{file_id}"}' in body
+    assert 'cache_hits_total{cache="stat"} 1' in body
+    # The 304 is answered before the body cache is consulted.
+    assert 'cache_misses_total{cache="image_memory"} 1' in body
+    assert 'cache_hits_total{cache="image_memory"} 0' in body
+    image_bytes = next(line for line in body.splitlines() if line.startswith("image_memory_cache_bytes "))
+    assert int(image_bytes.split()[1]) > 0
+    assert 'filesystem_call_duration_seconds_count{operation="list_images_page"}' in body
+    registry_entries = next(line for line in body.splitlines() if line.startswith("registry_entries "))
+    assert int(registry_entries.split()[1]) > 0
+
+    for url in [f"/api/thumbnail/{file_id}", f"/api/image/{file_id}/tiles/0/0_0"] * 2:
+        assert client.get(url).status_code == 200
+    body = client.get("/metrics").text
+    # One hit or miss per derivative request, however many times the cache is consulted for it.
+    assert 'cache_misses_total{cache="derived"} 2' in body
+    assert 'cache_hits_total{cache="derived"} 2' in body
+
+
 def test_delete_image_then_fetch_returns_404(api_client_factory, copied_image_root):
     client = api_client_factory(copied_image_root)
     directory_id = _first_directory_id(client)
@@ -91,6 +630,26 @@ def test_delete_image_then_fetch_returns_404(api_client_factory, copied_image_ro
     assert fetch_after_delete.status_code == 404
 
 
+def test_batch_delete_reports_per_item_results(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root)
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory_id = next(entry["directory_id"] for entry in subdirectories if entry["name"] == "dir1")
+    images = client.get(f"/api/images/{directory_id}").json()["images"]
+    file_ids = [entry["file_id"] for entry in images]
+
+    response = client.post("/api/images/delete", json={"file_ids": [*file_ids, "missing-id"]})
+    empty = client.post("/api/images/delete", json={"file_ids": []})
+
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        *({"file_id": entry["file_id"], "status": 200, "deleted": entry["name"]} for entry in images),
+        {"file_id": "missing-id", "status": 404, "deleted": None},
+    ]
+    assert all(client.get(f"/api/image/{file_id}").status_code == 404 for file_id in file_ids)
+    assert client.get(f"/api/images/{directory_id}").json()["total"] == 0
+    assert empty.status_code == 422
+
+
 def test_put_subdirectory_rename_success_and_conflict(api_client_factory, copied_image_root):
     client = api_client_factory(copied_image_root)
 
@@ -122,3 +681,214 @@ def test_put_subdirectory_rename_success_and_conflict(api_client_factory, copied
     names = [entry["name"] for entry in refreshed.json()["subdirectories"]]
     assert "renamed-dir" in names
     assert rename_target["name"] not in names
+
+
+def test_get_thumbnail_contract(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root)
+    directory_id = _first_directory_id(client)
+    file_id = _first_file_id(client, directory_id)
+    original = client.get(f"/api/image/{file_id}")
+
+    webp_response = client.get(f"/api/thumbnail/{file_id}?size=200", headers={"Accept": "image/webp,*/*"})
+    assert webp_response.status_code == 200
+    assert webp_response.headers["content-type"] == "image/webp"
+    assert webp_response.headers["vary"] == "Accept"
+    assert 0 < len(webp_response.content) < len(original.content)
+
+    cached_response = client.get(f"/api/thumbnail/{file_id}?size=200", headers={"Accept": "image/webp,*/*"})
+    assert cached_response.content == webp_response.content
+
+    not_modified = client.get(
+        f"/api/thumbnail/{file_id}?size=200",
+        headers={"Accept": "image/webp,*/*", "If-None-Match": webp_response.headers["etag"]},
+    )
+    assert not_modified.status_code == 304
+
+    jpeg_response = client.get(f"/api/thumbnail/{file_id}?size=200", headers={"Accept": "image/*"})
+    assert jpeg_response.status_code == 200
+    assert jpeg_response.headers["content-type"] == "image/jpeg"
+    assert jpeg_response.headers["etag"] != webp_response.headers["etag"]
+
+    missing = client.get("/api/thumbnail/not-found-file-id")
+    assert missing.status_code == 404
+
+
+def test_concurrent_thumbnail_requests_share_one_result(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root)
+    directory_id = _first_directory_id(client)
+    file_id = _first_file_id(client, directory_id)
+
+    def fetch(_):
+        return client.get(f"/api/thumbnail/{file_id}?size=128", headers={"Accept": "image/webp"})
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        responses = list(executor.map(fetch, range(10)))
+
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.content for response in responses}) == 1
+
+
+def test_post_subdirectory_previews_batches_directories(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root)
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory_ids = [entry["directory_id"] for entry in subdirectories]
+
+    response = client.post(
+        "/api/subdirectories/previews",
+        json={"directory_ids": [*directory_ids, "not-found-directory-id"], "limit": 1},
+    )
+
+    assert response.status_code == 200
+    previews = {entry["directory_id"]: entry for entry in response.json()["previews"]}
+    assert set(previews) == set(directory_ids)
+    for directory_id in directory_ids:
+        expected = client.get(f"/api/images/{directory_id}").json()
+        assert previews[directory_id]["total"] == expected["total"]
+        assert previews[directory_id]["images"] == expected["images"][:1]
+
+    too_many = client.post("/api/subdirectories/previews", json={"directory_ids": directory_ids, "limit": 100})
+    assert too_many.status_code == 422
+
+
+def test_contact_sheet_sprite_matches_preview_map(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root)
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory_id = next(entry["directory_id"] for entry in subdirectories if entry["name"] == "dir1")
+
+    def preview(payload):
+        response = client.post("/api/subdirectories/previews", json={"directory_ids": [directory_id], **payload})
+        return response.json()["previews"][0]
+
+    plain = preview({"limit": 5})
+    mapped = preview({"limit": 5, "contact_sheet_size": 200})
+    sheet = mapped["contact_sheet"]
+    sprite = client.get(sheet["url"], headers={"Accept": "image/webp"})
+    revalidated = client.get(sheet["url"], headers={"Accept": "image/webp", "If-None-Match": sprite.headers["etag"]})
+
+    assert "contact_sheet" not in plain
+    assert sheet["cell_size"] == 256
+    assert sheet["cells"] == [
+        {"file_id": image["file_id"], "x": index * 256, "y": 0, "width": 256, "height": 256}
+        for index, image in enumerate(mapped["images"])
+    ]
+    assert sprite.status_code == 200
+    assert sprite.headers["content-type"] == "image/webp"
+    assert Image.open(io.BytesIO(sprite.content)).size == (256 * len(mapped["images"]), 256)
+    assert revalidated.status_code == 304
+
+    shutil.copyfile(copied_image_root / "dir1" / "cat1.png", copied_image_root / "dir1" / "cat2.png")
+    changed = preview({"limit": 5, "contact_sheet_size": 200})["contact_sheet"]
+    resized = client.get(changed["url"], headers={"Accept": "image/webp"})
+
+    assert changed["url"] != sheet["url"]
+    assert len(changed["cells"]) == len(sheet["cells"]) + 1
+    assert Image.open(io.BytesIO(resized.content)).size == (256 * len(changed["cells"]), 256)
+    assert client.get("/api/subdirectories/missing/contact-sheet").status_code == 404
+
+
+def test_signed_ids_survive_restart_and_reject_forgery(api_client_factory, copied_image_root):
+    first_client = api_client_factory(copied_image_root, "--id-scheme", "signed")
+    directory_id = _first_directory_id(first_client)
+    file_id = _first_file_id(first_client, directory_id)
+
+    second_client = api_client_factory(copied_image_root, "--id-scheme", "signed")
+
+    assert _first_directory_id(second_client) == directory_id
+    assert second_client.get(f"/api/image/{file_id}").status_code == 200
+
+    encoded_path, _, signature = file_id.partition(".")
+    forged_path = base64.urlsafe_b64encode(b"../image_root/dir1/cat1.png").decode().rstrip("=")
+    assert second_client.get(f"/api/image/{forged_path}.{signature}").status_code == 404
+    assert second_client.get(f"/api/image/{encoded_path}").status_code == 404
+
+
+def test_sharded_registry_serves_listing_and_images(api_client_factory, copied_image_root):
+    client = api_client_factory(copied_image_root, "--registry-shards", "8")
+    directory_id = _first_directory_id(client)
+    file_id = _first_file_id(client, directory_id)
+
+    assert _first_file_id(client, directory_id) == file_id
+    assert client.get(f"/api/image/{file_id}").status_code == 200
+    assert client.delete(f"/api/image/{file_id}").status_code == 200
+    assert client.get(f"/api/image/{file_id}").status_code == 404
+
+
+def test_zip_archives_are_browsed_as_directories(api_client_factory, copied_image_root):
+    page = _encoded(Image.new("RGB", (60, 40), "red"), "JPEG")
+    cover = _encoded(Image.new("RGB", (20, 30), "blue"), "PNG")
+    with zipfile.ZipFile(copied_image_root / "comic.cbz", "w") as archive:
+        archive.writestr("vol1/002.png", cover, compress_type=zipfile.ZIP_DEFLATED)
+        archive.writestr("vol1/001.jpg", page)
+        archive.writestr("vol1/notes.txt", b"not an image")
+        archive.writestr("../escape.jpg", page)
+    client = api_client_factory(copied_image_root)
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory_id = next(entry["directory_id"] for entry in subdirectories if entry["name"] == "comic.cbz")
+
+    listing = client.get(f"/api/images/{directory_id}").json()
+    detailed = client.get(f"/api/images/{directory_id}", params={"details": "true"}).json()
+    file_ids = {entry["name"]: entry["file_id"] for entry in listing["images"]}
+    page_url = f"/api/image/{file_ids['vol1/001.jpg']}"
+    original = client.get(page_url)
+    revalidated = client.get(page_url, headers={"If-None-Match": original.headers["etag"]})
+    partial = client.get(f"/api/image/{file_ids['vol1/002.png']}", headers={"Range": "bytes=8-"})
+    stored_partial = client.get(page_url, headers={"Range": "bytes=2-9"})
+    thumbnail = client.get(f"/api/thumbnail/{file_ids['vol1/002.png']}", headers={"Accept": "image/webp"})
+
+    assert list(file_ids) == ["vol1/001.jpg", "vol1/002.png"]
+    assert client.get(f"/api/images/{directory_id}").json()["images"] == listing["images"]
+    assert [(entry["width"], entry["height"]) for entry in detailed["images"]] == [(60, 40), (20, 30)]
+    assert original.status_code == 200
+    assert original.headers["content-type"] == "image/jpeg"
+    assert original.content == page
+    assert revalidated.status_code == 304
+    assert partial.status_code == 206
+    assert partial.content == cover[8:]
+    assert stored_partial.status_code == 206
+    assert stored_partial.content == page[2:10]
+    assert thumbnail.status_code == 200
+    assert Image.open(io.BytesIO(thumbnail.content)).size == (20, 30)
+    assert client.delete(page_url).status_code == 409
+    assert client.get(page_url).status_code == 200
+
+
+def test_unreadable_archives_are_listed_but_not_found(api_client_factory, copied_image_root):
+    page = _encoded(Image.new("RGB", (60, 40), "red"), "JPEG")
+    with zipfile.ZipFile(copied_image_root / "truncated.cbz", "w") as archive:
+        archive.writestr("001.jpg", page)
+    truncated = copied_image_root / "truncated.cbz"
+    truncated.write_bytes(truncated.read_bytes()[:40])
+    (copied_image_root / "garbage.zip").write_bytes(b"not a zip archive")
+    client = api_client_factory(copied_image_root)
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    archive_ids = [
+        entry["directory_id"] for entry in subdirectories if entry["name"] in {"truncated.cbz", "garbage.zip"}
+    ]
+    previews = client.post(
+        "/api/subdirectories/previews", json={"directory_ids": archive_ids, "limit": 3, "contact_sheet_size": 128}
+    )
+
+    assert len(archive_ids) == 2
+    for directory_id in archive_ids:
+        assert client.get(f"/api/images/{directory_id}").status_code == 404
+        assert client.get(f"/api/images/{directory_id}", params={"details": "true"}).status_code == 404
+        assert client.get(f"/api/subdirectories/{directory_id}/contact-sheet").status_code == 404
+    assert previews.status_code == 200
+    assert previews.json()["previews"] == []
+
+
+def test_members_of_an_archive_that_became_unreadable_are_not_found(api_client_factory, copied_image_root):
+    archive_path = copied_image_root / "comic.cbz"
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        archive.writestr("001.png", _encoded(Image.new("RGB", (20, 30), "blue"), "PNG"))
+    client = api_client_factory(copied_image_root)
+    subdirectories = client.get("/api/subdirectories").json()["subdirectories"]
+    directory_id = next(entry["directory_id"] for entry in subdirectories if entry["name"] == "comic.cbz")
+    (file_id,) = (entry["file_id"] for entry in client.get(f"/api/images/{directory_id}").json()["images"])
+    assert client.get(f"/api/image/{file_id}").status_code == 200
+
+    archive_path.write_bytes(b"overwritten with something that is not a zip archive")
+
+    assert client.get(f"/api/image/{file_id}").status_code == 404
+    assert client.get(f"/api/thumbnail/{file_id}").status_code == 404
+    assert client.get(f"/api/image/{file_id}/tiles").status_code == 404
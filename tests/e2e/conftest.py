@@ -26,6 +26,8 @@ def live_server(free_tcp_port_factory, copied_image_root: Path):
             "python",
             "app.py",
             str(copied_image_root),
+            "--cache-dir",
+            str(copied_image_root.parent / "cache"),
             "--host",
             "127.0.0.1",
             "--port",